@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import tempfile
 from pathlib import Path
 
 import yaml
@@ -41,3 +42,109 @@ GEMINI_MODEL: str = SETTINGS.get("gemini_model", "gemini-2.0-flash")
 DEFAULT_LANGUAGE: str = SETTINGS.get("default_language", "en")
 VIDEO_RESOLUTION: str = SETTINGS.get("video_resolution", "1920x1080")
 MUSIC_VOLUME: float = SETTINGS.get("music_volume", 0.15)
+# Background music library; its loudness index is kept in a sidecar file there.
+MUSIC_DIR: Path = BASE_DIR / SETTINGS.get("music_dir", "assets/music")
+
+# Render engine: "clips" encodes one Ken Burns clip per scene and concatenates,
+# "filtergraph" renders every scene and muxes the narration in a single encode,
+# "numpy" generates frames in worker processes and pipes them to one encoder.
+RENDER_ENGINE: str = SETTINGS.get("render_engine", "clips")
+# Concurrent Ken Burns clip encodes (0 = derive from the cgroup CPU quota) and
+# libx264 threads per encode.
+RENDER_WORKERS: int = int(SETTINGS.get("render_workers", 0))
+FFMPEG_THREADS: int = int(SETTINGS.get("ffmpeg_threads", 2))
+# Render profiles by name: resolution (short side), x264 preset/CRF and AAC
+# bitrate. Stories are reviewed as a "draft" render and published as "final",
+# which the publish encoding policy adapts within the bounds it sets.
+RENDER_PROFILES: dict[str, dict] = {
+    "draft": {"short_side": 540, "preset": "ultrafast", "crf": 30, "audio_bitrate": "96k"},
+    "final": {"short_side": 1080, "preset": "veryfast", "crf": 22, "audio_bitrate": "192k"},
+    **SETTINGS.get("render_profiles", {}),
+}
+# Segmented render for long stories (clips engine): window length in seconds of
+# video (0 = never segment) and scratch budget in MB for one window's images
+# and clips. Only the joined segments and the narration grow with the story.
+RENDER_SEGMENT_SECONDS: float = float(SETTINGS.get("render_segment_seconds", 300))
+RENDER_SCRATCH_MB: int = int(SETTINGS.get("render_scratch_mb", 1024))
+# Stream stream-copy muxes (all clips-engine outputs) straight into the videos
+# bucket as a TUS resumable upload of a fragmented MP4, skipping scratch files.
+RENDER_STREAM_UPLOAD: bool = bool(SETTINGS.get("render_stream_upload", True))
+# Numpy engine: rgb24 frames in flight between the frame workers and the
+# encoder, in MB (about 80 frames at 1080p), whatever the worker count.
+RENDER_FRAME_BUFFER_MB: int = int(SETTINGS.get("render_frame_buffer_mb", 512))
+# Publish encoding policy: bits per pixel the final render aims for, and how
+# many sampled scenes the probe encode measures it on (0 = keep the final CRF).
+ENCODING_TARGET_BPP: float = float(SETTINGS.get("encoding_target_bpp", 0.05))
+ENCODING_PROBE_SCENES: int = int(SETTINGS.get("encoding_probe_scenes", 3))
+# Render scratch space: RAM-backed root ("" = system temp dir, tmpfs on Cloud
+# Run) tried first, optional disk-backed root ("" = none), memory kept free for
+# the processes themselves, and how long a render waits for space in seconds.
+SCRATCH_RAM_DIR: str = SETTINGS.get("scratch_ram_dir", "")
+SCRATCH_DISK_DIR: str = SETTINGS.get("scratch_disk_dir", "")
+SCRATCH_HEADROOM_MB: int = int(SETTINGS.get("scratch_headroom_mb", 512))
+SCRATCH_WAIT_SECONDS: float = float(SETTINGS.get("scratch_wait_seconds", 600))
+
+# Text-to-speech: requests in flight at once (shared by every scene) and
+# connect/read timeouts in seconds
+TTS_CONCURRENCY: int = int(SETTINGS.get("tts_concurrency", 4))
+TTS_CONNECT_TIMEOUT: float = float(SETTINGS.get("tts_connect_timeout", 10))
+TTS_READ_TIMEOUT: float = float(SETTINGS.get("tts_read_timeout", 120))
+
+# Asset downloads (render inputs): parallel requests, per-request timeout in
+# seconds and retries for transient failures.
+DOWNLOAD_CONCURRENCY: int = int(SETTINGS.get("download_concurrency", 8))
+DOWNLOAD_TIMEOUT: float = float(SETTINGS.get("download_timeout", 30))
+DOWNLOAD_RETRIES: int = int(SETTINGS.get("download_retries", 3))
+
+# Persistent local caches live under the disk scratch root. Without one they
+# fall back to the system temp dir, which is instance RAM on Cloud Run, so
+# there each is capped at CACHE_RAM_MAX_MB unless its directory is set.
+CACHE_RAM_MAX_MB: int = int(SETTINGS.get("cache_ram_max_mb", 128))
+
+
+def _cache_dir(name: str) -> str:
+    return SETTINGS.get(f"{name}_dir") or os.path.join(
+        SCRATCH_DISK_DIR or tempfile.gettempdir(), "lost-archives", name.replace("_", "-"),
+    )
+
+
+def _cache_max_mb(name: str, default: int) -> int:
+    max_mb = int(SETTINGS.get(f"{name}_max_mb", default))
+    if SETTINGS.get(f"{name}_dir") or SCRATCH_DISK_DIR:
+        return max_mb
+    return min(max_mb, CACHE_RAM_MAX_MB)
+
+
+# Rendered Ken Burns clip cache: local LRU tier and optional storage bucket tier
+# (empty = local only), pruned at startup to its size budget in MB.
+CLIP_CACHE_DIR: str = _cache_dir("clip_cache")
+CLIP_CACHE_MAX_MB: int = _cache_max_mb("clip_cache", 2048)
+CLIP_CACHE_BUCKET: str = SETTINGS.get("clip_cache_bucket", "")
+CLIP_CACHE_BUCKET_MAX_MB: int = int(SETTINGS.get("clip_cache_bucket_max_mb", 10240))
+# Synthesized narration cache, keyed by text and voice: local LRU tier and
+# optional storage bucket tier (empty = local only), pruned like the clip cache.
+TTS_CACHE_DIR: str = _cache_dir("tts_cache")
+TTS_CACHE_MAX_MB: int = _cache_max_mb("tts_cache", 512)
+TTS_CACHE_BUCKET: str = SETTINGS.get("tts_cache_bucket", "")
+TTS_CACHE_BUCKET_MAX_MB: int = int(SETTINGS.get("tts_cache_bucket_max_mb", 2048))
+
+# Review proxies shown instead of the full render and thumbnails: preview MP4
+# short side and video bitrate cap in kbps, WebP thumbnail width.
+PREVIEW_SHORT_SIDE: int = int(SETTINGS.get("preview_short_side", 480))
+PREVIEW_VIDEO_KBPS: int = int(SETTINGS.get("preview_video_kbps", 700))
+PREVIEW_THUMBNAIL_WIDTH: int = int(SETTINGS.get("preview_thumbnail_width", 640))
+
+# Frame thumbnails: TrueType font for the overlay text ("" = Pillow's bundled font)
+THUMBNAIL_FONT: str = SETTINGS.get("thumbnail_font", "")
+
+# Story variants: minimum share of an image's salient detail (saliency above its
+# background level) a smart crop must keep, otherwise the scene image is
+# generated again in the new format.
+VARIANT_MIN_SALIENCY: float = float(SETTINGS.get("variant_min_saliency", 0.6))
+# Largest upscale a crop may need to fill the final render's short side; more
+# and the image is generated again (Imagen's 1408x768 cropped to 9:16 is 432px
+# wide, 2.5x for 1080x1920).
+VARIANT_MAX_UPSCALE: float = float(SETTINGS.get("variant_max_upscale", 2.0))
+
+# Upper bound in seconds for a single ffmpeg/ffprobe invocation.
+MEDIA_PROCESS_TIMEOUT: float = float(SETTINGS.get("media_process_timeout", 3600))
@@ -37,6 +37,11 @@ def create_thumbnail_option(data: dict) -> dict:
     return res.data[0]
 
 
+def update_thumbnail_option(option_id: str, data: dict) -> dict:
+    res = get_supabase().table("thumbnail_options").update(data).eq("id", option_id).execute()
+    return res.data[0]
+
+
 def get_thumbnail_options(story_id: str) -> list[dict]:
     res = get_supabase().table("thumbnail_options").select("*").eq("story_id", story_id).execute()
     return res.data
@@ -28,11 +28,23 @@ def list_stories(status: Optional[str] = None, limit: int = 20, offset: int = 0)
     return query.execute().data
 
 
+def list_variants(story_id: str) -> list[dict]:
+    res = get_supabase().table("stories").select("id, aspect_ratio, style, status").eq("variant_of", story_id).execute()
+    return res.data
+
+
 def update_story(story_id: str, data: dict) -> dict:
     res = get_supabase().table("stories").update(data).eq("id", story_id).execute()
     return res.data[0] if res.data else {}
 
 
+def update_metadata(story_id: str, data: dict) -> dict:
+    """Shallow-merge `data` into the story's metadata JSON, keeping other keys."""
+    res = get_supabase().table("stories").select("metadata").eq("id", story_id).single().execute()
+    metadata = {**((res.data or {}).get("metadata") or {}), **data}
+    return update_story(story_id, {"metadata": metadata})
+
+
 def delete_story(story_id: str) -> None:
     get_supabase().table("stories").delete().eq("id", story_id).execute()
 
@@ -1,12 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.routes import health, stories, review, pipeline
+from api.services import scratch
+from api.services.clip_cache import get_clip_cache
+from api.services.tts_cache import get_tts_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Renders killed mid-way leave their working directories behind
+    scratch.cleanup_orphans()
+    # Bucket cache tiers are only ever added to; trim them without holding up startup
+    pruning = asyncio.gather(
+        asyncio.to_thread(get_clip_cache().prune_bucket),
+        asyncio.to_thread(get_tts_cache().prune_bucket),
+    )
+    yield
+    await pruning
+
 
 app = FastAPI(
     title="The Lost Archives API",
     version="2.0",
     description="Pipeline automatizado de geração de vídeos de história para YouTube.",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
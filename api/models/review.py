@@ -11,6 +11,7 @@ from .story import TitleOptionResponse, ThumbnailOptionResponse
 class ReviewResponse(BaseModel):
     story_id: uuid.UUID
     video_url: Optional[str] = None
+    preview_video_url: Optional[str] = None
     title_options: list[TitleOptionResponse] = []
     thumbnail_options: list[ThumbnailOptionResponse] = []
     metadata: dict = {}
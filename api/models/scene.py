@@ -12,6 +12,7 @@ class SceneResponse(BaseModel):
     scene_order: int
     text_content: str
     translated_text: dict = {}
+    translated_audio: dict = {}
     image_prompt: Optional[str] = None
     image_url: Optional[str] = None
     audio_url: Optional[str] = None
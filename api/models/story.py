@@ -16,6 +16,12 @@ class CreateStoryRequest(BaseModel):
     languages: list[str] = Field(default=["en-US"])
     style: str = Field(default="cinematic", pattern="^(cinematic|anime|realistic|3d)$")
     aspect_ratio: str = Field(default="16:9", pattern="^(16:9|9:16)$")
+    thumbnail_mode: str = Field(default="generated", pattern="^(generated|frames)$")
+
+
+class CreateVariantRequest(BaseModel):
+    aspect_ratio: str = Field(pattern="^(16:9|9:16)$")
+    style: Optional[str] = Field(default=None, pattern="^(cinematic|anime|realistic|3d)$")
 
 
 class TitleOptionResponse(BaseModel):
@@ -26,6 +32,7 @@ class TitleOptionResponse(BaseModel):
 class ThumbnailOptionResponse(BaseModel):
     id: uuid.UUID
     image_url: str
+    preview_url: Optional[str] = None
     prompt: Optional[str] = None
 
 
@@ -43,6 +50,7 @@ class StoryDetailResponse(StoryResponse):
     description: Optional[str] = None
     target_duration_minutes: int = 8
     languages: list[str] = ["en-US"]
+    thumbnail_mode: str = "generated"
     script_text: Optional[str] = None
     scenes: list[SceneResponse] = []
     title_options: list[TitleOptionResponse] = []
@@ -50,6 +58,9 @@ class StoryDetailResponse(StoryResponse):
     selected_title: Optional[str] = None
     selected_thumbnail_url: Optional[str] = None
     video_url: Optional[str] = None
+    video_urls: dict = {}
+    preview_video_url: Optional[str] = None
     youtube_url: Optional[str] = None
     metadata: dict = {}
+    variant_of: Optional[uuid.UUID] = None
     error_message: Optional[str] = None
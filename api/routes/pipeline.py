@@ -54,11 +54,13 @@ async def run_translate(story_id: uuid.UUID):
 
 
 @router.post("/{story_id}/render")
-async def run_render(story_id: uuid.UUID):
+async def run_render(story_id: uuid.UUID, profile: str = "final"):
     _get_story_or_404(story_id)
-    from api.services.render import render_video
+    from api.services.render import PROFILES, render_video
+    if profile not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown render profile '{profile}'")
     try:
-        video_url = await render_video(str(story_id))
+        video_url = await render_video(str(story_id), profile=profile)
         return {"status": "ok", "video_url": video_url}
     except Exception as e:
         error_msg = f"{type(e).__name__}: {e}"
@@ -67,6 +69,34 @@ async def run_render(story_id: uuid.UUID):
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+@router.get("/{story_id}/render/progress")
+async def get_render_progress(story_id: uuid.UUID):
+    from api.services.render_progress import get_progress
+    progress = get_progress(str(story_id))
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"No render in progress for story {story_id}")
+    return progress
+
+
+@router.post("/{story_id}/scenes/{scene_id}/regenerate")
+async def run_regenerate_scene(story_id: uuid.UUID, scene_id: uuid.UUID, image: bool = True, audio: bool = False):
+    story = _get_story_or_404(story_id)
+    if not image and not audio:
+        raise HTTPException(status_code=400, detail="Nothing to regenerate: set image and/or audio")
+    from api.services.pipeline import LOCKED_STATUSES, regenerate_scene
+    if story.get("status") in LOCKED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Story {story_id} is {story['status']}; scenes can no longer be regenerated")
+    try:
+        video_url = await regenerate_scene(str(story_id), str(scene_id), image=image, audio=audio)
+        return {"status": "ok", "video_url": video_url}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        error_msg = f"{type(e).__name__}: {e}"
+        logger.error(f"Regenerate [{story_id}/{scene_id}] FAILED: {error_msg}\n{traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=error_msg)
+
+
 @router.post("/{story_id}/thumbnails")
 async def run_thumbnails(story_id: uuid.UUID):
     _get_story_or_404(story_id)
@@ -25,6 +25,7 @@ async def get_review(story_id: uuid.UUID):
     return {
         "story_id": story_id,
         "video_url": story.get("video_url"),
+        "preview_video_url": story.get("preview_video_url"),
         "title_options": options_repo.get_title_options(str(story_id)),
         "thumbnail_options": options_repo.get_thumbnail_options(str(story_id)),
         "metadata": story.get("metadata", {}),
@@ -62,6 +63,7 @@ async def select_review(story_id: uuid.UUID, body: SelectReviewRequest):
     return {
         "story_id": story_id,
         "video_url": story.get("video_url"),
+        "preview_video_url": story.get("preview_video_url"),
         "title_options": options_repo.get_title_options(str(story_id)),
         "thumbnail_options": options_repo.get_thumbnail_options(str(story_id)),
         "metadata": story.get("metadata", {}),
@@ -8,6 +8,7 @@ from typing import Optional
 from api.dependencies import verify_api_key
 from api.models.story import (
     CreateStoryRequest,
+    CreateVariantRequest,
     StoryResponse,
     StoryDetailResponse,
     TitleOptionResponse,
@@ -35,6 +36,7 @@ async def create_story(body: CreateStoryRequest, background_tasks: BackgroundTas
         "languages": body.languages,
         "style": body.style,
         "aspect_ratio": body.aspect_ratio,
+        "thumbnail_mode": body.thumbnail_mode,
         "status": "draft",
     })
 
@@ -48,6 +50,21 @@ async def create_story(body: CreateStoryRequest, background_tasks: BackgroundTas
     return story
 
 
+@router.post("/{story_id}/variants", response_model=StoryResponse, status_code=201)
+async def create_variant(story_id: uuid.UUID, body: CreateVariantRequest, background_tasks: BackgroundTasks):
+    """Re-cut a finished story in another aspect ratio/style, reusing its script, audio and images."""
+    _get_story_or_404(story_id)
+    from api.services.variants import clone_story
+    from api.services.pipeline import run_variant_pipeline
+    try:
+        variant = clone_story(str(story_id), body.aspect_ratio, body.style)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    background_tasks.add_task(run_variant_pipeline, variant["id"])
+    return variant
+
+
 @router.get("", response_model=list[StoryResponse])
 async def list_stories(
     status: Optional[str] = Query(None),
@@ -68,12 +85,14 @@ async def get_story(story_id: uuid.UUID):
 
 @router.delete("/{story_id}", status_code=204)
 async def delete_story(story_id: uuid.UUID):
-    _get_story_or_404(story_id)
+    story = _get_story_or_404(story_id)
 
-    # Clean up storage files
+    # Clean up storage files, keeping the ones this story's variants still play
     try:
-        from api.services.storage import delete_story_files
-        delete_story_files(str(story_id))
+        from api.services.storage import BUCKETS, delete_story_files
+        from api.services.variants import shared_buckets
+        shared = shared_buckets(story, story_repo.list_variants(str(story_id)))
+        delete_story_files(str(story_id), [b for b in BUCKETS if b not in shared])
     except (ImportError, Exception):
         pass  # Best-effort cleanup
 
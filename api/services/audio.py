@@ -1,33 +1,46 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import logging
-import subprocess
-import tempfile
-import os
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
 
-from api.config import GOOGLE_API_KEY, VOICES
-from api.services.storage import upload_file
+from api.config import GOOGLE_API_KEY, VOICES, TTS_CONCURRENCY, TTS_CONNECT_TIMEOUT, TTS_READ_TIMEOUT
+from api.services.storage import upload_file, versioned_path
+from api.services import mp3
+from api.services.mediainfo import get_duration
+from api.services.tts_cache import tts_key, get_narration, put_narration
 from api.db.repositories import story_repo, scene_repo
 
 logger = logging.getLogger(__name__)
 
 TTS_URL = "https://texttospeech.googleapis.com/v1/text:synthesize"
 TTS_CHAR_LIMIT = 5000
+AUDIO_CONFIG = {"audioEncoding": "MP3"}
 
+_http: requests.Session | None = None
+_tts_pool: ThreadPoolExecutor | None = None
+
+
+def _get_http_session() -> requests.Session:
+    """Shared session so TTS requests reuse pooled keep-alive connections."""
+    global _http
+    if _http is None:
+        _http = requests.Session()
+        _http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=TTS_CONCURRENCY))
+    return _http
 
-def _get_audio_duration(file_path: str) -> float:
-    cmd = [
-        "ffprobe", "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        file_path,
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    return float(result.stdout.strip())
+
+def _get_tts_pool() -> ThreadPoolExecutor:
+    """Threads running TTS requests; its size caps the requests in flight to the provider."""
+    global _tts_pool
+    if _tts_pool is None:
+        _tts_pool = ThreadPoolExecutor(max_workers=TTS_CONCURRENCY, thread_name_prefix="tts")
+    return _tts_pool
 
 
 def _chunk_text(text: str, limit: int = TTS_CHAR_LIMIT) -> list[str]:
@@ -58,9 +71,11 @@ def _synthesize_chunk(text: str, voice_name: str, language_code: str) -> bytes:
             "name": voice_name,
             "ssmlGender": "MALE",
         },
-        "audioConfig": {"audioEncoding": "MP3"},
+        "audioConfig": AUDIO_CONFIG,
     }
-    response = requests.post(f"{TTS_URL}?key={GOOGLE_API_KEY}", json=payload)
+    response = _get_http_session().post(
+        f"{TTS_URL}?key={GOOGLE_API_KEY}", json=payload, timeout=(TTS_CONNECT_TIMEOUT, TTS_READ_TIMEOUT),
+    )
     response.raise_for_status()
     audio_b64 = response.json().get("audioContent")
     if not audio_b64:
@@ -68,65 +83,72 @@ def _synthesize_chunk(text: str, voice_name: str, language_code: str) -> bytes:
     return base64.b64decode(audio_b64)
 
 
-async def generate_audio_for_scene(scene_id: str, story: dict) -> str:
-    scene = scene_repo.get_scene(scene_id)
-    if not scene:
-        raise ValueError(f"Scene {scene_id} not found")
+async def _synthesize_chunks(chunks: list[str], voice_name: str, language_code: str) -> list[bytes]:
+    """Synthesize chunks concurrently on the TTS pool; results keep the chunks' order."""
+    loop = asyncio.get_running_loop()
+    jobs = [
+        loop.run_in_executor(_get_tts_pool(), _synthesize_chunk, chunk, voice_name, language_code)
+        for chunk in chunks
+    ]
+    try:
+        return await asyncio.gather(*jobs)
+    except BaseException:
+        # One failed chunk fails the narration; drop the requests not yet sent
+        for job in jobs:
+            job.cancel()
+        raise
 
-    language = story.get("languages", ["en-US"])[0]
+
+async def _synthesize_audio(text: str, voice_name: str, language_code: str) -> tuple[bytes, float]:
+    """TTS `text` with the voice; returns (mp3 bytes, duration_seconds)."""
+    # Chunk text if needed (TTS limit = 5000 chars)
+    audio_parts = await _synthesize_chunks(_chunk_text(text), voice_name, language_code)
+
+    # Combine audio parts (frame by frame in memory; TTS parts share their encoding)
+    audio_data = await mp3.concat(audio_parts)
+    return audio_data, await get_duration(audio_data)
+
+
+async def _synthesize_narration(
+    text: str, language: str, storage_path: str, refresh: bool = False,
+) -> tuple[str, float]:
+    """TTS `text` in `language`, upload it and return (audio_url, duration_seconds).
+
+    Narration already synthesized with the same text and voice (an earlier
+    run, a regenerated story) comes from the TTS cache without calling TTS;
+    `refresh` always calls TTS and replaces the cached entry. The upload path
+    carries a hash of the audio, so new narration gets a new URL.
+    """
     voice_info = VOICES.get(language)
     if not voice_info:
         raise ValueError(f"Language '{language}' not in voices config")
 
     voice_name = voice_info["voice_name"]
     language_code = voice_info["language_code"]
-    text = scene["text_content"]
 
-    # Chunk text if needed (TTS limit = 5000 chars)
-    chunks = _chunk_text(text)
-    audio_parts = []
-    for chunk in chunks:
-        audio_parts.append(_synthesize_chunk(chunk, voice_name, language_code))
-
-    # Combine audio parts
-    if len(audio_parts) == 1:
-        audio_data = audio_parts[0]
+    key = tts_key(text, voice_name, language_code, AUDIO_CONFIG)
+    cached = None if refresh else await asyncio.to_thread(get_narration, key)
+    if cached:
+        audio_data, duration = cached
+        logger.info(f"Narration for {storage_path} reused from the TTS cache")
     else:
-        # Concatenate via ffmpeg
-        with tempfile.TemporaryDirectory() as tmpdir:
-            file_list_path = os.path.join(tmpdir, "files.txt")
-            part_paths = []
-            for i, part in enumerate(audio_parts):
-                part_path = os.path.join(tmpdir, f"part_{i}.mp3")
-                with open(part_path, "wb") as f:
-                    f.write(part)
-                part_paths.append(part_path)
-
-            with open(file_list_path, "w") as f:
-                for p in part_paths:
-                    f.write(f"file '{p}'\n")
-
-            combined_path = os.path.join(tmpdir, "combined.mp3")
-            subprocess.run(
-                ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", file_list_path, "-c", "copy", combined_path],
-                check=True, capture_output=True,
-            )
-            with open(combined_path, "rb") as f:
-                audio_data = f.read()
-
-    # Get duration
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-        tmp.write(audio_data)
-        tmp.flush()
-        duration = _get_audio_duration(tmp.name)
-        tmp_path = tmp.name
+        audio_data, duration = await _synthesize_audio(text, voice_name, language_code)
+        await asyncio.to_thread(put_narration, key, audio_data, duration)
 
-    try:
-        # Upload
-        storage_path = f"{story['id']}/{scene_id}.mp3"
-        audio_url = upload_file("audio", storage_path, audio_data, "audio/mpeg")
-    finally:
-        os.unlink(tmp_path)
+    audio_url = upload_file("audio", versioned_path(storage_path, audio_data), audio_data, "audio/mpeg")
+    return audio_url, duration
+
+
+async def generate_audio_for_scene(scene_id: str, story: dict, refresh: bool = False) -> str:
+    """Narrate the scene; `refresh` synthesizes it again even if the TTS cache has it."""
+    scene = scene_repo.get_scene(scene_id)
+    if not scene:
+        raise ValueError(f"Scene {scene_id} not found")
+
+    language = story.get("languages", ["en-US"])[0]
+    audio_url, duration = await _synthesize_narration(
+        scene["text_content"], language, f"{story['id']}/{scene_id}.mp3", refresh=refresh,
+    )
 
     # Update scene
     scene_repo.update_scene(scene_id, {"audio_url": audio_url, "duration_seconds": duration})
@@ -134,17 +156,52 @@ async def generate_audio_for_scene(scene_id: str, story: dict) -> str:
     return audio_url
 
 
+async def generate_translated_audio_for_scene(scene_id: str, story: dict, languages: list[str]) -> dict:
+    """Narrate the scene's translations; stored as translated_audio[lang] = {audio_url, duration_seconds}.
+
+    Languages are synthesized one after another so the scene's JSON column is
+    written by a single task.
+    """
+    scene = scene_repo.get_scene(scene_id)
+    if not scene:
+        raise ValueError(f"Scene {scene_id} not found")
+
+    translated_text = scene.get("translated_text") or {}
+    translated_audio = dict(scene.get("translated_audio") or {})
+    for language in languages:
+        text = translated_text.get(language)
+        if not text:
+            raise ValueError(f"Scene {scene_id} has no '{language}' translation")
+        audio_url, duration = await _synthesize_narration(
+            text, language, f"{story['id']}/{scene_id}.{language}.mp3",
+        )
+        translated_audio[language] = {"audio_url": audio_url, "duration_seconds": duration}
+        logger.info(f"Scene {scene_id}: '{language}' audio generated ({duration:.1f}s)")
+
+    scene_repo.update_scene(scene_id, {"translated_audio": translated_audio})
+    return translated_audio
+
+
 async def generate_audio_for_story(story_id: str) -> int:
     story = story_repo.get_story(story_id)
     if not story:
         raise ValueError(f"Story {story_id} not found")
 
     scenes = scene_repo.get_scenes_by_story(story_id)
+    targets = story.get("languages", ["en-US"])[1:]
     count = 0
     for scene in scenes:
         if not scene.get("audio_url"):
             await generate_audio_for_scene(scene["id"], story)
             count += 1
+        # Translations that exist but were never narrated
+        missing = [
+            lang for lang in targets
+            if (scene.get("translated_text") or {}).get(lang) and lang not in (scene.get("translated_audio") or {})
+        ]
+        if missing:
+            await generate_translated_audio_for_scene(scene["id"], story, missing)
+            count += len(missing)
 
     logger.info(f"Generated {count} audio files for story {story_id}")
     return count
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from api.services.storage import upload_file, download_object, list_objects, remove_objects
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Content-addressed file cache on local disk with size-based LRU eviction.
+
+    Entries are plain files named `<key><suffix>` under `root`; a hit bumps the
+    file's mtime so eviction drops the least recently used entries first. When
+    `bucket` is set, entries are also persisted to storage under `prefix` and
+    pulled back into the local tier on a local miss; `prune_bucket` keeps
+    that tier within `bucket_max_bytes`.
+    """
+
+    def __init__(
+        self, root: str, max_bytes: int, bucket: str = "", prefix: str = "", bucket_max_bytes: int = 0,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.bucket = bucket
+        self.prefix = prefix
+        self.bucket_max_bytes = bucket_max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, f"{key}{suffix}")
+
+    def _remote_path(self, key: str, suffix: str) -> str:
+        return f"{self.prefix}{key}{suffix}"
+
+    def get(self, key: str, suffix: str = "") -> str | None:
+        """Local path of a cached entry, or None on a miss in every tier."""
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        if not self.bucket:
+            return None
+        try:
+            data = download_object(self.bucket, self._remote_path(key, suffix))
+        except Exception as e:
+            logger.warning(f"Cache {self.bucket} lookup failed for {key}: {e}")
+            return None
+        if data is None:
+            return None
+        self._store_bytes(path, data)
+        return path
+
+    def put(self, key: str, src_path: str, suffix: str = "", content_type: str = "application/octet-stream") -> str:
+        """Add `src_path` to the cache (and the bucket tier) and return its cache path.
+
+        On the same filesystem the entry is a hard link to `src_path`, so a
+        render's fresh clips take no extra space while it still holds them.
+        """
+        path = self._path(key, suffix)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        os.close(fd)
+        os.remove(tmp)
+        try:
+            os.link(src_path, tmp)
+        except OSError:
+            shutil.copyfile(src_path, tmp)
+        os.replace(tmp, path)
+        self._evict()
+
+        if self.bucket:
+            with open(path, "rb") as f:
+                self._upload(key, suffix, f.read(), content_type)
+        return path
+
+    def put_bytes(self, key: str, data: bytes, suffix: str = "", content_type: str = "application/octet-stream") -> str:
+        """Store `data` as an entry (and in the bucket tier) and return its cache path."""
+        path = self._path(key, suffix)
+        self._store_bytes(path, data)
+        if self.bucket:
+            self._upload(key, suffix, data, content_type)
+        return path
+
+    def _upload(self, key: str, suffix: str, data: bytes, content_type: str) -> None:
+        try:
+            upload_file(self.bucket, self._remote_path(key, suffix), data, content_type)
+        except Exception as e:
+            logger.warning(f"Cache {self.bucket} upload failed for {key}: {e}")
+
+    def prune_bucket(self) -> int:
+        """Delete the oldest bucket entries beyond `bucket_max_bytes`; returns how many.
+
+        The bucket tier has no access times, so entries go in upload order.
+        """
+        if not self.bucket:
+            return 0
+        try:
+            objects = list_objects(self.bucket, self.prefix.rstrip("/"))
+            total = sum((obj.get("metadata") or {}).get("size", 0) for obj in objects)
+            stale = []
+            for obj in objects:
+                if total <= self.bucket_max_bytes:
+                    break
+                stale.append(f"{self.prefix}{obj['name']}")
+                total -= (obj.get("metadata") or {}).get("size", 0)
+            if stale:
+                remove_objects(self.bucket, stale)
+        except Exception as e:
+            logger.warning(f"Cache {self.bucket} prune failed: {e}")
+            return 0
+        return len(stale)
+
+    def _store_bytes(self, path: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.root):
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
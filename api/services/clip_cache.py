@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import hashlib
+
+from api.config import CLIP_CACHE_DIR, CLIP_CACHE_MAX_MB, CLIP_CACHE_BUCKET, CLIP_CACHE_BUCKET_MAX_MB
+from api.services.cache import DiskCache
+
+CLIP_SUFFIX = ".mp4"
+
+_cache: DiskCache | None = None
+
+
+def get_clip_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(
+            CLIP_CACHE_DIR,
+            CLIP_CACHE_MAX_MB * 1024 * 1024,
+            bucket=CLIP_CACHE_BUCKET,
+            prefix="clip-cache/",
+            bucket_max_bytes=CLIP_CACHE_BUCKET_MAX_MB * 1024 * 1024,
+        )
+    return _cache
+
+
+def clip_key(image_path: str, duration: float, effect: str, resolution: str, encoder: list[str]) -> str:
+    """Hash of everything that determines a rendered clip's bytes."""
+    h = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    h.update(f"|{duration:.4f}|{effect}|{resolution}|{' '.join(encoder)}".encode())
+    return h.hexdigest()
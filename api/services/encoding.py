@@ -0,0 +1,164 @@
+"""Render profiles and the encoding policy for the publish render.
+
+A profile fixes resolution, x264 preset/CRF, GOP and AAC bitrate. Drafts use
+their profile as configured; the publish render adapts the final profile to
+the story: the preset follows the content length (slower, tighter presets
+while the encode stays short), the CRF is steered towards a target
+bits-per-pixel (measured on a short probe encode of a few sampled scenes),
+and the audio bitrate follows what is actually in the mix. Mostly static Ken
+Burns content needs far fewer bits than a fixed CRF spends on it.
+
+The configured final profile bounds the policy: its preset is the fastest
+one used, its audio bitrate the highest and its CRF the lowest, so the probe
+can only make the encode smaller than the fixed profile would.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable
+
+from api.config import RENDER_PROFILES, ENCODING_TARGET_BPP, ENCODING_PROBE_SCENES
+from api.services.timeline import FPS, TimelineEntry
+
+# Every clip of a profile is encoded with identical parameters and closed GOPs
+# that start on an IDR frame, so clips can be joined (or swapped one at a time)
+# by stream copy.
+CLIP_ENCODER_ARGS = [
+    "-profile:v", "high", "-r", str(FPS), "-video_track_timescale", str(FPS * 512),
+    "-sc_threshold", "0", "-flags", "+cgop",
+]
+
+X264_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+# Slowest preset used up to each content length (minutes)
+PRESETS_BY_MINUTES = [(5, "medium"), (20, "faster"), (math.inf, "veryfast")]
+CRF_RANGE = (18, 30)
+# x264 output roughly halves for every +6 CRF
+CRF_PER_DOUBLING = 6
+# Keyframes only matter for seeking; slow-moving Ken Burns content compresses
+# noticeably better with longer GOPs
+PUBLISH_GOP_SECONDS = 4.0
+# One publish GOP from the middle of each probed clip: the same share of IDR
+# frames as the real encode, and the camera already moving
+PROBE_FRAMES = round(PUBLISH_GOP_SECONDS * FPS)
+SPEECH_AUDIO_BITRATE = "96k"
+MUSIC_AUDIO_BITRATE = "128k"
+
+ProbeEncoder = Callable[["RenderProfile", list[TimelineEntry]], Awaitable[int]]
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    short_side: int
+    preset: str
+    crf: int
+    audio_bitrate: str
+    gop_seconds: float = 2.0
+
+    def resolution(self, aspect_ratio: str) -> str:
+        long_side = round(self.short_side * 16 / 9 / 2) * 2
+        if aspect_ratio == "9:16":
+            return f"{self.short_side}x{long_side}"
+        return f"{long_side}x{self.short_side}"
+
+    @property
+    def video_args(self) -> list[str]:
+        gop = str(round(self.gop_seconds * FPS))
+        return [
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", self.preset, "-crf", str(self.crf),
+            "-g", gop, "-keyint_min", gop,
+        ]
+
+    @property
+    def clip_encoder_args(self) -> list[str]:
+        return [*self.video_args, *CLIP_ENCODER_ARGS]
+
+    @property
+    def audio_args(self) -> list[str]:
+        return ["-c:a", "aac", "-b:a", self.audio_bitrate]
+
+
+PROFILES = {name: RenderProfile(name=name, **values) for name, values in RENDER_PROFILES.items()}
+FINAL = PROFILES["final"]
+
+
+def get_profile(name: str) -> RenderProfile:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown render profile '{name}' (expected one of {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def _preset_for(seconds: float, fastest: str) -> str:
+    """Preset for `seconds` of content, never faster than `fastest`."""
+    preset = next(preset for minutes, preset in PRESETS_BY_MINUTES if seconds <= minutes * 60)
+    return max(preset, fastest, key=X264_PRESETS.index)
+
+
+def _kbps(bitrate: str) -> float:
+    return float(bitrate.lower().rstrip("k"))
+
+
+def probe_start(frames: int) -> int:
+    """First frame of a clip's probe window: PROBE_FRAMES centred in the clip."""
+    return max(0, (frames - PROBE_FRAMES) // 2)
+
+
+def probe_entries(timeline: list[TimelineEntry], count: int = ENCODING_PROBE_SCENES) -> list[TimelineEntry]:
+    """Up to `count` scenes spread evenly over the timeline."""
+    if count <= 0 or not timeline:
+        return []
+    count = min(count, len(timeline))
+    step = len(timeline) / count
+    return [timeline[int(i * step)] for i in range(count)]
+
+
+def crf_for_bpp(crf: int, measured_bpp: float, target_bpp: float = ENCODING_TARGET_BPP) -> int:
+    """CRF expected to bring an encode measured at `crf` to the target bits per pixel."""
+    if measured_bpp <= 0:
+        return crf
+    adjusted = crf + CRF_PER_DOUBLING * math.log2(measured_bpp / target_bpp)
+    return max(CRF_RANGE[0], min(CRF_RANGE[1], round(adjusted)))
+
+
+async def choose_profile(
+    base: RenderProfile,
+    timeline: list[TimelineEntry],
+    resolution: str,
+    has_music: bool,
+    probe: ProbeEncoder | None = None,
+) -> tuple[RenderProfile, dict]:
+    """Publish profile for this story and the record of how it was chosen.
+
+    `probe` encodes PROBE_FRAMES frames from the middle of each given entry
+    (see probe_start) with a profile and returns the bytes written; without
+    it the base profile's CRF is kept. The base profile's preset, audio
+    bitrate and CRF bound the ones chosen (the CRF is only ever raised).
+    """
+    duration = timeline[-1].end if timeline else 0.0
+    audio_bitrate = MUSIC_AUDIO_BITRATE if has_music else SPEECH_AUDIO_BITRATE
+    profile = replace(
+        base,
+        preset=_preset_for(duration, base.preset),
+        gop_seconds=PUBLISH_GOP_SECONDS,
+        audio_bitrate=min(audio_bitrate, base.audio_bitrate, key=_kbps),
+    )
+    record = {
+        "preset": profile.preset,
+        "gop_seconds": profile.gop_seconds,
+        "audio_bitrate": profile.audio_bitrate,
+        "target_bpp": ENCODING_TARGET_BPP,
+        "probe_bpp": None,
+    }
+
+    entries = probe_entries(timeline) if probe else []
+    if entries:
+        w, h = map(int, resolution.split("x"))
+        size = await probe(profile, entries)
+        measured = size * 8 / (w * h * sum(min(e.frames, PROBE_FRAMES) for e in entries))
+        profile = replace(profile, crf=max(profile.crf, crf_for_bpp(profile.crf, measured)))
+        record["probe_bpp"] = round(measured, 4)
+
+    record["crf"] = profile.crf
+    return profile, record
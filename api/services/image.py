@@ -9,7 +9,7 @@ from google.genai import Client
 from google.genai.types import GenerateImagesConfig
 
 from api.config import GOOGLE_API_KEY
-from api.services.storage import upload_file
+from api.services.storage import upload_file, versioned_path
 from api.db.repositories import story_repo, scene_repo
 
 logger = logging.getLogger(__name__)
@@ -70,8 +70,10 @@ Image Prompt:"""
 
     try:
         with open(tmp_path, "rb") as f:
-            storage_path = f"{story['id']}/{scene_id}.png"
-            image_url = upload_file("images", storage_path, f.read(), "image/png")
+            data = f.read()
+        # Versioned: a regenerated image must not be served from the CDN's copy of the old one
+        storage_path = versioned_path(f"{story['id']}/{scene_id}.png", data)
+        image_url = upload_file("images", storage_path, data, "image/png")
     finally:
         os.unlink(tmp_path)
 
@@ -0,0 +1,62 @@
+"""Ken Burns frame generation in Python for the "numpy" render engine.
+
+Reproduces the zoompan expressions used by render._zoompan_filter: crop boxes
+for every frame of a scene are computed at once with NumPy, and each frame is
+cut and resampled from the scene image, which is decoded once per worker
+process. Runs in worker processes, so it must not import api.config.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+
+def crop_boxes(effect: str, frames: int, w: int, h: int) -> np.ndarray:
+    """(frames, 4) array of (left, top, right, bottom) source boxes, zoompan-equivalent."""
+    n = np.arange(frames, dtype=np.float64)
+
+    if effect == "zoom_in":
+        zoom = np.minimum(1.0 + 0.0015 * (n + 1), 1.5)
+        pan = np.zeros(frames)
+    elif effect == "zoom_out":
+        zoom = np.maximum(1.001, 1.5 - 0.0015 * n)
+        zoom[0] = 1.5
+        pan = np.zeros(frames)
+    elif effect in ("pan_left", "pan_right"):
+        zoom = np.full(frames, 1.2)
+        direction = -1.0 if effect == "pan_left" else 1.0
+        pan = direction * (n / frames) * (w / zoom / 5)
+    else:
+        raise ValueError(f"Unknown effect: {effect}")
+
+    crop_w = w / zoom
+    crop_h = h / zoom
+    left = np.clip(w / 2 - crop_w / 2 + pan, 0, w - crop_w)
+    top = np.clip(h / 2 - crop_h / 2, 0, h - crop_h)
+    return np.stack([left, top, left + crop_w, top + crop_h], axis=1)
+
+
+@lru_cache(maxsize=2)
+def _load_scene_image(path: str, w: int, h: int) -> Image.Image:
+    """Decode and cover-fit the scene image to w x h (like the zoompan chain's scale+crop)."""
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        scale = max(w / img.width, h / img.height)
+        size = (max(w, round(img.width * scale)), max(h, round(img.height * scale)))
+        img = img.resize(size, Image.LANCZOS)
+    left = (img.width - w) // 2
+    top = (img.height - h) // 2
+    return img.crop((left, top, left + w, top + h))
+
+
+def render_frames(image_path: str, effect: str, frames: int, w: int, h: int, start: int, stop: int) -> bytes:
+    """Raw rgb24 bytes for frames [start, stop) of a scene."""
+    img = _load_scene_image(image_path, w, h)
+    boxes = crop_boxes(effect, frames, w, h)[start:stop]
+    return b"".join(
+        img.resize((w, h), Image.BILINEAR, box=tuple(box)).tobytes()
+        for box in boxes
+    )
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import AsyncIterator, Callable
+
+from api.config import MEDIA_PROCESS_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+STDERR_TAIL = 2000
+OUTPUT_CHUNK_SIZE = 1024 * 1024
+
+ProgressCallback = Callable[[dict[str, str]], None]
+
+
+class MediaProcessError(RuntimeError):
+    def __init__(self, cmd: list[str], returncode: int | None, stderr: str) -> None:
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr = stderr
+        super().__init__(f"{cmd[0]} exited with {returncode}: {stderr[-STDERR_TAIL:].strip()}")
+
+
+def _with_progress(cmd: list[str]) -> list[str]:
+    """Ask ffmpeg to write machine-readable progress blocks to stdout."""
+    return [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+
+
+async def _read_progress(stream: asyncio.StreamReader, progress: ProgressCallback) -> None:
+    """Parse `key=value` lines; each block ends with a `progress=` line."""
+    block: dict[str, str] = {}
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        key, _, value = line.decode(errors="replace").strip().partition("=")
+        block[key] = value
+        if key == "progress":
+            progress(block)
+            block = {}
+
+
+async def _terminate(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is None:
+        proc.kill()
+        await proc.wait()
+
+
+async def run_media(
+    cmd: list[str],
+    timeout: float | None = MEDIA_PROCESS_TIMEOUT,
+    stdin: bytes | None = None,
+    progress: ProgressCallback | None = None,
+) -> str:
+    """Run ffmpeg/ffprobe without blocking the event loop and return its stdout.
+
+    The child is killed if `timeout` expires or the awaiting task is cancelled;
+    a non-zero exit raises MediaProcessError carrying the captured stderr.
+    With `progress`, ffmpeg's -progress blocks are parsed from stdout and passed
+    to the callback as they arrive (stdout is then not returned).
+    """
+    if progress is not None:
+        cmd = _with_progress(cmd)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    async def collect() -> tuple[bytes, bytes]:
+        if progress is None:
+            return await proc.communicate(stdin)
+        stderr_task = asyncio.ensure_future(proc.stderr.read())
+        try:
+            await _read_progress(proc.stdout, progress)
+            await proc.wait()
+            return b"", await stderr_task
+        finally:
+            stderr_task.cancel()
+
+    try:
+        stdout, stderr = await asyncio.wait_for(collect(), timeout)
+    except asyncio.TimeoutError:
+        await _terminate(proc)
+        raise MediaProcessError(cmd, None, f"timed out after {timeout}s")
+    except BaseException:
+        await _terminate(proc)
+        raise
+
+    if proc.returncode != 0:
+        raise MediaProcessError(cmd, proc.returncode, stderr.decode(errors="replace"))
+    return stdout.decode(errors="replace")
+
+
+async def run_media_streaming(
+    cmd: list[str],
+    chunks: AsyncIterator[bytes],
+    timeout: float | None = MEDIA_PROCESS_TIMEOUT,
+    progress: ProgressCallback | None = None,
+) -> None:
+    """Run ffmpeg feeding `chunks` to its stdin, with the same kill/timeout/progress semantics."""
+    if progress is not None:
+        cmd = _with_progress(cmd)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE if progress is not None else asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    # Drain stderr (and progress) concurrently so the encoder never blocks on a full pipe
+    stderr_task = asyncio.ensure_future(proc.stderr.read())
+    progress_task = asyncio.ensure_future(_read_progress(proc.stdout, progress)) if progress else None
+
+    async def feed() -> None:
+        try:
+            async for chunk in chunks:
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg exited early; its stderr explains why
+        finally:
+            if not proc.stdin.is_closing():
+                proc.stdin.close()
+        await proc.wait()
+        if progress_task:
+            await progress_task
+
+    try:
+        await asyncio.wait_for(feed(), timeout)
+    except asyncio.TimeoutError:
+        await _terminate(proc)
+        stderr_task.cancel()
+        raise MediaProcessError(cmd, None, f"timed out after {timeout}s")
+    except BaseException:
+        await _terminate(proc)
+        stderr_task.cancel()
+        if progress_task:
+            progress_task.cancel()
+        raise
+
+    stderr = await stderr_task
+    if proc.returncode != 0:
+        raise MediaProcessError(cmd, proc.returncode, stderr.decode(errors="replace"))
+
+
+async def run_media_output(
+    cmd: list[str],
+    chunk_size: int = OUTPUT_CHUNK_SIZE,
+    timeout: float | None = MEDIA_PROCESS_TIMEOUT,
+) -> AsyncIterator[bytes]:
+    """Run ffmpeg writing its output to stdout and yield it in `chunk_size` blocks.
+
+    The iterator only ends normally once ffmpeg has exited with status 0; a
+    failure raises MediaProcessError instead of ending the stream, so a
+    consumer never takes a truncated output for a complete one. Closing the
+    iterator early kills the child.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stderr_task = asyncio.ensure_future(proc.stderr.read())
+
+    def remaining() -> float | None:
+        return None if deadline is None else max(0.0, deadline - loop.time())
+
+    try:
+        eof = False
+        while not eof:
+            try:
+                chunk = await asyncio.wait_for(proc.stdout.readexactly(chunk_size), remaining())
+            except asyncio.IncompleteReadError as e:
+                chunk, eof = e.partial, True
+            if eof:
+                await asyncio.wait_for(proc.wait(), remaining())
+                stderr = await stderr_task
+                if proc.returncode != 0:
+                    raise MediaProcessError(cmd, proc.returncode, stderr.decode(errors="replace"))
+            if chunk:
+                yield chunk
+    except asyncio.TimeoutError:
+        raise MediaProcessError(cmd, None, f"timed out after {timeout}s")
+    finally:
+        await _terminate(proc)
+        stderr_task.cancel()
@@ -0,0 +1,206 @@
+"""Durations and basic stream info read in-process from media headers.
+
+Covers what the pipeline produces and consumes: MP3 narration (Xing/Info
+and VBRI headers, otherwise a walk over the frame headers), PNG and JPEG
+scene images, and MP4 renders (the `mvhd` and `tkhd` boxes of `moov`).
+Works on bytes already in memory or on a file, reading only the boxes it
+needs from an MP4. Anything else (or a header it cannot make sense of,
+like the empty `moov` of a fragmented MP4) goes to ffprobe.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+
+from api.services import mp3
+from api.services.media_process import run_media
+
+# JPEG start-of-frame markers (all but DHT, JPG and DAC)
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    format: str
+    duration: float | None = None
+    width: int | None = None
+    height: int | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+
+
+def _mp3_info(data: bytes) -> MediaInfo | None:
+    found = mp3.first_frame(data)
+    if found is None:
+        return None
+    pos, first = found
+
+    def info(frames: int) -> MediaInfo:
+        return MediaInfo(
+            format="mp3", duration=frames * first.samples / first.sample_rate,
+            sample_rate=first.sample_rate, channels=first.channels,
+        )
+
+    # A VBR header frame carries the frame count (not including itself)
+    counted = mp3.header_frame_count(data, pos, first)
+    if counted:
+        return info(counted)
+    if counted is not None:
+        pos += first.length
+
+    # No count: walk the frames up to the first non-frame (ID3v1 tag, garbage)
+    frames = 0
+    while (frame := mp3.frame_at(data, pos)) is not None and pos + frame.length <= len(data):
+        frames += 1
+        pos += frame.length
+    return info(frames) if frames else None
+
+
+def _png_info(data: bytes) -> MediaInfo | None:
+    if len(data) < 24 or data[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", data[16:24])
+    return MediaInfo(format="png", width=width, height=height)
+
+
+def _jpeg_info(data: bytes) -> MediaInfo | None:
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # markers without a length
+            pos += 2
+            continue
+        (length,) = struct.unpack(">H", data[pos + 2:pos + 4])
+        if marker in _SOF_MARKERS and pos + 9 <= len(data):
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return MediaInfo(format="jpeg", width=width, height=height)
+        if marker == 0xDA:  # start of scan without a frame header
+            return None
+        pos += 2 + length
+    return None
+
+
+def _boxes(data: bytes):
+    """(type, payload) of the ISO BMFF boxes in `data`."""
+    pos = 0
+    while pos + 8 <= len(data):
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", data[pos + 8:pos + 16])
+            header = 16
+        elif size == 0:
+            size = len(data) - pos
+        if size < header:
+            return
+        yield kind, data[pos + header:pos + size]
+        pos += size
+
+
+def _mp4_info(moov: bytes) -> MediaInfo | None:
+    duration = width = height = None
+    for kind, payload in _boxes(moov):
+        if kind == b"mvhd":
+            if payload[0] == 1:
+                timescale, length = struct.unpack(">IQ", payload[20:32])
+            else:
+                timescale, length = struct.unpack(">II", payload[12:20])
+            if timescale and length:
+                duration = length / timescale
+        elif kind == b"trak" and width is None:
+            for sub, tkhd in _boxes(payload):
+                if sub == b"tkhd":
+                    w, h = struct.unpack(">II", tkhd[-8:])
+                    if w and h:  # audio tracks have no dimensions
+                        width, height = w >> 16, h >> 16
+    if duration is None:
+        return None  # fragmented MP4: the duration is only in the fragments
+    return MediaInfo(format="mp4", duration=duration, width=width, height=height)
+
+
+def _find_moov(f) -> bytes | None:
+    """Payload of the file's top-level moov box, seeking past everything else."""
+    while header := f.read(8):
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", f.read(8))
+            header_size = 16
+        if kind == b"moov":
+            return f.read(size - header_size) if size else f.read()
+        if size < header_size:
+            return None
+        f.seek(size - header_size, os.SEEK_CUR)
+    return None
+
+
+def _sniff(head: bytes) -> str | None:
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8"):
+        return "jpeg"
+    if head[4:8] in (b"ftyp", b"moov", b"free", b"mdat", b"wide"):
+        return "mp4"
+    if head.startswith(b"ID3") or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def parse(source: bytes | str) -> MediaInfo | None:
+    """Media info from the headers of the bytes or file, or None if they cannot be read here."""
+    if isinstance(source, bytes):
+        kind = _sniff(source[:12])
+        if kind == "mp4":
+            moov = next((payload for box, payload in _boxes(source) if box == b"moov"), None)
+            return _mp4_info(moov) if moov is not None else None
+        parsers = {"mp3": _mp3_info, "png": _png_info, "jpeg": _jpeg_info}
+        return parsers[kind](source) if kind else None
+
+    with open(source, "rb") as f:
+        kind = _sniff(f.read(12))
+        f.seek(0)
+        if kind == "mp4":
+            moov = _find_moov(f)
+            return _mp4_info(moov) if moov is not None else None
+        return parse(f.read()) if kind else None
+
+
+async def _ffprobe_duration(source: bytes | str) -> float:
+    if isinstance(source, str):
+        path, tmp = source, None
+    else:
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(source)
+        path = tmp.name
+    try:
+        stdout = await run_media([
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            path,
+        ], timeout=60)
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+    return float(stdout.strip())
+
+
+async def get_duration(source: bytes | str) -> float:
+    """Duration in seconds of media bytes or a file; ffprobe only when the headers don't tell."""
+    try:
+        info = parse(source)
+    except (struct.error, IndexError, ValueError):
+        info = None  # truncated or malformed header
+    if info is not None and info.duration:
+        return info.duration
+    return await _ffprobe_duration(source)
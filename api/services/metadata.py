@@ -65,11 +65,9 @@ No markdown, no explanations. Raw JSON only."""
     options_repo.create_title_options(title_records)
 
     # Save description and tags to story metadata
-    story_repo.update_story(story_id, {
-        "metadata": {
-            "description": metadata["description"],
-            "tags": metadata["tags"],
-        }
+    story_repo.update_metadata(story_id, {
+        "description": metadata["description"],
+        "tags": metadata["tags"],
     })
 
     logger.info(f"Metadata generated for story {story_id}: 3 titles + description + tags")
@@ -0,0 +1,203 @@
+"""MP3 frame parsing and frame-level concatenation.
+
+An MP3 stream is a sequence of self-contained frames, so parts encoded with
+the same parameters (all our TTS output is) join by concatenating their
+frames once the ID3 tags and the Xing/Info/VBRI header frame are dropped:
+no temp files, no ffmpeg. Parts that differ in MPEG version, layer, sample
+rate or channel count go through ffmpeg's concat demuxer instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+
+from api.services.media_process import run_media
+
+logger = logging.getLogger(__name__)
+
+# MPEG audio header tables (version: 1 = MPEG-1, 2 = MPEG-2, 25 = MPEG-2.5; layer: 1-3)
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_BITRATES[(2, 3)] = _BITRATES[(2, 2)]
+for _layer in (1, 2, 3):
+    _BITRATES[(25, _layer)] = _BITRATES[(2, _layer)]
+_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+_VERSIONS = {0b00: 25, 0b10: 2, 0b11: 1}
+_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+
+@dataclass(frozen=True)
+class Frame:
+    version: int
+    layer: int
+    bitrate: int  # kbps
+    sample_rate: int
+    padding: int
+    channels: int
+
+    @property
+    def samples(self) -> int:
+        if self.layer == 1:
+            return 384
+        return 1152 if self.version == 1 or self.layer == 2 else 576
+
+    @property
+    def length(self) -> int:
+        if self.layer == 1:
+            return (12 * self.bitrate * 1000 // self.sample_rate + self.padding) * 4
+        return self.samples // 8 * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    @property
+    def stream_params(self) -> tuple[int, int, int, int]:
+        """What must match for frames to be joined into one stream."""
+        return self.version, self.layer, self.sample_rate, self.channels
+
+    @property
+    def side_info_size(self) -> int:
+        if self.version == 1:
+            return 32 if self.channels == 2 else 17
+        return 17 if self.channels == 2 else 9
+
+
+def frame_at(data: bytes, pos: int) -> Frame | None:
+    """The frame header at `pos`, or None if there is none."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = _VERSIONS.get((b1 >> 3) & 0b11)
+    layer = _LAYERS.get((b1 >> 1) & 0b11)
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free-format streams we cannot size
+    return Frame(
+        version=version,
+        layer=layer,
+        bitrate=_BITRATES[(version, layer)][bitrate_index],
+        sample_rate=_SAMPLE_RATES[version][rate_index],
+        padding=(b2 >> 1) & 1,
+        channels=1 if b3 >> 6 == 0b11 else 2,
+    )
+
+
+def id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | data[9] & 0x7F
+    return 10 + size + (10 if data[5] & 0x10 else 0)  # header, tag, optional footer
+
+
+def first_frame(data: bytes) -> tuple[int, Frame] | None:
+    """Offset and header of the first frame: one whose successor is also a frame (skips false syncs)."""
+    pos = id3v2_size(data)
+    while pos + 4 <= len(data):
+        frame = frame_at(data, pos)
+        if frame and (pos + frame.length >= len(data) or frame_at(data, pos + frame.length)):
+            return pos, frame
+        pos += 1
+    return None
+
+
+def header_frame_count(data: bytes, pos: int, frame: Frame) -> int | None:
+    """Frame count in a Xing/Info or VBRI header frame at `pos`, or None if it is an audio frame."""
+    xing = pos + 4 + frame.side_info_size
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        if len(data) < xing + 12 or not data[xing + 7] & 1:  # no frame count field
+            return 0
+        return struct.unpack(">I", data[xing + 8:xing + 12])[0]
+    vbri = pos + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        return struct.unpack(">I", data[vbri + 14:vbri + 18])[0] if len(data) >= vbri + 18 else 0
+    return None
+
+
+def audio_frames(data: bytes) -> tuple[Frame, bytes] | None:
+    """First frame's header and the audio frames alone: no tags, no VBR header frame."""
+    found = first_frame(data)
+    if found is None:
+        return None
+    pos, first = found
+    if header_frame_count(data, pos, first) is not None:
+        pos += first.length
+    start = pos
+    while (frame := frame_at(data, pos)) is not None and pos + frame.length <= len(data):
+        pos += frame.length
+    return first, data[start:pos]
+
+
+def join(parts: list[bytes]) -> bytes | None:
+    """Parts joined frame by frame, or None if they are not all one kind of stream."""
+    frames = []
+    params = None
+    for part in parts:
+        found = audio_frames(part)
+        if found is None:
+            return None
+        first, audio = found
+        if params is not None and first.stream_params != params:
+            return None
+        params = first.stream_params
+        frames.append(audio)
+    return b"".join(frames)
+
+
+async def _ffmpeg_concat(paths: list[str], output_path: str) -> None:
+    file_list = f"{output_path}.txt"
+    with open(file_list, "w") as f:
+        for p in paths:
+            f.write(f"file '{os.path.abspath(p)}'\n")
+    try:
+        await run_media(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", file_list, "-c", "copy", output_path])
+    finally:
+        os.remove(file_list)
+
+
+async def concat(parts: list[bytes]) -> bytes:
+    """One MP3 from the parts, joined in memory when they share their stream parameters."""
+    if len(parts) == 1:
+        return parts[0]
+    joined = join(parts)
+    if joined is not None:
+        return joined
+
+    logger.info(f"MP3 parts differ in stream parameters, joining {len(parts)} parts with ffmpeg")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for i, part in enumerate(parts):
+            paths.append(os.path.join(tmpdir, f"part_{i}.mp3"))
+            with open(paths[-1], "wb") as f:
+                f.write(part)
+        combined_path = os.path.join(tmpdir, "combined.mp3")
+        await _ffmpeg_concat(paths, combined_path)
+        with open(combined_path, "rb") as f:
+            return f.read()
+
+
+def _join_files(paths: list[str], output_path: str) -> bool:
+    parts = []
+    for p in paths:
+        with open(p, "rb") as f:
+            parts.append(f.read())
+    joined = join(parts)
+    if joined is None:
+        return False
+    with open(output_path, "wb") as f:
+        f.write(joined)
+    return True
+
+
+async def concat_files(paths: list[str], output_path: str) -> None:
+    """Write the MP3 files joined into `output_path`, in memory when they share their stream parameters."""
+    # A story's narration is a walk over tens of thousands of frames; keep it off the event loop
+    if not await asyncio.to_thread(_join_files, paths, output_path):
+        logger.info(f"MP3 files differ in stream parameters, joining {len(paths)} files with ffmpeg")
+        await _ffmpeg_concat(paths, output_path)
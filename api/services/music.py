@@ -0,0 +1,152 @@
+"""Background music bed: library loudness index and the mix filter for the final encode.
+
+Integrated loudness (EBU R128) and duration of every track in MUSIC_DIR are
+kept in a sidecar JSON file, re-analysed only for files whose size or mtime
+changed, so a render only has to pick a track and add one filter chain to the
+audio encode it already does. Run `python -m api.services.music` after adding
+tracks to refresh the index ahead of time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+from dataclasses import dataclass
+
+from api.config import MUSIC_DIR, MUSIC_VOLUME
+from api.services.media_process import run_media
+from api.services.mediainfo import get_duration
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = ".loudness.json"
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".aac", ".wav", ".ogg", ".flac")
+# Typical integrated loudness of the TTS narration; the bed sits MUSIC_VOLUME below it
+NARRATION_LUFS = -16.0
+FADE_OUT_SECONDS = 3.0
+
+_lock = asyncio.Lock()
+_library: list[MusicTrack] = []
+_signature: tuple = ()
+
+
+@dataclass(frozen=True)
+class MusicTrack:
+    path: str
+    duration: float
+    lufs: float
+
+    @property
+    def gain_db(self) -> float:
+        """Gain bringing the track to the bed level implied by MUSIC_VOLUME."""
+        return NARRATION_LUFS + 20 * math.log10(MUSIC_VOLUME) - self.lufs
+
+
+def _scan() -> dict[str, tuple[int, float]]:
+    if not MUSIC_DIR.is_dir():
+        return {}
+    return {
+        entry.name: (entry.stat().st_size, entry.stat().st_mtime)
+        for entry in os.scandir(MUSIC_DIR)
+        if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS)
+    }
+
+
+async def _analyze(path: str) -> dict:
+    """Integrated loudness and duration of one track (a full decode, done once per file)."""
+    stdout = await run_media([
+        "ffmpeg", "-v", "error", "-nostats", "-i", path,
+        "-af", "ebur128=metadata=1,ametadata=mode=print:key=lavfi.r128.I:file=-",
+        "-f", "null", "-",
+    ])
+    lufs = None
+    for line in stdout.splitlines():
+        if line.startswith("lavfi.r128.I="):
+            lufs = float(line.split("=", 1)[1])
+    if lufs is None or not math.isfinite(lufs):
+        raise ValueError(f"No loudness measured for {path}")
+    return {"lufs": lufs, "duration": await get_duration(path)}
+
+
+def _read_index() -> dict:
+    try:
+        with open(MUSIC_DIR / INDEX_FILE, encoding="utf-8") as f:
+            return json.load(f).get("tracks", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(tracks: dict) -> None:
+    try:
+        fd, tmp = tempfile.mkstemp(dir=MUSIC_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"tracks": tracks}, f, indent=2, sort_keys=True)
+        os.replace(tmp, MUSIC_DIR / INDEX_FILE)
+    except OSError as e:
+        logger.warning(f"Could not write music index: {e}")
+
+
+async def get_library() -> list[MusicTrack]:
+    """Tracks with their loudness, analysing only files added or changed since the last index."""
+    global _library, _signature
+    async with _lock:
+        files = _scan()
+        signature = tuple(sorted(files.items()))
+        if signature == _signature:
+            return _library
+
+        indexed = _read_index()
+        tracks = {}
+        for name, (size, mtime) in sorted(files.items()):
+            entry = indexed.get(name)
+            if not entry or entry.get("size") != size or entry.get("mtime") != mtime:
+                logger.info(f"Analyzing music track {name}")
+                try:
+                    entry = {"size": size, "mtime": mtime, **await _analyze(str(MUSIC_DIR / name))}
+                except Exception as e:
+                    logger.warning(f"Skipping music track {name}: {e}")
+                    continue
+            tracks[name] = entry
+
+        if tracks != indexed:
+            _write_index(tracks)
+        _library = [
+            MusicTrack(path=str(MUSIC_DIR / name), duration=t["duration"], lufs=t["lufs"])
+            for name, t in tracks.items()
+        ]
+        _signature = signature
+        return _library
+
+
+async def pick_track(story_id: str, duration: float) -> MusicTrack | None:
+    """Stable per-story choice, preferring tracks long enough not to loop."""
+    if MUSIC_VOLUME <= 0:
+        return None
+    library = await get_library()
+    if not library:
+        return None
+    candidates = [t for t in library if t.duration >= duration] or library
+    digest = int(hashlib.sha256(story_id.encode()).hexdigest(), 16)
+    return candidates[digest % len(candidates)]
+
+
+def mix_filter(narration: str, music: str, track: MusicTrack, duration: float, out: str = "[a]") -> str:
+    """Filter chain mixing the looped music input under the narration, ducked while it speaks."""
+    fade_start = max(0.0, duration - FADE_OUT_SECONDS)
+    return (
+        f"{narration}asplit=2[narr][key];"
+        f"{music}volume={track.gain_db:.2f}dB,afade=t=out:st={fade_start:.3f}:d={FADE_OUT_SECONDS}[bed];"
+        f"[bed][key]sidechaincompress=threshold=0.02:ratio=6:attack=20:release=400[ducked];"
+        f"[narr][ducked]amix=inputs=2:duration=first:normalize=0{out}"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for track in asyncio.run(get_library()):
+        print(f"{os.path.basename(track.path)}: {track.lufs:.1f} LUFS, {track.duration:.1f}s")
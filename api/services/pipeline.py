@@ -13,9 +13,39 @@ from api.services import render as render_service
 from api.services import thumbnail as thumbnail_service
 from api.services import metadata as metadata_service
 from api.services import upload as upload_service
+from api.services import variants as variants_service
+from api.services import preview as preview_service
 
 logger = logging.getLogger(__name__)
 
+# Stories whose video is (or is becoming) the published final render; a scene
+# regeneration would replace it with a draft
+LOCKED_STATUSES = ("publishing", "published")
+
+
+async def _translate_and_narrate(scene_id: str, story: dict, languages: list[str]) -> None:
+    await translation_service.translate_scene(scene_id, languages[0], languages[1:])
+    await audio_service.generate_translated_audio_for_scene(scene_id, story, languages[1:])
+
+
+async def _produce_scene(story: dict, scene: dict, index: int) -> None:
+    """Generate one scene's assets, then encode its clip while other scenes are still generating."""
+    tasks = [
+        image_service.generate_image_for_scene(scene["id"], story),
+        audio_service.generate_audio_for_scene(scene["id"], story),
+    ]
+    # Translation (then its narration) in parallel if multi-language
+    languages = story.get("languages", ["en-US"])
+    if len(languages) > 1:
+        tasks.append(_translate_and_narrate(scene["id"], story, languages))
+    await asyncio.gather(*tasks)
+
+    try:
+        await render_service.prepare_clip(story, scene_repo.get_scene(scene["id"]), index)
+    except Exception as e:
+        # Not fatal: the render encodes whatever is missing from the clip cache
+        logger.warning(f"Pipeline [{story['id']}]: early clip for scene {scene['id']} failed: {e}")
+
 
 async def run_pipeline(story_id: str) -> None:
     """Full pipeline: script → production → render → post_production → ready_for_review."""
@@ -34,37 +64,28 @@ async def run_pipeline(story_id: str) -> None:
         scenes = scene_repo.get_scenes_by_story(story_id)
 
         # ── Fase 2: Production (paralelo por cena) ───────────────
+        # Each scene's draft clip is encoded as soon as its image and
+        # narration exist, overlapping the provider-bound generation
         story_repo.update_status(story_id, "producing")
-
-        tasks = []
-        for scene in scenes:
-            tasks.append(image_service.generate_image_for_scene(scene["id"], story))
-            tasks.append(audio_service.generate_audio_for_scene(scene["id"], story))
-
-        # Translation in parallel if multi-language
-        languages = story.get("languages", ["en-US"])
-        if len(languages) > 1:
-            for scene in scenes:
-                tasks.append(
-                    translation_service.translate_scene(
-                        scene["id"], languages[0], languages[1:]
-                    )
-                )
-
-        await asyncio.gather(*tasks)
+        await asyncio.gather(*(
+            _produce_scene(story, scene, i) for i, scene in enumerate(scenes)
+        ))
         logger.info(f"Pipeline [{story_id}]: production done")
 
-        # ── Fase 2b: Render (needs all images + audio ready) ─────
+        # ── Fase 2b: Render (assembly of the cached clips) ───────
+        # Reviewed as a fast draft; the final-quality render happens on publish
         story_repo.update_status(story_id, "rendering")
-        video_url = await render_service.render_video(story_id)
-        logger.info(f"Pipeline [{story_id}]: render done → {video_url}")
+        video_url = await render_service.render_video(story_id, profile="draft")
+        logger.info(f"Pipeline [{story_id}]: draft render done → {video_url}")
 
         # ── Fase 3: Post-production (paralelo) ───────────────────
         story_repo.update_status(story_id, "post_production")
         await asyncio.gather(
             thumbnail_service.generate_thumbnails(story_id),
             metadata_service.generate_metadata(story_id),
+            preview_service.generate_video_preview(story_id),
         )
+        await preview_service.generate_thumbnail_previews(story_id)
         logger.info(f"Pipeline [{story_id}]: post-production done")
 
         # ── Pausa: espera revisão humana ──────────────────────────
@@ -76,10 +97,39 @@ async def run_pipeline(story_id: str) -> None:
         story_repo.update_status(story_id, "failed", error_message=str(e))
 
 
+async def run_variant_pipeline(story_id: str) -> None:
+    """Variant pipeline: adapt images → render → thumbnails → ready_for_review.
+
+    Script, narration, titles and metadata come from the source story, so the
+    only heavy step is the render.
+    """
+    try:
+        story_repo.update_status(story_id, "producing")
+        generated = await variants_service.adapt_scene_images(story_id)
+        logger.info(f"Variant [{story_id}]: images adapted, {generated} generated")
+
+        story_repo.update_status(story_id, "rendering")
+        video_url = await render_service.render_video(story_id, profile="draft")
+        logger.info(f"Variant [{story_id}]: draft render done → {video_url}")
+
+        story_repo.update_status(story_id, "post_production")
+        await variants_service.adapt_thumbnails(story_id)
+        await preview_service.generate_previews(story_id)
+
+        story_repo.update_status(story_id, "ready_for_review")
+        logger.info(f"Variant [{story_id}]: ready for review")
+
+    except Exception as e:
+        logger.error(f"Variant [{story_id}] FAILED: {e}\n{traceback.format_exc()}")
+        story_repo.update_status(story_id, "failed", error_message=str(e))
+
+
 async def publish(story_id: str) -> None:
-    """Publish to YouTube (called after human review)."""
+    """Render at final quality and publish to YouTube (called after human review)."""
     try:
         story_repo.update_status(story_id, "publishing")
+        video_url = await render_service.render_video(story_id, profile="final")
+        logger.info(f"Pipeline [{story_id}]: final render done → {video_url}")
         youtube_url = await upload_service.upload_to_youtube(story_id)
         story_repo.update_status(story_id, "published")
         logger.info(f"Pipeline [{story_id}]: published → {youtube_url}")
@@ -87,3 +137,37 @@ async def publish(story_id: str) -> None:
     except Exception as e:
         logger.error(f"Publish [{story_id}] FAILED: {e}\n{traceback.format_exc()}")
         story_repo.update_status(story_id, "failed", error_message=str(e))
+
+
+async def regenerate_scene(story_id: str, scene_id: str, image: bool = True, audio: bool = False) -> str:
+    """Regenerate one scene's assets and re-render only that scene's segment.
+
+    The clips engine reuses every other scene's segment from the clip cache
+    and joins them by stream copy. On an instance that did not render the
+    story, segments come only from the cache's storage tier (clip_cache_bucket,
+    off by default); without it every clip is encoded again. The
+    re-render is a draft, so it is refused once the story is being published.
+    """
+    story = story_repo.get_story(story_id)
+    if not story:
+        raise ValueError(f"Story {story_id} not found")
+    if story.get("status") in LOCKED_STATUSES:
+        raise ValueError(f"Story {story_id} is {story['status']}; its final video cannot be re-rendered as a draft")
+
+    scene = scene_repo.get_scene(scene_id)
+    if not scene or scene.get("story_id") != story_id:
+        raise ValueError(f"Scene {scene_id} not found in story {story_id}")
+
+    tasks = []
+    if image:
+        tasks.append(image_service.generate_image_for_scene(scene_id, story))
+    if audio:
+        # An explicit request for new audio must not be answered from the TTS cache
+        tasks.append(audio_service.generate_audio_for_scene(scene_id, story, refresh=True))
+    await asyncio.gather(*tasks)
+    logger.info(f"Pipeline [{story_id}]: scene {scene_id} regenerated (image={image}, audio={audio})")
+
+    video_url = await render_service.render_video(story_id, engine="clips", profile="draft")
+    await preview_service.generate_video_preview(story_id)
+    logger.info(f"Pipeline [{story_id}]: re-render done → {video_url}")
+    return video_url
@@ -0,0 +1,120 @@
+"""Review proxies: a small faststart MP4 and WebP thumbnails for the review page.
+
+Reviewers only need to judge the cut and pick a thumbnail, so the review
+endpoint points them at these instead of the full render and Imagen PNGs.
+Proxies are a convenience: a failure is logged and the review falls back to
+the full-size assets.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import os
+import tempfile
+import uuid
+
+from PIL import Image
+
+from api.config import PREVIEW_SHORT_SIDE, PREVIEW_VIDEO_KBPS, PREVIEW_THUMBNAIL_WIDTH
+from api.services.media_process import run_media
+from api.services.storage import (
+    download_file, download_to_temp, object_path, remove_objects, upload_file, upload_path,
+)
+from api.db.repositories import story_repo, options_repo
+
+logger = logging.getLogger(__name__)
+
+WEBP_QUALITY = 80
+
+
+def _preview_cmd(input_path: str, output_path: str) -> list[str]:
+    side = PREVIEW_SHORT_SIDE
+    return [
+        "ffmpeg", "-y", "-i", input_path,
+        # Short side to PREVIEW_SHORT_SIDE for either orientation
+        "-vf", f"scale='if(gt(iw,ih),-2,{side})':'if(gt(iw,ih),{side},-2)',setsar=1",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "28", "-pix_fmt", "yuv420p",
+        "-maxrate", f"{PREVIEW_VIDEO_KBPS}k", "-bufsize", f"{PREVIEW_VIDEO_KBPS * 2}k",
+        "-c:a", "aac", "-b:a", "64k", "-ac", "1",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+
+
+def _webp_preview(image_path: str) -> bytes:
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        if img.width > PREVIEW_THUMBNAIL_WIDTH:
+            height = round(img.height * PREVIEW_THUMBNAIL_WIDTH / img.width)
+            img = img.resize((PREVIEW_THUMBNAIL_WIDTH, height), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP", quality=WEBP_QUALITY, method=6)
+    return buf.getvalue()
+
+
+def _remove_previous_preview(story: dict) -> None:
+    path = object_path("videos", story.get("preview_video_url") or "")
+    if not path:
+        return
+    try:
+        remove_objects("videos", [path])
+    except Exception as e:
+        logger.warning(f"Story {story['id']}: could not delete the previous video preview: {e}")
+
+
+async def generate_video_preview(story_id: str) -> str | None:
+    """Transcode the story's current render to the review proxy; returns its URL.
+
+    Renders are stored under a new path each time, so video_url is never a
+    CDN-cached copy of an earlier render; the proxy gets a new path too, and
+    the one it replaces is deleted.
+    """
+    story = story_repo.get_story(story_id)
+    if not story or not story.get("video_url"):
+        raise ValueError(f"Story {story_id} has no rendered video")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = await asyncio.to_thread(download_file, story["video_url"], os.path.join(tmpdir, "video.mp4"))
+            output = os.path.join(tmpdir, "preview.mp4")
+            await run_media(_preview_cmd(source, output))
+            storage_path = f"{story_id}/{story_id}.preview.{uuid.uuid4().hex[:12]}.mp4"
+            url = await asyncio.to_thread(upload_path, "videos", storage_path, output, "video/mp4")
+    except Exception as e:
+        logger.warning(f"Story {story_id}: video preview failed: {e}")
+        return None
+
+    story_repo.update_story(story_id, {"preview_video_url": url})
+    await asyncio.to_thread(_remove_previous_preview, story)
+    logger.info(f"Story {story_id}: video preview ready")
+    return url
+
+
+async def _thumbnail_preview(story_id: str, option: dict) -> bool:
+    try:
+        path = await asyncio.to_thread(download_to_temp, option["image_url"], ".png")
+        try:
+            data = await asyncio.to_thread(_webp_preview, path)
+        finally:
+            os.unlink(path)
+        url = await asyncio.to_thread(
+            upload_file, "thumbnails", f"{story_id}/preview_{option['id']}.webp", data, "image/webp",
+        )
+    except Exception as e:
+        logger.warning(f"Story {story_id}: preview of thumbnail {option['id']} failed: {e}")
+        return False
+    options_repo.update_thumbnail_option(option["id"], {"preview_url": url})
+    return True
+
+
+async def generate_thumbnail_previews(story_id: str) -> int:
+    """WebP previews of the thumbnail options that have none yet; returns how many were made."""
+    options = [o for o in options_repo.get_thumbnail_options(story_id) if not o.get("preview_url")]
+    done = await asyncio.gather(*(_thumbnail_preview(story_id, o) for o in options))
+    return sum(done)
+
+
+async def generate_previews(story_id: str) -> None:
+    await asyncio.gather(generate_video_preview(story_id), generate_thumbnail_previews(story_id))
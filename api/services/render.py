@@ -1,65 +1,640 @@
 from __future__ import annotations
 
-import itertools
-import json
+import asyncio
 import logging
+import math
+import multiprocessing
 import os
 import shutil
-import subprocess
 import tempfile
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Mapping
 
-from api.services.storage import upload_file, download_to_temp
+from api.config import (
+    RENDER_ENGINE, RENDER_WORKERS, FFMPEG_THREADS, DOWNLOAD_CONCURRENCY,
+    RENDER_SEGMENT_SECONDS, RENDER_SCRATCH_MB, RENDER_STREAM_UPLOAD, RENDER_FRAME_BUFFER_MB,
+)
+from api.services.storage import upload_path, upload_stream, download_file, object_path, remove_objects
+from api.services import encoding, kenburns, mp3, render_progress, music, scratch
+from api.services.media_process import ProgressCallback, run_media, run_media_output, run_media_streaming
+from api.services.mediainfo import get_duration
+from api.services.clip_cache import get_clip_cache, clip_key, CLIP_SUFFIX
+from api.services.encoding import FINAL, RenderProfile, get_profile
+from api.services.music import MusicTrack
+from api.services.timeline import FPS, TimelineEntry, build_entry, build_timeline, total_duration
 from api.db.repositories import story_repo, scene_repo
 
 logger = logging.getLogger(__name__)
 
-EFFECTS = ["zoom_in", "pan_right", "zoom_out", "pan_left"]
+FRAMES_PER_TASK = 10
+# Scratch estimate for scenes whose narration was never measured
+UNTIMED_SCENE_SECONDS = 30.0
 
+_clip_slots: asyncio.Semaphore | None = None
 
-def _get_media_duration(path: str) -> float:
-    cmd = [
-        "ffprobe", "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        path,
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    return float(result.stdout.strip())
 
+def _cpu_quota() -> float:
+    """CPUs available to this container: cgroup quota if set, else affinity mask."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if quota > 0:
+                return quota / period
+        except (OSError, ValueError):
+            pass
+    return float(len(os.sched_getaffinity(0)))
 
-def _apply_ken_burns(input_path: str, output_path: str, duration: float, effect: str, resolution: str) -> None:
-    w, h = map(int, resolution.split("x"))
-    total_frames = int(duration * 25)
 
+def _clip_workers() -> int:
+    """Number of concurrent Ken Burns encodes, each running FFMPEG_THREADS threads."""
+    if RENDER_WORKERS > 0:
+        return RENDER_WORKERS
+    return max(1, math.floor(_cpu_quota() / FFMPEG_THREADS))
+
+
+def _inflight_frames(w: int, h: int) -> int:
+    """Frames the numpy engine may hold between its workers and the encoder (RENDER_FRAME_BUFFER_MB of rgb24)."""
+    return max(FRAMES_PER_TASK, RENDER_FRAME_BUFFER_MB * 1024 * 1024 // (w * h * 3))
+
+
+def _zoompan_filter(effect: str, total_frames: int, w: int, h: int) -> str:
     vf_options = {
         "zoom_in": f"zoompan=z='min(zoom+0.0015,1.5)':d={total_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={w}x{h}",
         "zoom_out": f"zoompan=z='if(lte(zoom,1.0),1.5,max(1.001,zoom-0.0015))':d={total_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={w}x{h}",
         "pan_left": f"zoompan=z=1.2:d={total_frames}:x='iw/2-(iw/zoom/2)-((on/{total_frames})*(iw/zoom/5))':y='ih/2-(ih/zoom/2)':s={w}x{h}",
         "pan_right": f"zoompan=z=1.2:d={total_frames}:x='iw/2-(iw/zoom/2)+((on/{total_frames})*(iw/zoom/5))':y='ih/2-(ih/zoom/2)':s={w}x{h}",
     }
+    # Cover-fit: Imagen's 16:9 output (1408x768) is wider than 16:9, so scaling by width alone comes up short
+    return f"scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h},{vf_options[effect]}:fps={FPS}"
+
+
+def _audio_inputs(music_track: MusicTrack | None) -> list[str]:
+    """Looped music input, added right after the narration when a bed is mixed in."""
+    return ["-stream_loop", "-1", "-i", music_track.path] if music_track else []
+
+
+def _audio_map(narration: int, music_track: MusicTrack | None, duration: float, video: str) -> list[str]:
+    """-map arguments for video plus narration, mixing the music bed when there is one."""
+    if not music_track:
+        return ["-map", video, "-map", f"{narration}:a"]
+    mix = music.mix_filter(f"[{narration}:a]", f"[{narration + 1}:a]", music_track, duration)
+    return ["-filter_complex", mix, "-map", video, "-map", "[a]"]
+
+
+async def _apply_ken_burns(
+    input_path: str,
+    output_path: str,
+    frames: int,
+    effect: str,
+    resolution: str,
+    progress: ProgressCallback | None = None,
+    profile: RenderProfile = FINAL,
+    max_frames: int | None = None,
+    start_frame: int = 0,
+) -> None:
+    w, h = map(int, resolution.split("x"))
+    vf = f"{_zoompan_filter(effect, frames, w, h)},setsar=1"
+    if start_frame:
+        vf += f",trim=start_frame={start_frame},setpts=PTS-STARTPTS"
 
-    vf = vf_options[effect]
     cmd = [
         "ffmpeg", "-y",
         "-i", input_path,
-        "-vf", f"scale={w}:-1,crop={w}:{h},{vf}",
-        "-c:v", "libx264",
-        "-t", str(duration),
-        "-pix_fmt", "yuv420p",
-        "-preset", "veryfast",
-        "-crf", "22",
+        "-vf", vf,
+        *profile.clip_encoder_args,
+        "-frames:v", str(min(frames - start_frame, max_frames or frames)),
+        "-threads", str(FFMPEG_THREADS),
+        output_path,
+    ]
+    await run_media(cmd, progress=progress)
+
+
+async def _render_single_pass(
+    story_id: str,
+    image_paths: list[str],
+    narration_path: str,
+    output_path: str,
+    timeline: list[TimelineEntry],
+    resolution: str,
+    music_track: MusicTrack | None = None,
+    profile: RenderProfile = FINAL,
+) -> None:
+    """Render every scene and mux the narration with one ffmpeg encode.
+
+    Each image is a separate input with its own Ken Burns chain; the chains are
+    joined by the concat filter, so frames are encoded exactly once and no
+    intermediate clips are written to disk.
+    """
+    w, h = map(int, resolution.split("x"))
+
+    cmd = ["ffmpeg", "-y"]
+    for img_path in image_paths:
+        cmd += ["-i", img_path]
+    cmd += ["-i", narration_path, *_audio_inputs(music_track)]
+    narration = len(image_paths)
+
+    chains = []
+    labels = []
+    for entry in timeline:
+        i = entry.index
+        chains.append(f"[{i}:v]{_zoompan_filter(entry.effect, entry.frames, w, h)},setsar=1[v{i}]")
+        labels.append(f"[v{i}]")
+    chains.append(f"{''.join(labels)}concat=n={len(timeline)}:v=1:a=0[v]")
+    if music_track:
+        chains.append(music.mix_filter(
+            f"[{narration}:a]", f"[{narration + 1}:a]", music_track, total_duration(timeline),
+        ))
+
+    cmd += [
+        "-filter_complex", ";".join(chains),
+        "-map", "[v]",
+        "-map", "[a]" if music_track else f"{narration}:a",
+        *profile.video_args,
+        *profile.audio_args,
+        "-t", str(total_duration(timeline)),
+        output_path,
+    ]
+    started = time.monotonic()
+    await run_media(cmd, progress=render_progress.job_progress(story_id, "video"))
+    render_progress.finish_job(story_id, "video", sum(e.frames for e in timeline), time.monotonic() - started)
+
+
+async def _render_frame_pipe(
+    story_id: str,
+    images: Mapping[int, Future],
+    narration_path: str,
+    output_path: str,
+    timeline: list[TimelineEntry],
+    resolution: str,
+    music_track: MusicTrack | None = None,
+    profile: RenderProfile = FINAL,
+) -> None:
+    """Generate Ken Burns frames in worker processes and pipe them into one encoder.
+
+    Frames are produced in FRAMES_PER_TASK batches; a window of pending
+    batches, bounded in frames by _inflight_frames, keeps workers busy while
+    writing to ffmpeg strictly in order.
+    """
+    w, h = map(int, resolution.split("x"))
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", str(FPS), "-i", "pipe:0",
+        "-i", narration_path, *_audio_inputs(music_track),
+        *_audio_map(1, music_track, total_duration(timeline), video="0:v"),
+        *profile.video_args,
+        *profile.audio_args,
+        "-t", str(total_duration(timeline)),
         output_path,
     ]
-    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    workers = _clip_workers()
+    max_inflight = _inflight_frames(w, h)
+
+    async def frames():
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending: deque[tuple[asyncio.Future, int]] = deque()
+            inflight = 0
+            for entry in timeline:
+                img_path = await asyncio.wrap_future(images[entry.index])
+                for start in range(0, entry.frames, FRAMES_PER_TASK):
+                    stop = min(start + FRAMES_PER_TASK, entry.frames)
+                    if inflight + stop - start > max_inflight:
+                        batch, count = pending.popleft()
+                        inflight -= count
+                        yield await batch
+                    pending.append((loop.run_in_executor(
+                        pool, kenburns.render_frames, img_path, entry.effect, entry.frames, w, h, start, stop,
+                    ), stop - start))
+                    inflight += stop - start
+            while pending:
+                yield await pending.popleft()[0]
+
+    started = time.monotonic()
+    await run_media_streaming(cmd, frames(), progress=render_progress.job_progress(story_id, "video"))
+    render_progress.finish_job(story_id, "video", sum(e.frames for e in timeline), time.monotonic() - started)
+
+
+def _restore_cached_clip(key: str, clip_path: str) -> bool:
+    cached = get_clip_cache().get(key, CLIP_SUFFIX)
+    if cached is None:
+        return False
+    try:
+        try:
+            os.link(cached, clip_path)
+        except OSError:
+            shutil.copyfile(cached, clip_path)
+    except FileNotFoundError:
+        return False  # evicted between lookup and link
+    logger.info(f"Clip cache hit: {os.path.basename(clip_path)}")
+    return True
+
+
+async def _gather_or_cancel(coros: Iterable) -> list:
+    """Run the coroutines concurrently; the first failure cancels the rest, and they are awaited before it propagates.
+
+    Used for ffmpeg jobs and uploads, which must not keep running (and writing
+    into a scratch directory being removed) once the render has failed.
+    """
+    jobs = [asyncio.ensure_future(c) for c in coros]
+    try:
+        return await asyncio.gather(*jobs)
+    except BaseException:
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        raise
+
+
+async def _encode_clips(
+    story_id: str,
+    timeline: list[TimelineEntry],
+    images: Mapping[int, Future],
+    clips_dir: str,
+    resolution: str,
+    profile: RenderProfile = FINAL,
+) -> list[str]:
+    # Each job is one ffmpeg process; the process-wide slots bound how many run at once
+    workers = min(_clip_workers(), len(timeline)) or 1
+    slots = clip_slots()
+
+    async def encode(entry: TimelineEntry) -> str:
+        img_path = await asyncio.wrap_future(images[entry.index])  # waits only for this scene's image
+        clip_path = os.path.join(clips_dir, f"clip_{entry.index:03d}.mp4")
+        job = f"clip_{entry.index:03d}"
+        key = await asyncio.to_thread(
+            clip_key, img_path, entry.duration, entry.effect, resolution, profile.clip_encoder_args,
+        )
+        started = time.monotonic()
+        cached = await asyncio.to_thread(_restore_cached_clip, key, clip_path)
+        if not cached:
+            async with slots:
+                started = time.monotonic()  # time the encode, not the wait for a slot
+                await _apply_ken_burns(
+                    img_path, clip_path, entry.frames, entry.effect, resolution,
+                    progress=render_progress.job_progress(story_id, job), profile=profile,
+                )
+            await asyncio.to_thread(get_clip_cache().put, key, clip_path, CLIP_SUFFIX, "video/mp4")
+        render_progress.finish_job(story_id, job, entry.frames, time.monotonic() - started, cached=cached)
+        os.remove(img_path)  # free memory on tmpfs
+        return clip_path
+
+    logger.info(f"Encoding {len(timeline)} clips with {workers} workers x {FFMPEG_THREADS} threads")
+    processed_clips = await _gather_or_cancel(encode(entry) for entry in timeline)
+
+    if not processed_clips:
+        raise RuntimeError("No clips were processed")
+    return list(processed_clips)
+
+
+def clip_slots() -> asyncio.Semaphore:
+    """Process-wide bound on concurrent Ken Burns encodes, shared by every render and pipeline."""
+    global _clip_slots
+    if _clip_slots is None:
+        _clip_slots = asyncio.Semaphore(_clip_workers())
+    return _clip_slots
+
+
+async def prepare_clip(story: dict, scene: dict, index: int, profile: str = "draft") -> bool:
+    """Encode one scene's Ken Burns clip into the clip cache ahead of the render.
+
+    Called as soon as the scene at position `index` has its image and
+    narration, so the clips engine later finds every clip cached and only has
+    to assemble. Returns False when there was nothing to do: another engine is
+    configured or the clip is already cached.
+    """
+    if RENDER_ENGINE != "clips":
+        return False
+    render_profile = get_profile(profile)
+    resolution = _get_resolution(story.get("aspect_ratio", "16:9"), render_profile)
+    languages = story.get("languages") or ["en-US"]
+    if len(languages) > 1:
+        scene = _longest_narration([scene], languages[1:])[0]
+    entry = build_entry(scene, index)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        img_path = await asyncio.to_thread(download_file, scene["image_url"], os.path.join(tmpdir, "scene.png"))
+        key = await asyncio.to_thread(
+            clip_key, img_path, entry.duration, entry.effect, resolution, render_profile.clip_encoder_args,
+        )
+        if await asyncio.to_thread(get_clip_cache().get, key, CLIP_SUFFIX):
+            return False
+        clip_path = os.path.join(tmpdir, f"clip_{index:03d}.mp4")
+        async with clip_slots():
+            await _apply_ken_burns(img_path, clip_path, entry.frames, entry.effect, resolution, profile=render_profile)
+        await asyncio.to_thread(get_clip_cache().put, key, clip_path, CLIP_SUFFIX, "video/mp4")
+    logger.info(f"Story {story['id']}: clip {index} prepared ({entry.frames} frames)")
+    return True
+
+
+def _scene_scratch_bytes(entry: TimelineEntry, resolution: str) -> int:
+    """Scratch of one scene of a segmented window: its downloaded image plus its clip."""
+    return scratch.IMAGE_BYTES + scratch.video_bytes(entry.frames, resolution)
+
+
+def _plan_windows(timeline: list[TimelineEntry], resolution: str) -> list[list[TimelineEntry]]:
+    """Split the timeline into consecutive windows within the segment length and scratch budget."""
+    budget = RENDER_SCRATCH_MB * 1024 * 1024
+    windows: list[list[TimelineEntry]] = []
+    window: list[TimelineEntry] = []
+    seconds, used = 0.0, 0
+    for entry in timeline:
+        size = _scene_scratch_bytes(entry, resolution)
+        if window and (seconds + entry.duration > RENDER_SEGMENT_SECONDS or used + size > budget):
+            windows.append(window)
+            window, seconds, used = [], 0.0, 0
+        window.append(entry)
+        seconds += entry.duration
+        used += size
+    if window:
+        windows.append(window)
+    return windows
+
+
+async def _join_segment(clip_paths: list[str], segment_path: str) -> None:
+    """Stream-copy a window's clips into one segment and delete the clips."""
+    clips_list = f"{segment_path}.txt"
+    with open(clips_list, "w") as f:
+        for p in clip_paths:
+            f.write(f"file '{os.path.abspath(p)}'\n")
+    await run_media(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", clips_list, "-c", "copy", "-an", segment_path])
+    for p in [*clip_paths, clips_list]:
+        os.remove(p)
 
 
-def _get_resolution(aspect_ratio: str) -> str:
-    if aspect_ratio == "9:16":
-        return "1080x1920"
-    return "1920x1080"
+async def _render_segmented(
+    story_id: str,
+    scenes: list[dict],
+    timeline: list[TimelineEntry],
+    downloads: ThreadPoolExecutor,
+    images_dir: str,
+    clips_dir: str,
+    resolution: str,
+    profile: RenderProfile = FINAL,
+) -> list[str]:
+    """Encode the video window by window, keeping only the joined segments.
 
+    A window's images are downloaded only when it starts, and its images and
+    clips are deleted once it is joined, so scratch use is bounded by the
+    window size rather than the story length.
+    """
+    windows = _plan_windows(timeline, resolution)
+    logger.info(f"Story {story_id}: segmented render, {len(timeline)} scenes in {len(windows)} windows")
+    segments = []
+    for n, window in enumerate(windows):
+        images = _start_image_downloads(downloads, scenes, images_dir, (e.index for e in window))
+        clip_paths = await _encode_clips(story_id, window, images, clips_dir, resolution, profile)
+        segment = os.path.join(clips_dir, f"segment_{n:03d}.mp4")
+        await _join_segment(clip_paths, segment)
+        segments.append(segment)
+    return segments
 
-async def render_video(story_id: str) -> str:
+
+def _copied_video_cmd(
+    video_input: list[str],
+    narration_path: str,
+    duration: float,
+    music_track: MusicTrack | None,
+    profile: RenderProfile,
+) -> list[str]:
+    return [
+        "ffmpeg", "-y",
+        *video_input,
+        "-i", narration_path, *_audio_inputs(music_track),
+        *_audio_map(1, music_track, duration, video="0:v"),
+        "-c:v", "copy",
+        *profile.audio_args,
+        "-t", str(duration),
+    ]
+
+
+async def _mux_copied_video(
+    video_input: list[str],
+    narration_path: str,
+    output_path: str,
+    duration: float,
+    music_track: MusicTrack | None = None,
+    profile: RenderProfile = FINAL,
+) -> None:
+    """Mux an already-encoded video track (stream copy) with the narration and music bed."""
+    cmd = _copied_video_cmd(video_input, narration_path, duration, music_track, profile)
+    await run_media([*cmd, "-movflags", "+faststart", output_path])
+
+
+async def _stream_copied_video(
+    video_input: list[str],
+    narration_path: str,
+    storage_path: str,
+    duration: float,
+    music_track: MusicTrack | None = None,
+    profile: RenderProfile = FINAL,
+) -> str:
+    """Like _mux_copied_video, but upload the output to the videos bucket as ffmpeg writes it.
+
+    A fragmented MP4 (moov up front, one fragment per GOP) never seeks back,
+    so it can go to a pipe; the file never touches local disk.
+    """
+    cmd = _copied_video_cmd(video_input, narration_path, duration, music_track, profile)
+    output = run_media_output([*cmd, "-movflags", "frag_keyframe+empty_moov+default_base_moof", "-f", "mp4", "pipe:1"])
+    return await upload_stream("videos", storage_path, output, "video/mp4")
+
+
+def _concat_input(clip_paths: list[str]) -> list[str]:
+    """Input arguments reading the clips back to back through the concat demuxer."""
+    clips_list = os.path.join(os.path.dirname(clip_paths[0]), "clips_list.txt")
+    with open(clips_list, "w") as f:
+        for p in clip_paths:
+            f.write(f"file '{os.path.abspath(p)}'\n")
+    return ["-f", "concat", "-safe", "0", "-i", clips_list]
+
+
+async def _concat_narration(audio_futures: list[Future], narration_path: str) -> str:
+    audio_paths = [await asyncio.wrap_future(f) for f in audio_futures]
+    await mp3.concat_files(audio_paths, narration_path)
+    return narration_path
+
+
+async def _pad_narration(audio_futures: list[Future], timeline: list[TimelineEntry], narration_path: str) -> str:
+    """Join per-scene narration with each scene padded with silence to its slot.
+
+    Used when scenes are timed to the longest narration across languages, so
+    every language lines up with the same video. Written as PCM: the final
+    mux is the only lossy audio encode.
+    """
+    audio_paths = [await asyncio.wrap_future(f) for f in audio_futures]
+    cmd = ["ffmpeg", "-y"]
+    for p in audio_paths:
+        cmd += ["-i", p]
+
+    chains = []
+    for entry in timeline:
+        i = entry.index
+        chains.append(
+            f"[{i}:a]aformat=sample_rates=48000:channel_layouts=mono,"
+            f"apad=whole_dur={entry.duration:.6f},atrim=duration={entry.duration:.6f}[a{i}]"
+        )
+    chains.append(f"{''.join(f'[a{e.index}]' for e in timeline)}concat=n={len(timeline)}:v=0:a=1[a]")
+
+    cmd += ["-filter_complex", ";".join(chains), "-map", "[a]", "-c:a", "pcm_s16le", narration_path]
+    await run_media(cmd)
+    return narration_path
+
+
+def _longest_narration(scenes: list[dict], languages: list[str]) -> list[dict]:
+    """Scenes timed to the longest of their narrations across `languages`."""
+    timed = []
+    for scene in scenes:
+        durations = [scene["duration_seconds"]]
+        for lang in languages:
+            audio = (scene.get("translated_audio") or {}).get(lang) or {}
+            if not audio.get("audio_url") or not audio.get("duration_seconds"):
+                raise ValueError(f"Scene {scene['id']} has no '{lang}' narration")
+            durations.append(audio["duration_seconds"])
+        timed.append({**scene, "duration_seconds": max(durations)})
+    return timed
+
+
+async def _build_render_timeline(scenes: list[dict], audio_futures: list[Future]) -> list[TimelineEntry]:
+    """Timeline from stored durations; probes only scenes whose duration was never recorded."""
+    for i, scene in enumerate(scenes):
+        if not scene.get("duration_seconds"):
+            logger.warning(f"Scene {scene['id']} has no duration_seconds, probing its audio")
+            scene["duration_seconds"] = await get_duration(await asyncio.wrap_future(audio_futures[i]))
+    return build_timeline(scenes)
+
+
+def _start_audio_downloads(pool: ThreadPoolExecutor, scenes: list[dict], audio_dir: str) -> list[Future]:
+    """Queue every scene's narration on the download pool, one future per scene.
+
+    Checks first that every scene has both assets, so a render fails before
+    downloading anything; images are queued separately once the timeline (and
+    so the render mode) is known.
+    """
+    for scene in scenes:
+        if not scene.get("image_url") or not scene.get("audio_url"):
+            raise ValueError(f"Scene {scene['id']} missing image_url or audio_url")
+
+    return [
+        pool.submit(download_file, scene["audio_url"], os.path.join(audio_dir, f"scene_{i:03d}.mp3"))
+        for i, scene in enumerate(scenes)
+    ]
+
+
+def _start_image_downloads(
+    pool: ThreadPoolExecutor, scenes: list[dict], images_dir: str, indices: Iterable[int],
+) -> dict[int, Future]:
+    """Queue the images of the given scenes; futures resolve to local paths, keyed by scene index."""
+    return {
+        i: pool.submit(download_file, scenes[i]["image_url"], os.path.join(images_dir, f"scene_{i:03d}.png"))
+        for i in indices
+    }
+
+
+def _start_narration_downloads(
+    pool: ThreadPoolExecutor, scenes: list[dict], language: str, audio_dir: str,
+) -> list[Future]:
+    """Queue one language's translated narration, one future per scene."""
+    return [
+        pool.submit(
+            download_file,
+            scene["translated_audio"][language]["audio_url"],
+            os.path.join(audio_dir, f"scene_{i:03d}.{language}.mp3"),
+        )
+        for i, scene in enumerate(scenes)
+    ]
+
+
+def _video_storage_path(
+    story_id: str, language: str, languages: list[str], profile: RenderProfile, render_id: str,
+) -> str:
+    """<id>.<render>.mp4 for the first language, <id>.<lang>.<render>.mp4 for the others; drafts get a .draft suffix.
+
+    Every render has its own id, so its URL never serves a CDN-cached copy of
+    an earlier render of the story.
+    """
+    name = story_id if language == languages[0] else f"{story_id}.{language}"
+    if profile.name != "final":
+        name += f".{profile.name}"
+    return f"{story_id}/{name}.{render_id}.mp4"
+
+
+def _remove_superseded_videos(story: dict, video_urls: Mapping[str, str]) -> None:
+    """Delete the story's previous renders now that `video_urls` replaced them (best effort)."""
+    previous = {story.get("video_url"), *(story.get("video_urls") or {}).values()} - {None, *video_urls.values()}
+    paths = [p for p in (object_path("videos", url) for url in previous) if p]
+    if not paths:
+        return
+    try:
+        remove_objects("videos", paths)
+    except Exception as e:
+        logger.warning(f"Story {story['id']}: could not delete superseded renders: {e}")
+
+
+def _probe_encoder(
+    images: Mapping[int, Future], probe_dir: str, resolution: str,
+) -> encoding.ProbeEncoder:
+    """Probe for the encoding policy: encodes a window from the middle of the sampled scenes' clips."""
+    async def probe(profile: RenderProfile, entries: list[TimelineEntry]) -> int:
+        size = 0
+        for entry in entries:
+            img_path = await asyncio.wrap_future(images[entry.index])
+            clip_path = os.path.join(probe_dir, f"probe_{entry.index:03d}.mp4")
+            await _apply_ken_burns(
+                img_path, clip_path, entry.frames, entry.effect, resolution,
+                profile=profile, max_frames=encoding.PROBE_FRAMES, start_frame=encoding.probe_start(entry.frames),
+            )
+            size += os.path.getsize(clip_path)
+            os.remove(clip_path)
+        return size
+    return probe
+
+
+def _scratch_estimate(scenes: list[dict], languages: list[str], resolution: str, engine: str) -> int:
+    """Scratch bytes the render is expected to need, from the stored narration durations."""
+    durations = []
+    for scene in scenes:
+        timed = [scene.get("duration_seconds") or 0.0] + [
+            ((scene.get("translated_audio") or {}).get(lang) or {}).get("duration_seconds") or 0.0
+            for lang in languages[1:]
+        ]
+        durations.append(max(timed) or UNTIMED_SCENE_SECONDS)
+    segmented = engine == "clips" and 0 < RENDER_SEGMENT_SECONDS < sum(durations)
+    return scratch.estimate_render_bytes(
+        durations, resolution, FPS, len(languages),
+        image_budget=RENDER_SCRATCH_MB * 1024 * 1024 if segmented else None,
+        local_outputs=engine != "clips" or not RENDER_STREAM_UPLOAD,
+    )
+
+
+def _get_resolution(aspect_ratio: str, profile: RenderProfile = FINAL) -> str:
+    return profile.resolution(aspect_ratio)
+
+
+async def render_video(story_id: str, engine: str | None = None, profile: str = "final") -> str:
+    """Render the story's video and return the URL of its first-language version.
+
+    Multi-language stories encode the picture once, timed to each scene's
+    longest narration; every other language gets the same video track by
+    stream copy with its own narration muxed in. `profile` picks the encode
+    quality. Every render is stored under new paths and the story's previous
+    render is deleted, so video_url always points at the latest one. The
+    working directory is reserved through the scratch planner, so a story
+    that does not fit waits or fails before downloading anything.
+    """
+    engine = engine or RENDER_ENGINE
+    render_profile = get_profile(profile)
     story = story_repo.get_story(story_id)
     if not story:
         raise ValueError(f"Story {story_id} not found")
@@ -68,89 +643,137 @@ async def render_video(story_id: str) -> str:
     if not scenes:
         raise ValueError(f"No scenes found for story {story_id}")
 
-    resolution = _get_resolution(story.get("aspect_ratio", "16:9"))
+    resolution = _get_resolution(story.get("aspect_ratio", "16:9"), render_profile)
+    languages = story.get("languages") or ["en-US"]
+    extra_languages = languages[1:]
+    render_id = uuid.uuid4().hex[:12]
+    storage_paths = {lang: _video_storage_path(story_id, lang, languages, render_profile, render_id) for lang in languages}
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        images_dir = os.path.join(tmpdir, "images")
-        audio_dir = os.path.join(tmpdir, "audio")
-        clips_dir = os.path.join(tmpdir, "clips")
-        os.makedirs(images_dir)
-        os.makedirs(audio_dir)
-        os.makedirs(clips_dir)
-
-        # Download all assets
-        image_paths = []
-        audio_paths = []
-        for i, scene in enumerate(scenes):
-            if not scene.get("image_url") or not scene.get("audio_url"):
-                raise ValueError(f"Scene {scene['id']} missing image_url or audio_url")
-
-            img_path = os.path.join(images_dir, f"scene_{i:03d}.png")
-            aud_path = os.path.join(audio_dir, f"scene_{i:03d}.mp3")
-
-            # Download
-            import urllib.request
-            urllib.request.urlretrieve(scene["image_url"], img_path)
-            urllib.request.urlretrieve(scene["audio_url"], aud_path)
-
-            image_paths.append(img_path)
-            audio_paths.append(aud_path)
-
-        # Concatenate all audio
-        narration_path = os.path.join(tmpdir, "narration.mp3")
-        file_list = os.path.join(tmpdir, "audio_files.txt")
-        with open(file_list, "w") as f:
-            for p in audio_paths:
-                f.write(f"file '{os.path.abspath(p)}'\n")
-
-        subprocess.run(
-            ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", file_list, "-c", "copy", narration_path],
-            check=True, capture_output=True, text=True,
-        )
+    # Every failure from here on (downloads, the probe, encodes, uploads) marks the render failed
+    render_progress.start_render(story_id, 0, engine)
+    try:
+        needed = _scratch_estimate(scenes, languages, resolution, engine)
+        async with scratch.scratch_dir(f"render-{story_id}", needed) as tmpdir:
+            images_dir = os.path.join(tmpdir, "images")
+            audio_dir = os.path.join(tmpdir, "audio")
+            clips_dir = os.path.join(tmpdir, "clips")
+            os.makedirs(images_dir)
+            os.makedirs(audio_dir)
+            os.makedirs(clips_dir)
 
-        narration_duration = _get_media_duration(narration_path)
-        clip_duration = narration_duration / len(image_paths)
-
-        # Apply Ken Burns to each image (clean up source images after each to save memory)
-        effect_cycle = itertools.cycle(EFFECTS)
-        processed_clips = []
-        for i, img_path in enumerate(image_paths):
-            effect = next(effect_cycle)
-            clip_path = os.path.join(clips_dir, f"clip_{i:03d}.mp4")
-            _apply_ken_burns(img_path, clip_path, clip_duration, effect, resolution)
-            processed_clips.append(clip_path)
-            os.remove(img_path)  # free memory on tmpfs
-
-        if not processed_clips:
-            raise RuntimeError("No clips were processed")
-
-        # Concatenate clips + audio
-        clips_list = os.path.join(tmpdir, "clips_list.txt")
-        with open(clips_list, "w") as f:
-            for p in processed_clips:
-                f.write(f"file '{os.path.abspath(p)}'\n")
-
-        final_path = os.path.join(tmpdir, f"{story_id}.mp4")
-        ffmpeg_cmd = [
-            "ffmpeg", "-y",
-            "-f", "concat", "-safe", "0", "-i", clips_list,
-            "-i", narration_path,
-            "-filter_complex", "[0:v]setsar=1[v];[1:a]volume=1.0[a_out]",
-            "-map", "[v]",
-            "-map", "[a_out]",
-            "-c:v", "libx264", "-preset", "veryfast", "-crf", "22",
-            "-c:a", "aac", "-b:a", "192k",
-            "-t", str(narration_duration),
-            final_path,
-        ]
-        subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True)
+            downloads = ThreadPoolExecutor(max_workers=DOWNLOAD_CONCURRENCY)
+            narrations: dict[str, asyncio.Future] = {}
+            outputs: dict[str, str] = {}  # local renders still to upload
+            encoding_record: dict | None = None
+            video_urls: dict[str, str] = {}
+            try:
+                audio_futures = _start_audio_downloads(downloads, scenes, audio_dir)
+                timeline = await _build_render_timeline(scenes, audio_futures)
+                if extra_languages:
+                    timeline = build_timeline(_longest_narration(scenes, extra_languages))
+                duration = total_duration(timeline)
+                segmented = engine == "clips" and 0 < RENDER_SEGMENT_SECONDS < duration
+                image_futures = {} if segmented else _start_image_downloads(
+                    downloads, scenes, images_dir, range(len(scenes)),
+                )
+                music_track = await music.pick_track(story_id, duration)
+                if render_profile.name == "final":
+                    # Segmented renders download images per window; the probe fetches its own
+                    probe_images = image_futures or _start_image_downloads(
+                        downloads, scenes, images_dir, [e.index for e in encoding.probe_entries(timeline)],
+                    )
+                    render_profile, encoding_record = await encoding.choose_profile(
+                        render_profile, timeline, resolution, music_track is not None,
+                        _probe_encoder(probe_images, tmpdir, resolution),
+                    )
+                    if segmented:
+                        for future in probe_images.values():
+                            os.remove(future.result())
+                    logger.info(f"Story {story_id}: publish encoding {encoding_record}")
+                render_progress.set_total_frames(story_id, sum(e.frames for e in timeline))
+
+                # Narration is joined in the background while clips encode
+                if extra_languages:
+                    narrations[languages[0]] = asyncio.ensure_future(
+                        _pad_narration(audio_futures, timeline, os.path.join(tmpdir, f"narration.{languages[0]}.wav"))
+                    )
+                    for lang in extra_languages:
+                        lang_futures = _start_narration_downloads(downloads, scenes, lang, audio_dir)
+                        narrations[lang] = asyncio.ensure_future(
+                            _pad_narration(lang_futures, timeline, os.path.join(tmpdir, f"narration.{lang}.wav"))
+                        )
+                else:
+                    narrations[languages[0]] = asyncio.ensure_future(
+                        _concat_narration(audio_futures, os.path.join(tmpdir, "narration.mp3"))
+                    )
+                narration = narrations[languages[0]]
+                final_path = os.path.join(tmpdir, f"{story_id}.mp4")
+                try:
+                    if engine == "numpy":
+                        await _render_frame_pipe(
+                            story_id, image_futures, await narration, final_path, timeline, resolution, music_track,
+                            render_profile,
+                        )
+                    elif engine == "filtergraph":
+                        image_paths = [await asyncio.wrap_future(image_futures[e.index]) for e in timeline]
+                        await _render_single_pass(
+                            story_id, image_paths, await narration, final_path, timeline, resolution, music_track,
+                            render_profile,
+                        )
+                    elif segmented:
+                        clip_paths = await _render_segmented(
+                            story_id, scenes, timeline, downloads, images_dir, clips_dir, resolution, render_profile,
+                        )
+                    else:
+                        clip_paths = await _encode_clips(
+                            story_id, timeline, image_futures, clips_dir, resolution, render_profile,
+                        )
+
+                    if engine in ("numpy", "filtergraph"):
+                        outputs[languages[0]] = final_path
+                        video_input, copy_languages = ["-i", final_path], extra_languages
+                    else:
+                        video_input, copy_languages = _concat_input(clip_paths), languages
+
+                    # Every other output reuses the encoded video track by stream copy
+                    async def mux(lang: str) -> None:
+                        narration_path = await narrations[lang]
+                        if RENDER_STREAM_UPLOAD:
+                            video_urls[lang] = await _stream_copied_video(
+                                video_input, narration_path, storage_paths[lang],
+                                duration, music_track, render_profile,
+                            )
+                        else:
+                            outputs[lang] = os.path.join(tmpdir, f"{story_id}.{lang}.mp4")
+                            await _mux_copied_video(
+                                video_input, narration_path, outputs[lang], duration, music_track, render_profile,
+                            )
+
+                    # A failed mux or upload stops the others (and aborts their streamed uploads)
+                    await _gather_or_cancel(mux(lang) for lang in copy_languages)
+                finally:
+                    for task in narrations.values():
+                        task.cancel()
+            finally:
+                downloads.shutdown(wait=False, cancel_futures=True)
 
-        # Upload
-        with open(final_path, "rb") as f:
-            storage_path = f"{story_id}/{story_id}.mp4"
-            video_url = upload_file("videos", storage_path, f.read(), "video/mp4")
+            for lang, path in outputs.items():
+                video_urls[lang] = await asyncio.to_thread(
+                    upload_path, "videos", storage_paths[lang], path, "video/mp4",
+                )
+            video_urls = {lang: video_urls[lang] for lang in languages}
+            video_url = video_urls[languages[0]]
+    except BaseException:
+        render_progress.finish_render(story_id, "failed")
+        raise
 
     # Update story
-    story_repo.update_story(story_id, {"video_url": video_url})
-    logger.info(f"Video rendered and uploaded for story {story_id}")
+    render_progress.finish_render(story_id)
+    story_repo.update_story(story_id, {"video_url": video_url, "video_urls": video_urls})
+    _remove_superseded_videos(story, video_urls)
+    metadata = {"render": {**render_progress.get_summary(story_id), "profile": render_profile.name}}
+    if encoding_record:
+        metadata["encoding"] = encoding_record
+    story_repo.update_metadata(story_id, metadata)
+    logger.info(f"Video rendered ({render_profile.name}) and uploaded for story {story_id} ({', '.join(video_urls)})")
     return video_url
@@ -0,0 +1,133 @@
+"""In-process registry of running renders, fed by ffmpeg -progress output.
+
+A render is made of jobs (one per clip, or a single "video" job for the
+single-encode engines). Each job reports frames/fps/speed while it runs; the
+aggregate gives the story's live progress and ETA, and finished jobs keep
+their timings so they can be stored with the story.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+from api.services.timeline import FPS
+
+MAX_FINISHED = 100
+
+_lock = threading.Lock()
+_renders: dict[str, dict] = {}
+
+
+def _number(value: str | None) -> float:
+    try:
+        return float((value or "").rstrip("x"))
+    except ValueError:
+        return 0.0  # "N/A" before the first frame is out
+
+
+def start_render(story_id: str, total_frames: int, engine: str) -> None:
+    with _lock:
+        _renders[story_id] = {
+            "engine": engine,
+            "status": "running",
+            "started_at": time.monotonic(),
+            "finished_at": None,
+            "total_frames": total_frames,
+            "done_frames": 0,
+            "active": {},
+            "jobs": [],
+        }
+        finished = [sid for sid, r in _renders.items() if r["status"] != "running"]
+        for sid in finished[:-MAX_FINISHED]:
+            del _renders[sid]
+
+
+def set_total_frames(story_id: str, total_frames: int) -> None:
+    """Set a render's frame count once its timeline is known."""
+    with _lock:
+        render = _renders.get(story_id)
+        if render is not None:
+            render["total_frames"] = total_frames
+
+
+def job_progress(story_id: str, job: str) -> Callable[[dict[str, str]], None]:
+    """Callback for run_media(progress=...) that tracks one job of a render."""
+    def update(block: dict[str, str]) -> None:
+        with _lock:
+            render = _renders.get(story_id)
+            if render is None:
+                return
+            render["active"][job] = {
+                "frame": int(_number(block.get("frame"))),
+                "fps": _number(block.get("fps")),
+            }
+    return update
+
+
+def finish_job(story_id: str, job: str, frames: int, seconds: float, cached: bool = False) -> None:
+    with _lock:
+        render = _renders.get(story_id)
+        if render is None:
+            return
+        render["active"].pop(job, None)
+        render["done_frames"] += frames
+        render["jobs"].append({
+            "job": job,
+            "frames": frames,
+            "seconds": round(seconds, 3),
+            "fps": round(frames / seconds, 1) if seconds > 0 and not cached else None,
+            "cached": cached,
+        })
+
+
+def finish_render(story_id: str, status: str = "done") -> None:
+    with _lock:
+        render = _renders.get(story_id)
+        if render is not None:
+            render["status"] = status
+            render["finished_at"] = time.monotonic()
+            render["active"] = {}
+
+
+def get_progress(story_id: str) -> dict | None:
+    """Snapshot of a render's progress, or None if none was started in this process."""
+    with _lock:
+        render = _renders.get(story_id)
+        if render is None:
+            return None
+        frame = render["done_frames"] + sum(a["frame"] for a in render["active"].values())
+        fps = sum(a["fps"] for a in render["active"].values())
+        end = render["finished_at"] or time.monotonic()
+        total = render["total_frames"]
+
+    remaining = max(0, total - frame)
+    return {
+        "story_id": story_id,
+        "engine": render["engine"],
+        "status": render["status"],
+        "frame": min(frame, total),
+        "total_frames": total,
+        "percent": round(100 * min(frame, total) / total, 1) if total else 0.0,
+        "fps": round(fps, 1),
+        "speed": round(fps / FPS, 2),
+        "elapsed_seconds": round(end - render["started_at"], 1),
+        "eta_seconds": round(remaining / fps, 1) if fps > 0 and render["status"] == "running" else None,
+    }
+
+
+def get_summary(story_id: str) -> dict | None:
+    """Per-job timings of a finished render, for storing in the story metadata."""
+    with _lock:
+        render = _renders.get(story_id)
+        if render is None:
+            return None
+        seconds = (render["finished_at"] or time.monotonic()) - render["started_at"]
+        return {
+            "engine": render["engine"],
+            "frames": render["total_frames"],
+            "seconds": round(seconds, 3),
+            "fps": round(render["total_frames"] / seconds, 1) if seconds > 0 else None,
+            "jobs": list(render["jobs"]),
+        }
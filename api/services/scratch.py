@@ -0,0 +1,280 @@
+"""Scratch space for render working directories.
+
+A render holds its downloaded images and narration, its clips and (unless
+muxes stream to storage) its outputs in one temporary directory. On Cloud
+Run the default temp dir is RAM-backed tmpfs, where running out of room is
+an OOM kill that loses the whole render. Before starting, a render reserves
+the bytes it is estimated to need on the first scratch root with room for
+them: RAM first, then the optional disk root. When neither has room the
+render waits for running renders to free theirs, and fails early if it can
+never fit.
+
+The clip and TTS caches grow during renders without a reservation of their
+own; on a root they share, their remaining budget is kept free.
+
+Directories are named after the owning process, so ones left behind by a
+crashed worker are removed at startup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from api.config import (
+    SCRATCH_RAM_DIR, SCRATCH_DISK_DIR, SCRATCH_HEADROOM_MB, SCRATCH_WAIT_SECONDS,
+    CLIP_CACHE_DIR, CLIP_CACHE_MAX_MB, TTS_CACHE_DIR, TTS_CACHE_MAX_MB,
+)
+
+logger = logging.getLogger(__name__)
+
+DIR_PREFIX = "lost-archives-"
+RAM_FILESYSTEMS = ("tmpfs", "ramfs")
+POLL_SECONDS = 5.0
+# Estimates: downloaded scene image, Ken Burns video (roughly 0.1 bits per
+# pixel), narration as downloaded MP3 and as the padded WAV of multi-language
+# renders (16-bit mono at 48 kHz at most), and a margin on the total
+IMAGE_BYTES = 4 * 1024 * 1024
+VIDEO_BITS_PER_PIXEL = 0.1
+MP3_BYTES_PER_SECOND = 24_000
+WAV_BYTES_PER_SECOND = 96_000
+SAFETY_FACTOR = 1.25
+
+_lock = threading.Lock()
+_reserve_lock = threading.Lock()
+_active: dict[str, tuple[str, int]] = {}  # directory -> (root, reserved bytes)
+
+
+class ScratchSpaceError(RuntimeError):
+    pass
+
+
+def video_bytes(frames: int, resolution: str) -> int:
+    w, h = map(int, resolution.split("x"))
+    return int(w * h * frames * VIDEO_BITS_PER_PIXEL / 8)
+
+
+def estimate_render_bytes(
+    durations: list[float],
+    resolution: str,
+    fps: int,
+    languages: int = 1,
+    image_budget: int | None = None,
+    local_outputs: bool = False,
+) -> int:
+    """Peak scratch bytes of a render of scenes with the given durations.
+
+    `image_budget` caps the images held at once (segmented renders download
+    them per window); `local_outputs` counts one muxed file per language.
+    """
+    seconds = sum(durations)
+    images = len(durations) * IMAGE_BYTES
+    if image_budget is not None:
+        images = min(images, image_budget)
+    video = sum(video_bytes(round(d * fps), resolution) for d in durations)
+    # Downloaded narration, plus the joined track (a WAV per language when padded)
+    if languages > 1:
+        audio = seconds * languages * (MP3_BYTES_PER_SECOND + WAV_BYTES_PER_SECOND)
+    else:
+        audio = seconds * 2 * MP3_BYTES_PER_SECOND
+    outputs = languages * (video + seconds * MP3_BYTES_PER_SECOND) if local_outputs else 0
+    return int((images + video + audio + outputs) * SAFETY_FACTOR)
+
+
+def _roots() -> list[str]:
+    """Scratch roots in order of preference; the RAM root defaults to the system temp dir."""
+    roots = [SCRATCH_RAM_DIR or tempfile.gettempdir()]
+    if SCRATCH_DISK_DIR and SCRATCH_DISK_DIR not in roots:
+        roots.append(SCRATCH_DISK_DIR)
+    return roots
+
+
+def _filesystem(path: str) -> str:
+    """Type of the filesystem mounted closest above `path`, from /proc/mounts."""
+    path = os.path.realpath(path)
+    best, fstype = "", ""
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                mount = fields[1]
+                if len(mount) > len(best) and (path == mount or path.startswith(mount.rstrip("/") + "/")):
+                    best, fstype = mount, fields[2]
+    except OSError:
+        pass
+    return fstype
+
+
+def _memory_available() -> int | None:
+    """Memory this container can still use: cgroup limit minus usage, else MemAvailable."""
+    for limit_file, usage_file in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        try:
+            with open(limit_file) as f:
+                limit = f.read().strip()
+            with open(usage_file) as f:
+                usage = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit() and int(limit) < 1 << 60:  # v1 reports "no limit" as a huge number
+            return int(limit) - usage
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _tree_bytes(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass  # removed while walking
+    return total
+
+
+def _caches() -> list[tuple[str, int]]:
+    """(directory, max bytes) of the local caches renders write into."""
+    return [
+        (CLIP_CACHE_DIR, CLIP_CACHE_MAX_MB * 1024 * 1024),
+        (TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024),
+    ]
+
+
+def _device(path: str) -> int | None:
+    """Device of `path`, or of its closest existing parent."""
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except FileNotFoundError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+def cache_growth(root: str) -> int:
+    """Bytes the local caches on `root`'s filesystem can still grow by."""
+    device = _device(root)
+    return sum(
+        max(0, limit - _tree_bytes(path)) for path, limit in _caches() if _device(path) == device
+    )
+
+
+def free_bytes(root: str) -> int:
+    """Room left on `root` for a new reservation.
+
+    Files already written by running renders are part of the filesystem's
+    usage; only the rest of their reservations is subtracted, along with
+    what the caches sharing the root may still write. RAM-backed roots are
+    also bounded by the container's free memory, less headroom for the
+    processes themselves.
+    """
+    free = shutil.disk_usage(root).free
+    if _filesystem(root) in RAM_FILESYSTEMS:
+        memory = _memory_available()
+        if memory is not None:
+            free = min(free, memory - SCRATCH_HEADROOM_MB * 1024 * 1024)
+    with _lock:
+        active = [(path, reserved) for path, (r, reserved) in _active.items() if r == root]
+    outstanding = sum(max(0, reserved - _tree_bytes(path)) for path, reserved in active)
+    return free - outstanding - cache_growth(root)
+
+
+def _reserve(job: str, needed: int) -> str | None:
+    """Directory on the first root with room for `needed` bytes, or None."""
+    with _reserve_lock:  # two renders must not both count the same free space
+        for root in _roots():
+            try:
+                if not os.path.isdir(root) or free_bytes(root) < needed:
+                    continue
+                path = tempfile.mkdtemp(prefix=f"{DIR_PREFIX}{os.getpid()}-{job}-", dir=root)
+            except OSError as e:
+                logger.warning(f"Scratch root {root} unavailable: {e}")
+                continue
+            with _lock:
+                _active[path] = (root, needed)
+            logger.info(f"Scratch for {job}: {needed / 1024 ** 2:.0f} MB reserved in {root}")
+            return path
+    return None
+
+
+@asynccontextmanager
+async def scratch_dir(job: str, needed: int) -> AsyncIterator[str]:
+    """Temporary directory with `needed` bytes reserved, removed on exit.
+
+    Waits up to SCRATCH_WAIT_SECONDS while other renders of this process hold
+    space; raises ScratchSpaceError when no root has room after that, or
+    straight away when nothing is holding space that could be freed.
+    """
+    deadline = time.monotonic() + SCRATCH_WAIT_SECONDS
+    waiting = False
+    while (path := await asyncio.to_thread(_reserve, job, needed)) is None:
+        with _lock:
+            busy = bool(_active)
+        if not busy or time.monotonic() >= deadline:
+            raise ScratchSpaceError(
+                f"No scratch space for {job}: needs {needed / 1024 ** 2:.0f} MB "
+                f"({', '.join(_roots())})"
+            )
+        if not waiting:
+            logger.info(f"Waiting for {needed / 1024 ** 2:.0f} MB of scratch space for {job}")
+            waiting = True
+        await asyncio.sleep(POLL_SECONDS)
+
+    try:
+        yield path
+    finally:
+        with _lock:
+            _active.pop(path, None)
+        await asyncio.to_thread(shutil.rmtree, path, True)
+
+
+def _owner_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def cleanup_orphans() -> int:
+    """Remove scratch directories whose owning process is gone; returns how many.
+
+    Runs at startup, before this process made any: a directory carrying our
+    own pid was left by an earlier container that ran under the same pid.
+    """
+    removed = 0
+    for root in _roots():
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.name.startswith(DIR_PREFIX) or not entry.is_dir(follow_symlinks=False):
+                continue
+            pid = entry.name[len(DIR_PREFIX):].split("-", 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and _owner_alive(int(pid)):
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} orphaned scratch directories")
+    return removed
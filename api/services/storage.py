@@ -1,41 +1,271 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
 import logging
+import os
 import tempfile
-import urllib.request
+import time
 from pathlib import Path
+from typing import AsyncIterator
+from urllib.parse import urljoin
 
+import requests
+from requests.adapters import HTTPAdapter
+from storage3.utils import StorageException
+
+from api.config import SUPABASE_URL, SUPABASE_KEY, DOWNLOAD_CONCURRENCY, DOWNLOAD_TIMEOUT, DOWNLOAD_RETRIES
 from api.db.client import get_supabase
 
 logger = logging.getLogger(__name__)
 
 BUCKETS = ["images", "audio", "videos", "thumbnails"]
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+LIST_PAGE_SIZE = 1000
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Supabase's resumable (TUS) endpoint takes 6 MB chunks (only the last may be
+# shorter); a couple are buffered so the producer keeps running during a PATCH.
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+TUS_BUFFERED_CHUNKS = 2
+TUS_TIMEOUT = 120
+
+_http: requests.Session | None = None
+
+
+def _get_http_session() -> requests.Session:
+    """Shared session so asset downloads reuse pooled keep-alive connections."""
+    global _http
+    if _http is None:
+        _http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_CONCURRENCY)
+        _http.mount("https://", adapter)
+        _http.mount("http://", adapter)
+    return _http
+
+
+def versioned_path(path: str, data: bytes) -> str:
+    """`path` with a hash of `data` before the extension.
+
+    Replaced content then gets a new public URL, so no CDN-cached copy of the
+    old object is served in its place.
+    """
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
 
 
 def upload_file(bucket: str, path: str, data: bytes, content_type: str) -> str:
     get_supabase().storage.from_(bucket).upload(
         path=path,
         file=data,
-        file_options={"content-type": content_type},
+        file_options={"content-type": content_type, "upsert": "true"},
     )
     url = get_supabase().storage.from_(bucket).get_public_url(path)
     logger.info(f"Uploaded {bucket}/{path}")
     return url
 
 
+def upload_path(bucket: str, path: str, local_path: str, content_type: str) -> str:
+    """Upload a local file, streamed from disk rather than read into memory."""
+    with open(local_path, "rb") as f:
+        get_supabase().storage.from_(bucket).upload(
+            path=path,
+            file=f,
+            file_options={"content-type": content_type, "upsert": "true"},
+        )
+    url = get_supabase().storage.from_(bucket).get_public_url(path)
+    logger.info(f"Uploaded {bucket}/{path} ({os.path.getsize(local_path)} bytes)")
+    return url
+
+
+def _tus_headers(**extra: str) -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "apikey": SUPABASE_KEY,
+        "Tus-Resumable": "1.0.0",
+        **extra,
+    }
+
+
+def _tus_create(bucket: str, path: str, content_type: str) -> str:
+    """Open a resumable upload of not-yet-known length; returns its URL."""
+    endpoint = f"{SUPABASE_URL}/storage/v1/upload/resumable"
+    metadata = {"bucketName": bucket, "objectName": path, "contentType": content_type, "cacheControl": "3600"}
+    response = _get_http_session().post(endpoint, timeout=TUS_TIMEOUT, headers=_tus_headers(**{
+        "Upload-Defer-Length": "1",
+        "Upload-Metadata": ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items()),
+        "x-upsert": "true",
+    }))
+    response.raise_for_status()
+    return urljoin(endpoint, response.headers["Location"])
+
+
+def _tus_patch(upload_url: str, offset: int, chunk: bytes, length: int | None = None) -> int:
+    """Send `chunk` at `offset` (declaring the total `length` on the last one); returns the new offset.
+
+    After a transient failure the server's offset is read back and only the
+    part of the chunk it has not stored is sent again.
+    """
+    sent = offset
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        headers = _tus_headers(**{"Upload-Offset": str(sent), "Content-Type": "application/offset+octet-stream"})
+        if length is not None:
+            headers["Upload-Length"] = str(length)
+        try:
+            response = _get_http_session().patch(
+                upload_url, data=chunk[sent - offset:], headers=headers, timeout=TUS_TIMEOUT,
+            )
+            if response.status_code in RETRYABLE_STATUS and attempt < DOWNLOAD_RETRIES:
+                raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            response.raise_for_status()
+            return int(response.headers["Upload-Offset"])
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            status = e.response.status_code if e.response is not None else None
+            if attempt >= DOWNLOAD_RETRIES or (status is not None and status not in RETRYABLE_STATUS):
+                raise
+            delay = 0.5 * 2 ** attempt
+            logger.warning(f"Upload chunk failed ({e}), resuming in {delay:.1f}s: {upload_url}")
+            time.sleep(delay)
+            head = _get_http_session().head(upload_url, headers=_tus_headers(), timeout=TUS_TIMEOUT)
+            head.raise_for_status()
+            sent = int(head.headers["Upload-Offset"])
+    raise RuntimeError(f"Upload failed: {upload_url}")  # unreachable
+
+
+def _tus_abort(upload_url: str) -> None:
+    """Terminate an unfinished resumable upload so the server drops what it stored (best effort)."""
+    try:
+        _get_http_session().delete(upload_url, headers=_tus_headers(), timeout=TUS_TIMEOUT).raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"Could not abort upload {upload_url}: {e}")
+
+
+async def upload_stream(bucket: str, path: str, chunks: AsyncIterator[bytes], content_type: str) -> str:
+    """Resumable upload of a byte stream whose length is only known at its end.
+
+    Bytes are sent as they are produced, so memory holds a few chunks rather
+    than the whole object. If `chunks` raises or the upload is cancelled, the
+    producer is closed and the upload terminated: the partial object never
+    appears in the bucket.
+    """
+    upload_url = await asyncio.to_thread(_tus_create, bucket, path, content_type)
+    queue: asyncio.Queue[bytes | Exception | None] = asyncio.Queue(maxsize=TUS_BUFFERED_CHUNKS)
+
+    async def fill() -> None:
+        buf = bytearray()
+        try:
+            async for data in chunks:
+                buf += data
+                while len(buf) >= TUS_CHUNK_SIZE:
+                    await queue.put(bytes(buf[:TUS_CHUNK_SIZE]))
+                    del buf[:TUS_CHUNK_SIZE]
+        except Exception as e:
+            await queue.put(e)
+            return
+        finally:
+            if hasattr(chunks, "aclose"):
+                await chunks.aclose()  # stops the producer (e.g. kills ffmpeg) if the upload failed first
+        await queue.put(bytes(buf))
+        await queue.put(None)
+
+    async def take() -> bytes | None:
+        item = await queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    filler = asyncio.ensure_future(fill())
+    finished = False
+    try:
+        # Hold one chunk back: the last one has to carry the total length
+        offset, chunk = 0, await take()
+        while (following := await take()) is not None:
+            offset = await asyncio.to_thread(_tus_patch, upload_url, offset, chunk)
+            chunk = following
+        offset = await asyncio.to_thread(_tus_patch, upload_url, offset, chunk, offset + len(chunk))
+        finished = True
+    finally:
+        filler.cancel()
+        await asyncio.gather(filler, return_exceptions=True)
+        if not finished:
+            await asyncio.to_thread(_tus_abort, upload_url)
+
+    logger.info(f"Uploaded {bucket}/{path} ({offset} bytes, streamed)")
+    return get_public_url(bucket, path)
+
+
+def download_object(bucket: str, path: str) -> bytes | None:
+    """Fetch an object's bytes through the storage API, or None if it does not exist."""
+    try:
+        return get_supabase().storage.from_(bucket).download(path)
+    except StorageException:
+        return None
+
+
+def list_objects(bucket: str, folder: str) -> list[dict]:
+    """Every object directly under `folder`, oldest first, reading the listing page by page."""
+    objects: list[dict] = []
+    while True:
+        page = get_supabase().storage.from_(bucket).list(folder, {
+            "limit": LIST_PAGE_SIZE,
+            "offset": len(objects),
+            "sortBy": {"column": "created_at", "order": "asc"},
+        })
+        objects += page
+        if len(page) < LIST_PAGE_SIZE:
+            return objects
+
+
+def remove_objects(bucket: str, paths: list[str]) -> None:
+    for i in range(0, len(paths), LIST_PAGE_SIZE):
+        get_supabase().storage.from_(bucket).remove(paths[i:i + LIST_PAGE_SIZE])
+    logger.info(f"Deleted {len(paths)} files from {bucket}")
+
+
 def get_public_url(bucket: str, path: str) -> str:
     return get_supabase().storage.from_(bucket).get_public_url(path)
 
 
+def object_path(bucket: str, url: str) -> str | None:
+    """Path inside `bucket` of one of its public URLs; None for any other URL."""
+    marker = f"/object/public/{bucket}/"
+    if marker not in url:
+        return None
+    return url.split(marker, 1)[1].split("?", 1)[0]
+
+
+def download_file(url: str, dest_path: str) -> str:
+    """Stream `url` to `dest_path` in chunks, retrying transient failures."""
+    part_path = f"{dest_path}.part"
+    for attempt in range(DOWNLOAD_RETRIES + 1):
+        try:
+            with _get_http_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                if response.status_code in RETRYABLE_STATUS and attempt < DOWNLOAD_RETRIES:
+                    raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                response.raise_for_status()
+                with open(part_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            os.replace(part_path, dest_path)
+            return dest_path
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            status = e.response.status_code if e.response is not None else None
+            if attempt >= DOWNLOAD_RETRIES or (status is not None and status not in RETRYABLE_STATUS):
+                raise
+            delay = 0.5 * 2 ** attempt
+            logger.warning(f"Download failed ({e}), retrying in {delay:.1f}s: {url}")
+            time.sleep(delay)
+    raise RuntimeError(f"Download failed: {url}")  # unreachable
+
+
 def download_to_temp(url: str, suffix: str = "") -> str:
     tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-    urllib.request.urlretrieve(url, tmp.name)
     tmp.close()
-    return tmp.name
+    return download_file(url, tmp.name)
 
 
-def delete_story_files(story_id: str) -> None:
-    for bucket in BUCKETS:
+def delete_story_files(story_id: str, buckets: list[str] = BUCKETS) -> None:
+    for bucket in buckets:
         try:
             files = get_supabase().storage.from_(bucket).list(story_id)
             if files:
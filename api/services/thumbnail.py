@@ -1,23 +1,49 @@
+"""Thumbnail options for a story, in one of two modes chosen per story.
+
+"generated" asks Gemini for three prompts and Imagen for an image each.
+"frames" makes no provider calls: it scores a sample of the scene images
+(the frames the video is cut from) for sharpness and contrast with NumPy,
+smart-crops the best ones to 16:9 and draws a short overlay text with
+Pillow, in a couple of seconds.
+"""
+
 from __future__ import annotations
 
+import asyncio
+import io
 import logging
 import os
 import tempfile
 import uuid
 
 import google.generativeai as genai
+import numpy as np
 from google.genai import Client
 from google.genai.types import GenerateImagesConfig
+from PIL import Image, ImageDraw, ImageFont
 
-from api.config import GOOGLE_API_KEY
-from api.services.storage import upload_file
-from api.db.repositories import story_repo, options_repo
+from api.config import GOOGLE_API_KEY, THUMBNAIL_FONT
+from api.services.storage import upload_file, download_to_temp
+from api.services.variants import smart_crop
+from api.db.repositories import story_repo, options_repo, scene_repo
 
 logger = logging.getLogger(__name__)
 
 genai.configure(api_key=GOOGLE_API_KEY)
 _imagen_client = Client(api_key=GOOGLE_API_KEY)
 
+THUMBNAIL_COUNT = 3
+THUMBNAIL_SIZE = (1280, 720)
+# Frame mode: scene images scored (evenly spaced), size they are scored at,
+# and the overlay: words kept from the title, share of the width it may use
+FRAME_SAMPLE = 12
+SCORE_SIZE = 384
+OVERLAY_WORDS = 6
+OVERLAY_WIDTH = 0.9
+MIN_FONT_SIZE = 16
+# Not left at the end of a title cut to OVERLAY_WORDS
+DANGLING_WORDS = {"a", "an", "and", "the", "of", "in", "on", "to", "for", "with", "at", "by", "or"}
+
 
 def _generate_thumbnail_prompts(topic: str, script_text: str, style: str) -> list[str]:
     model = genai.GenerativeModel("gemini-2.0-flash")
@@ -48,10 +74,110 @@ Instructions:
     return prompts[:3]
 
 
+def frame_score(img: Image.Image) -> float:
+    """Sharpness (Laplacian RMS) times contrast (luma std) of a downscaled grayscale copy."""
+    small = img.convert("L")
+    small.thumbnail((SCORE_SIZE, SCORE_SIZE))
+    lum = np.asarray(small, dtype=np.float32)
+    laplacian = 4 * lum[1:-1, 1:-1] - lum[:-2, 1:-1] - lum[2:, 1:-1] - lum[1:-1, :-2] - lum[1:-1, 2:]
+    return float(np.sqrt(np.mean(laplacian ** 2))) * float(lum.std())
+
+
+def _overlay_text(story: dict) -> str:
+    words = (story.get("selected_title") or story["topic"]).split()[:OVERLAY_WORDS]
+    while len(words) > 1 and words[-1].lower() in DANGLING_WORDS:
+        words.pop()
+    return " ".join(words).upper()
+
+
+def _two_lines(text: str) -> str:
+    """The text broken at the word boundary that balances its two lines best."""
+    words = text.split()
+    if len(words) < 2:
+        return text
+    split = min(
+        range(1, len(words)),
+        key=lambda i: max(len(" ".join(words[:i])), len(" ".join(words[i:]))),
+    )
+    return " ".join(words[:split]) + "\n" + " ".join(words[split:])
+
+
+def _fit_text(draw: ImageDraw.ImageDraw, text: str, width: int, height: int) -> tuple[str, ImageFont.FreeTypeFont]:
+    """Largest font, on one line or two, that fits the text in width x height."""
+    size = height
+    while True:
+        font = ImageFont.truetype(THUMBNAIL_FONT, size) if THUMBNAIL_FONT else ImageFont.load_default(size)
+        for lines in (text, _two_lines(text)):
+            left, top, right, bottom = draw.multiline_textbbox((0, 0), lines, font=font, stroke_width=size // 12)
+            if right - left <= width and bottom - top <= height:
+                return lines, font
+        if size <= MIN_FONT_SIZE:
+            return lines, font
+        size = int(size * 0.9)
+
+
+def compose_frame_thumbnail(img: Image.Image, text: str) -> Image.Image:
+    """16:9 crop around the image's most detailed region with the text over a darkened bottom band."""
+    box, _ = smart_crop(img, THUMBNAIL_SIZE[0] / THUMBNAIL_SIZE[1])
+    thumb = img.convert("RGB").crop(box).resize(THUMBNAIL_SIZE, Image.LANCZOS)
+    w, h = THUMBNAIL_SIZE
+
+    band = np.linspace(0, 170, h // 3, dtype=np.uint8)[:, None].repeat(w, axis=1)
+    shade = Image.new("L", THUMBNAIL_SIZE, 0)
+    shade.paste(Image.fromarray(band), (0, h - h // 3))
+    thumb.paste(Image.new("RGB", THUMBNAIL_SIZE, "black"), mask=shade)
+
+    draw = ImageDraw.Draw(thumb)
+    lines, font = _fit_text(draw, text, int(w * OVERLAY_WIDTH), h // 4)
+    stroke = font.size // 12
+    draw.multiline_text(
+        (w // 2, h - h // 16), lines, font=font, anchor="md", align="center",
+        fill="white", stroke_width=stroke, stroke_fill="black",
+    )
+    return thumb
+
+
+def _frame_candidate(url: str) -> tuple[float, Image.Image]:
+    path = download_to_temp(url, suffix=".png")
+    try:
+        with Image.open(path) as img:
+            img.load()
+    finally:
+        os.unlink(path)
+    return frame_score(img), img
+
+
+async def generate_frame_thumbnails(story: dict) -> int:
+    """Thumbnail options cut from the story's best-scoring scene images, with no provider calls."""
+    scenes = [s for s in scene_repo.get_scenes_by_story(story["id"]) if s.get("image_url")]
+    if not scenes:
+        raise ValueError(f"Story {story['id']} has no scene images for frame thumbnails")
+
+    step = max(1, len(scenes) / FRAME_SAMPLE)
+    sample = [scenes[int(i * step)] for i in range(min(FRAME_SAMPLE, len(scenes)))]
+    candidates = await asyncio.gather(*(asyncio.to_thread(_frame_candidate, s["image_url"]) for s in sample))
+    ranked = sorted(zip(sample, candidates), key=lambda c: c[1][0], reverse=True)[:THUMBNAIL_COUNT]
+
+    text = _overlay_text(story)
+    for scene, (score, img) in ranked:
+        buf = io.BytesIO()
+        (await asyncio.to_thread(compose_frame_thumbnail, img, text)).save(buf, format="PNG")
+        image_url = upload_file("thumbnails", f"{story['id']}/thumb_{uuid.uuid4()}.png", buf.getvalue(), "image/png")
+        options_repo.create_thumbnail_option({
+            "story_id": story["id"],
+            "image_url": image_url,
+            "prompt": f"Frame of scene {scene['scene_order']}: {text}",
+        })
+        logger.info(f"Frame thumbnail from scene {scene['scene_order']} (score {score:.0f}) uploaded: {image_url}")
+    return len(ranked)
+
+
 async def generate_thumbnails(story_id: str) -> int:
     story = story_repo.get_story(story_id)
     if not story:
         raise ValueError(f"Story {story_id} not found")
+    if story.get("thumbnail_mode") == "frames":
+        return await generate_frame_thumbnails(story)
 
     topic = story["topic"]
     script_text = story.get("script_text", "")
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+EFFECTS = ["zoom_in", "pan_right", "zoom_out", "pan_left"]
+FPS = 25
+
+
+@dataclass(frozen=True)
+class TimelineEntry:
+    index: int
+    scene_id: str
+    start: float
+    end: float
+    frames: int
+    effect: str
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def build_entry(scene: dict, index: int, frame_cursor: int = 0, fps: int = FPS) -> TimelineEntry:
+    """Timeline entry of the scene at position `index`, starting at `frame_cursor`."""
+    duration = scene.get("duration_seconds")
+    if not duration or duration <= 0:
+        raise ValueError(f"Scene {scene['id']} has no duration_seconds")
+
+    frames = max(1, round(duration * fps))
+    return TimelineEntry(
+        index=index,
+        scene_id=scene["id"],
+        start=frame_cursor / fps,
+        end=(frame_cursor + frames) / fps,
+        frames=frames,
+        effect=EFFECTS[index % len(EFFECTS)],
+    )
+
+
+def build_timeline(scenes: list[dict], fps: int = FPS) -> list[TimelineEntry]:
+    """Schedule scenes back to back from their stored narration durations.
+
+    Each scene's frame count depends only on its own `duration_seconds`, so a
+    scene's clip can be encoded as soon as its audio exists; start/end are the
+    frame-aligned running totals.
+    """
+    timeline = []
+    frame_cursor = 0
+    for i, scene in enumerate(scenes):
+        entry = build_entry(scene, i, frame_cursor, fps)
+        timeline.append(entry)
+        frame_cursor += entry.frames
+    return timeline
+
+
+def total_duration(timeline: list[TimelineEntry]) -> float:
+    return timeline[-1].end if timeline else 0.0
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import unicodedata
+
+from api.config import TTS_CACHE_DIR, TTS_CACHE_MAX_MB, TTS_CACHE_BUCKET, TTS_CACHE_BUCKET_MAX_MB
+from api.services.cache import DiskCache
+
+AUDIO_SUFFIX = ".mp3"
+# Sidecar entry with the narration's measured duration
+INFO_SUFFIX = ".json"
+
+_cache: DiskCache | None = None
+
+
+def get_tts_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(
+            TTS_CACHE_DIR,
+            TTS_CACHE_MAX_MB * 1024 * 1024,
+            bucket=TTS_CACHE_BUCKET,
+            prefix="tts-cache/",
+            bucket_max_bytes=TTS_CACHE_BUCKET_MAX_MB * 1024 * 1024,
+        )
+    return _cache
+
+
+def tts_key(text: str, voice_name: str, language_code: str, audio_config: dict) -> str:
+    """Hash of everything that determines the synthesized audio.
+
+    Text is NFC-normalized with whitespace collapsed, so re-saving a script
+    with different line breaks still hits.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    h = hashlib.sha256(normalized.encode())
+    h.update(f"|{voice_name}|{language_code}|{json.dumps(audio_config, sort_keys=True)}".encode())
+    return h.hexdigest()
+
+
+def get_narration(key: str) -> tuple[bytes, float] | None:
+    """Cached (mp3 bytes, duration_seconds), or None on a miss."""
+    cache = get_tts_cache()
+    info_path = cache.get(key, INFO_SUFFIX)
+    if info_path is None:
+        return None
+    audio_path = cache.get(key, AUDIO_SUFFIX)
+    if audio_path is None:
+        return None
+    with open(info_path, encoding="utf-8") as f:
+        duration = json.load(f)["duration_seconds"]
+    with open(audio_path, "rb") as f:
+        return f.read(), duration
+
+
+def put_narration(key: str, audio: bytes, duration: float) -> None:
+    # Audio first: an entry counts as present once its duration is there
+    cache = get_tts_cache()
+    cache.put_bytes(key, audio, AUDIO_SUFFIX, "audio/mpeg")
+    cache.put_bytes(key, json.dumps({"duration_seconds": duration}).encode(), INFO_SUFFIX, "application/json")
@@ -0,0 +1,229 @@
+"""Story variants: a finished story re-cut for another aspect ratio or style.
+
+The variant references the source story's script, scene audio and metadata;
+only scene images are adapted. For an aspect-ratio change each image is
+smart-cropped around its most salient region, and a new image is generated
+only when the best crop keeps too little of the picture's detail or would be
+upscaled too far to fill the final render.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import math
+import os
+
+import numpy as np
+from PIL import Image
+
+from api.config import VARIANT_MIN_SALIENCY, VARIANT_MAX_UPSCALE
+from api.services import image as image_service
+from api.services.encoding import FINAL
+from api.services.storage import upload_file, download_to_temp
+from api.db.repositories import story_repo, scene_repo, options_repo
+
+logger = logging.getLogger(__name__)
+
+SALIENCY_SIZE = 256
+# Below this share of saliency above the background level, detail is spread
+# evenly and any crop keeps a fair sample of it
+EVEN_DETAIL = 0.1
+# Copied from the source story's metadata; anything else (render timings) is per story
+CLONED_METADATA = ("description", "tags")
+
+
+def _aspect(aspect_ratio: str) -> float:
+    w, h = aspect_ratio.split(":")
+    return int(w) / int(h)
+
+
+def _saliency(img: Image.Image) -> np.ndarray:
+    """Gradient-energy map of a downscaled grayscale copy of the image."""
+    small = img.convert("L")
+    small.thumbnail((SALIENCY_SIZE, SALIENCY_SIZE))
+    lum = np.asarray(small, dtype=np.float32)
+    dx = np.abs(np.diff(lum, axis=1))[:-1, :]
+    dy = np.abs(np.diff(lum, axis=0))[:, :-1]
+    return dx + dy
+
+
+def smart_crop(img: Image.Image, aspect: float) -> tuple[tuple[int, int, int, int], float]:
+    """Largest crop of the target aspect placed over the most salient region.
+
+    Returns the crop box in image coordinates and the share of the image's
+    salient detail it keeps: saliency above the background level (the median
+    row or column), so that a crop is not penalized for the plain texture it
+    leaves out. 1.0 when nothing needs to be cut or detail is spread evenly.
+    """
+    w, h = img.size
+    energy = _saliency(img)
+    total = float(energy.sum())
+    sh, sw = energy.shape
+
+    if w / h > aspect:
+        # Too wide: keep full height, slide a window horizontally
+        crop_w = round(h * aspect)
+        profile, window, scale = energy.sum(axis=0), max(1, round(crop_w * sw / w)), w / sw
+    else:
+        crop_h = round(w / aspect)
+        profile, window, scale = energy.sum(axis=1), max(1, round(crop_h * sh / h)), h / sh
+
+    excess = np.maximum(profile - np.median(profile), 0)
+    if total > 0 and excess.sum() >= EVEN_DETAIL * total:
+        sums = np.convolve(excess, np.ones(window), mode="valid")
+        best = int(np.argmax(sums))
+        score = float(sums[best] / excess.sum())
+    else:
+        sums = np.convolve(profile, np.ones(window), mode="valid")
+        best, score = int(np.argmax(sums)), 1.0
+
+    if w / h > aspect:
+        left = min(round(best * scale), w - crop_w)
+        return (left, 0, left + crop_w, h), score
+    top = min(round(best * scale), h - crop_h)
+    return (0, top, w, top + crop_h), score
+
+
+def _crop_to_storage(url: str, aspect: float, bucket: str, storage_path: str, min_short_side: int = 0) -> str | None:
+    """Smart-crop the image at `url` and upload it.
+
+    None if the crop is below the saliency threshold or its short side is
+    under `min_short_side` pixels.
+    """
+    path = download_to_temp(url, suffix=".png")
+    try:
+        with Image.open(path) as img:
+            box, score = smart_crop(img, aspect)
+            if score < VARIANT_MIN_SALIENCY:
+                logger.info(f"Crop of {url} keeps {score:.0%} of saliency, below threshold")
+                return None
+            short_side = min(box[2] - box[0], box[3] - box[1])
+            if short_side < min_short_side:
+                logger.info(f"Crop of {url} is {short_side}px on its short side, below {min_short_side}px")
+                return None
+            buf = io.BytesIO()
+            img.crop(box).save(buf, format="PNG")
+    finally:
+        os.unlink(path)
+    return upload_file(bucket, storage_path, buf.getvalue(), "image/png")
+
+
+def clone_story(story_id: str, aspect_ratio: str, style: str | None = None) -> dict:
+    """Create the variant story with scenes and title options referencing the source's assets."""
+    story = story_repo.get_story(story_id)
+    if not story:
+        raise ValueError(f"Story {story_id} not found")
+    if aspect_ratio == story.get("aspect_ratio") and style in (None, story.get("style")):
+        raise ValueError(f"Variant of story {story_id} must change the aspect ratio or the style")
+
+    scenes = scene_repo.get_scenes_by_story(story_id)
+    if not scenes or any(not s.get("image_url") or not s.get("audio_url") for s in scenes):
+        raise ValueError(f"Story {story_id} has no finished scenes to reuse")
+
+    metadata = story.get("metadata") or {}
+    variant = story_repo.create_story({
+        "topic": story["topic"],
+        "description": story.get("description"),
+        "target_duration_minutes": story.get("target_duration_minutes"),
+        "languages": story.get("languages"),
+        "style": style or story.get("style"),
+        "aspect_ratio": aspect_ratio,
+        "script_text": story.get("script_text"),
+        "metadata": {k: metadata[k] for k in CLONED_METADATA if k in metadata},
+        "variant_of": story_id,
+        "status": "draft",
+    })
+
+    scene_repo.create_scenes_bulk([
+        {
+            "story_id": variant["id"],
+            "scene_order": s["scene_order"],
+            "text_content": s["text_content"],
+            "translated_text": s.get("translated_text") or {},
+            "translated_audio": s.get("translated_audio") or {},
+            "image_prompt": s.get("image_prompt"),
+            "image_url": s["image_url"],
+            "audio_url": s["audio_url"],
+            "duration_seconds": s.get("duration_seconds"),
+        }
+        for s in scenes
+    ])
+
+    titles = options_repo.get_title_options(story_id)
+    if titles:
+        options_repo.create_title_options([{"story_id": variant["id"], "title_text": t["title_text"]} for t in titles])
+
+    logger.info(f"Story {story_id}: variant {variant['id']} created ({aspect_ratio}, {variant['style']})")
+    return variant
+
+
+def shared_buckets(story: dict, variants: list[dict]) -> set[str]:
+    """Storage buckets holding files of `story` that its variants still reference.
+
+    Every variant plays the source's scene audio. A style-only variant (same
+    aspect ratio) also reuses its thumbnails, and its scene images until they
+    are generated again.
+    """
+    if not variants:
+        return set()
+    shared = {"audio"}
+    if any(v.get("aspect_ratio") == story.get("aspect_ratio") for v in variants):
+        shared |= {"images", "thumbnails"}
+    return shared
+
+
+async def adapt_scene_images(variant_id: str) -> int:
+    """Give every variant scene an image in the variant's format; returns how many were generated."""
+    variant = story_repo.get_story(variant_id)
+    if not variant:
+        raise ValueError(f"Story {variant_id} not found")
+    source = story_repo.get_story(variant["variant_of"]) or {}
+
+    if variant.get("style") != source.get("style"):
+        scenes = scene_repo.get_scenes_by_story(variant_id)
+        await asyncio.gather(*(image_service.generate_image_for_scene(s["id"], variant) for s in scenes))
+        return len(scenes)
+    if variant.get("aspect_ratio") == source.get("aspect_ratio"):
+        return 0
+
+    aspect = _aspect(variant["aspect_ratio"])
+    # A crop rendered at the final profile may be upscaled at most VARIANT_MAX_UPSCALE times
+    min_short_side = math.ceil(FINAL.short_side / VARIANT_MAX_UPSCALE)
+
+    async def adapt(scene: dict) -> bool:
+        url = await asyncio.to_thread(
+            _crop_to_storage, scene["image_url"], aspect, "images", f"{variant_id}/{scene['id']}.png", min_short_side,
+        )
+        if url:
+            scene_repo.update_scene(scene["id"], {"image_url": url})
+            return False
+        await image_service.generate_image_for_scene(scene["id"], variant)
+        return True
+
+    generated = await asyncio.gather(*(adapt(s) for s in scene_repo.get_scenes_by_story(variant_id)))
+    logger.info(f"Story {variant_id}: {len(generated) - sum(generated)} images cropped, {sum(generated)} generated")
+    return sum(generated)
+
+
+async def adapt_thumbnails(variant_id: str) -> int:
+    """Crop the source story's thumbnail options to the variant's aspect ratio, dropping poor crops."""
+    variant = story_repo.get_story(variant_id)
+    if not variant:
+        raise ValueError(f"Story {variant_id} not found")
+
+    source = story_repo.get_story(variant["variant_of"]) or {}
+    aspect = _aspect(variant["aspect_ratio"])
+    count = 0
+    for i, option in enumerate(options_repo.get_thumbnail_options(variant["variant_of"])):
+        if variant["aspect_ratio"] == source.get("aspect_ratio"):
+            url = option["image_url"]
+        else:
+            url = await asyncio.to_thread(
+                _crop_to_storage, option["image_url"], aspect, "thumbnails", f"{variant_id}/thumbnail_{i}.png",
+            )
+        if url:
+            options_repo.create_thumbnail_option({"story_id": variant_id, "image_url": url, "prompt": option.get("prompt")})
+            count += 1
+    return count
@@ -0,0 +1,326 @@
+"""Render benchmark on synthetic stories.
+
+Generates N procedural scene images and sine-tone narration MP3s of varied
+length, runs `render.render_video` with the repositories and storage stubbed
+out, and writes wall time, encode fps, per-stage timings, peak RSS and peak
+scratch-disk usage for every case to a JSON file.
+
+    python -m benchmarks.render_benchmark --scenes 4,12 --engines clips,numpy \
+        --resolutions 1920x1080,1280x720 --aspects 16:9,9:16 --workers 0,2 \
+        --output render_benchmark.json
+
+Each case runs in its own subprocess so peak RSS (including the ffmpeg
+children) is measured per case. With --repeat > 1 the clip cache is kept
+between runs of a case, so later runs show the warm-cache path.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+for _key in ("SUPABASE_URL", "SUPABASE_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+
+STORY_ID = "benchmark-story"
+# Imagen output sizes for each aspect ratio
+SOURCE_SIZES = {"16:9": (1408, 768), "9:16": (768, 1408)}
+
+
+# ── Synthetic assets ──────────────────────────────────────────────────────────
+
+
+def _make_image(path: Path, size: tuple[int, int], seed: int) -> None:
+    """Gradient background with noise and a few bright discs, so frames are not trivially compressible."""
+    w, h = size
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / w * np.pi * rng.uniform(1, 4) + rng.uniform(0, 6)),
+        128 + 100 * np.cos(y / h * np.pi * rng.uniform(1, 4) + rng.uniform(0, 6)),
+        128 + 60 * np.sin((x + y) / (w + h) * np.pi * rng.uniform(2, 6)),
+    ], axis=-1)
+    for _ in range(6):
+        cx, cy, r = rng.uniform(0, w), rng.uniform(0, h), rng.uniform(h / 20, h / 6)
+        base[(x - cx) ** 2 + (y - cy) ** 2 < r ** 2] = rng.uniform(0, 255, 3)
+    base += rng.normal(0, 12, base.shape)
+    Image.fromarray(np.clip(base, 0, 255).astype(np.uint8)).save(path)
+
+
+def _make_tone(path: Path, seconds: float, seed: int) -> None:
+    freq = 180 + (seed * 37) % 400
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency={freq}:duration={seconds:.3f}",
+         "-ar", "24000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "64k", str(path)],
+        check=True,
+    )
+
+
+def make_story(assets_dir: Path, scenes: int, aspect: str, min_seconds: float, max_seconds: float) -> list[dict]:
+    """Scenes pointing at local synthetic assets (reused if already generated)."""
+    assets_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(scenes)
+    result = []
+    for i in range(scenes):
+        seconds = round(float(rng.uniform(min_seconds, max_seconds)), 2)
+        image = assets_dir / f"scene_{i:03d}_{aspect.replace(':', 'x')}.png"
+        audio = assets_dir / f"scene_{i:03d}_{seconds:.2f}s.mp3"
+        if not image.exists():
+            _make_image(image, SOURCE_SIZES[aspect], seed=i)
+        if not audio.exists():
+            _make_tone(audio, seconds, seed=i)
+        result.append({
+            "id": f"scene-{i:03d}",
+            "story_id": STORY_ID,
+            "scene_order": i + 1,
+            "text_content": "",
+            "image_url": str(image),
+            "audio_url": str(audio),
+            "duration_seconds": seconds,
+        })
+    return result
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+
+
+class _ScratchSampler(threading.Thread):
+    """Polls the size of the scratch directory and keeps the peak."""
+
+    def __init__(self, root: str, interval: float = 0.05) -> None:
+        super().__init__(daemon=True)
+        self.root = root
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def _size(self) -> int:
+        total = 0
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.peak = max(self.peak, self._size())
+            self._done.wait(self.interval)
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return max(self.peak, self._size())
+
+
+def _timed(stages: dict, name: str, fn):
+    """Wrap an async render stage so its wall time accumulates under `name`."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+    return wrapper
+
+
+def run_case(case: dict) -> list[dict]:
+    """Render the case's synthetic story `repeat` times in this process."""
+    from api.services import render
+    from api.services.cache import DiskCache
+
+    scenes = make_story(Path(case["assets_dir"]), case["scenes"], case["aspect"], case["min_seconds"], case["max_seconds"])
+    w, h = map(int, case["resolution"].split("x"))
+    resolution = f"{min(w, h)}x{max(w, h)}" if case["aspect"] == "9:16" else f"{max(w, h)}x{min(w, h)}"
+    story = {"id": STORY_ID, "aspect_ratio": case["aspect"], "languages": ["en-US"]}
+
+    scratch = tempfile.mkdtemp(prefix="render-bench-")
+    cache = DiskCache(os.path.join(scratch, "clip-cache"), 1 << 40)
+    outputs: dict[str, int] = {}
+    downloads: list[tuple[float, float]] = []
+
+    def fake_download(url: str, dest: str) -> str:
+        started = time.perf_counter()
+        shutil.copyfile(url, dest)
+        downloads.append((started, time.perf_counter()))
+        return dest
+
+    def fake_upload(bucket: str, path: str, local_path: str, content_type: str) -> str:
+        outputs[path] = os.path.getsize(local_path)
+        return f"benchmark://{bucket}/{path}"
+
+    async def fake_upload_stream(bucket: str, path: str, chunks, content_type: str) -> str:
+        outputs[path] = 0
+        async for chunk in chunks:
+            outputs[path] += len(chunk)
+        return f"benchmark://{bucket}/{path}"
+
+    results = []
+    for run in range(case["repeat"]):
+        stages: dict[str, float] = {}
+        downloads.clear()
+        render_dir = os.path.join(scratch, f"run-{run}")
+        os.makedirs(render_dir)
+        with patch.object(render.story_repo, "get_story", return_value=story), \
+             patch.object(render.story_repo, "update_story"), \
+             patch.object(render.story_repo, "update_metadata"), \
+             patch.object(render.scene_repo, "get_scenes_by_story", side_effect=lambda _: [dict(s) for s in scenes]), \
+             patch.object(render, "download_file", side_effect=fake_download), \
+             patch.object(render, "upload_path", side_effect=fake_upload), \
+             patch.object(render, "upload_stream", side_effect=fake_upload_stream), \
+             patch.object(render, "get_clip_cache", return_value=cache), \
+             patch.object(render, "_get_resolution", return_value=resolution), \
+             patch.object(render, "RENDER_WORKERS", case["workers"]), \
+             patch.object(render, "RENDER_SEGMENT_SECONDS", case["segment_seconds"]), \
+             patch.object(render.music, "pick_track", return_value=None), \
+             patch.object(tempfile, "tempdir", render_dir):
+            for name in ("_concat_narration", "_encode_clips", "_join_segment", "_mux_copied_video",
+                         "_stream_copied_video", "_render_single_pass", "_render_frame_pipe"):
+                stage = {"_concat_narration": "narration_concat", "_encode_clips": "clips",
+                         "_join_segment": "segment_join", "_mux_copied_video": "final_mux",
+                         "_stream_copied_video": "final_mux"}.get(name, "single_encode")
+                patch.object(render, name, _timed(stages, stage, getattr(render, name))).start()
+
+            sampler = _ScratchSampler(render_dir)
+            sampler.start()
+            started = time.perf_counter()
+            try:
+                asyncio.run(render.render_video(STORY_ID, engine=case["engine"]))
+            finally:
+                wall = time.perf_counter() - started
+                scratch_peak = sampler.stop()
+                patch.stopall()
+
+        frames = sum(max(1, round(s["duration_seconds"] * render.FPS)) for s in scenes)
+        encode_seconds = stages.get("clips", 0.0) + stages.get("single_encode", 0.0)
+        if downloads:
+            stages["download"] = max(e for _, e in downloads) - min(s for s, _ in downloads)
+        results.append({
+            **{k: case[k] for k in ("engine", "scenes", "aspect", "workers", "segment_seconds", "repeat")},
+            "resolution": resolution,
+            "run": run,
+            "clip_workers": render._clip_workers() if case["workers"] == 0 else case["workers"],
+            "video_seconds": round(frames / render.FPS, 2),
+            "frames": frames,
+            "wall_seconds": round(wall, 3),
+            "encode_fps": round(frames / encode_seconds, 1) if encode_seconds else None,
+            "realtime_factor": round(frames / render.FPS / wall, 2),
+            "stages": {k: round(v, 3) for k, v in sorted(stages.items())},
+            "peak_rss_mb": {
+                "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+            },
+            "scratch_peak_bytes": scratch_peak,
+            "output_bytes": outputs.get(f"{STORY_ID}/{STORY_ID}.mp4"),
+        })
+        shutil.rmtree(render_dir, ignore_errors=True)
+
+    shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+
+
+def _csv(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+
+def _environment() -> dict:
+    from api.services.render import _cpu_quota
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    ffmpeg = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.split("\n")[0]
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cpu_quota": _cpu_quota(),
+        "ffmpeg": ffmpeg,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenes", type=_csv(int), default=[4, 12])
+    parser.add_argument("--engines", type=_csv(str), default=["clips", "filtergraph", "numpy"])
+    parser.add_argument("--resolutions", type=_csv(str), default=["1920x1080"])
+    parser.add_argument("--aspects", type=_csv(str), default=["16:9", "9:16"])
+    parser.add_argument("--workers", type=_csv(int), default=[0], help="RENDER_WORKERS values (0 = from CPU quota)")
+    parser.add_argument("--min-seconds", type=float, default=3.0)
+    parser.add_argument("--max-seconds", type=float, default=9.0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--segment-seconds", type=float, default=None,
+                        help="RENDER_SEGMENT_SECONDS for the clips engine (default: from settings)")
+    parser.add_argument("--assets-dir", default=os.path.join(tempfile.gettempdir(), "render-bench-assets"))
+    parser.add_argument("--output", default="render_benchmark.json")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return
+
+    from api.config import RENDER_SEGMENT_SECONDS
+
+    segment_seconds = RENDER_SEGMENT_SECONDS if args.segment_seconds is None else args.segment_seconds
+    cases = []
+    for engine, scenes, resolution, aspect, workers in itertools.product(
+        args.engines, args.scenes, args.resolutions, args.aspects, args.workers,
+    ):
+        case = {
+            "engine": engine, "scenes": scenes, "resolution": resolution, "aspect": aspect, "workers": workers,
+            "repeat": args.repeat, "min_seconds": args.min_seconds, "max_seconds": args.max_seconds,
+            "assets_dir": args.assets_dir, "segment_seconds": segment_seconds,
+        }
+        label = f"{engine} scenes={scenes} {resolution} {aspect} workers={workers}"
+        print(f"Running {label} ...", file=sys.stderr, flush=True)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.render_benchmark", "--run-case", json.dumps(case)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"  FAILED: {proc.stderr.strip()[-2000:]}", file=sys.stderr)
+            cases.append({**case, "error": proc.stderr.strip()[-2000:]})
+            continue
+        for result in json.loads(proc.stdout.strip().splitlines()[-1]):
+            print(
+                f"  run {result['run']}: {result['wall_seconds']}s wall, {result['encode_fps']} fps, "
+                f"{result['peak_rss_mb']['children']} MB ffmpeg RSS, {result['scratch_peak_bytes'] / 1e6:.1f} MB scratch",
+                file=sys.stderr,
+            )
+            cases.append(result)
+
+    report = {"environment": _environment(), "cases": cases}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(cases)} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -72,7 +72,9 @@ export default function ReviewPage({ params }: { params: { id: string } }) {
     return <div className="p-8 text-center text-red-500">{error ?? 'Story not found.'}</div>;
   }
 
-  const { title_options: titles, thumbnail_options: thumbnails, video_url: videoUrl, metadata } = reviewData;
+  const { title_options: titles, thumbnail_options: thumbnails, metadata } = reviewData;
+  // Review proxies are small enough to scrub through; the full-size assets are only a fallback
+  const videoUrl = reviewData.preview_video_url ?? reviewData.video_url;
   const description = (metadata?.description as string) ?? '';
   const tags = (metadata?.tags as string[]) ?? [];
 
@@ -199,7 +201,7 @@ export default function ReviewPage({ params }: { params: { id: string } }) {
                     >
                       {/* eslint-disable-next-line @next/next/no-img-element */}
                       <img
-                        src={thumb.image_url}
+                        src={thumb.preview_url ?? thumb.image_url}
                         alt="Thumbnail option"
                         className="aspect-video w-full object-cover"
                       />
@@ -36,6 +36,7 @@ export type TitleOption = {
 export type ThumbnailOption = {
   id: string;
   image_url: string;
+  preview_url: string | null;
   prompt: string | null;
 };
 
@@ -67,6 +68,7 @@ export type CreateStoryRequest = {
 export type ReviewData = {
   story_id: string;
   video_url: string | null;
+  preview_video_url: string | null;
   title_options: TitleOption[];
   thumbnail_options: ThumbnailOption[];
   metadata: Record<string, unknown>;
@@ -15,13 +15,17 @@ CREATE TABLE stories (
     languages JSONB DEFAULT '["en-US"]',
     style TEXT DEFAULT 'cinematic',          -- cinematic | anime | realistic | 3d
     aspect_ratio TEXT DEFAULT '16:9',        -- 16:9 | 9:16
+    thumbnail_mode TEXT DEFAULT 'generated', -- generated (Imagen) | frames (scored scene images)
     script_text TEXT,
     video_url TEXT,
+    video_urls JSONB DEFAULT '{}',           -- {"en-US": url, "pt-BR": url}
+    preview_video_url TEXT,                  -- 480p proxy for review
     youtube_url TEXT,
     youtube_video_id TEXT,
     selected_title TEXT,
     selected_thumbnail_url TEXT,
     metadata JSONB DEFAULT '{}',             -- {description, tags}
+    variant_of UUID REFERENCES stories(id) ON DELETE SET NULL,  -- source story of an aspect/style variant
     error_message TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
@@ -33,6 +37,7 @@ CREATE TABLE scenes (
     scene_order INTEGER NOT NULL,
     text_content TEXT NOT NULL,
     translated_text JSONB DEFAULT '{}',      -- {"pt-BR": "texto", "es-ES": "texto"}
+    translated_audio JSONB DEFAULT '{}',     -- {"pt-BR": {"audio_url": ..., "duration_seconds": ...}}
     image_prompt TEXT,
     image_url TEXT,
     audio_url TEXT,
@@ -51,6 +56,7 @@ CREATE TABLE thumbnail_options (
     id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
     story_id UUID NOT NULL REFERENCES stories(id) ON DELETE CASCADE,
     image_url TEXT NOT NULL,
+    preview_url TEXT,                        -- WebP proxy for review
     prompt TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -78,6 +84,7 @@ CREATE TRIGGER set_stories_updated_at
 
 CREATE INDEX idx_stories_status ON stories(status);
 CREATE INDEX idx_stories_created_at ON stories(created_at DESC);
+CREATE INDEX idx_stories_variant_of ON stories(variant_of);
 CREATE INDEX idx_scenes_story_id ON scenes(story_id);
 CREATE INDEX idx_scenes_story_order ON scenes(story_id, scene_order);
 CREATE INDEX idx_title_options_story_id ON title_options(story_id);
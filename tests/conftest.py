@@ -195,7 +195,9 @@ def client():
 
     from api.main import app
 
-    with TestClient(app, raise_server_exceptions=False) as tc:
+    # O startup poda os tiers de cache no bucket; sem rede nos testes
+    with patch("api.services.cache.DiskCache.prune_bucket", return_value=0), \
+         TestClient(app, raise_server_exceptions=False) as tc:
         yield tc
 
 
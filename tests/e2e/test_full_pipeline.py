@@ -56,14 +56,19 @@ def _build_patches() -> dict[str, AsyncMock | MagicMock]:
         "story_repo.update_status": MagicMock(),
         "story_repo.update_story": MagicMock(),
         "scene_repo.get_scenes_by_story": MagicMock(return_value=FAKE_SCENES),
+        "scene_repo.get_scene": MagicMock(side_effect=lambda sid: next(s for s in FAKE_SCENES if s["id"] == sid)),
         # Services (async)
         "script_service.generate_script": AsyncMock(return_value=len(FAKE_SCENES)),
         "image_service.generate_image_for_scene": AsyncMock(return_value="https://storage/image.png"),
         "audio_service.generate_audio_for_scene": AsyncMock(return_value="https://storage/audio.mp3"),
         "translation_service.translate_scene": AsyncMock(return_value={"pt-BR": "Traduzido"}),
+        "audio_service.generate_translated_audio_for_scene": AsyncMock(return_value={}),
+        "render_service.prepare_clip": AsyncMock(return_value=True),
         "render_service.render_video": AsyncMock(return_value="https://storage/video.mp4"),
         "thumbnail_service.generate_thumbnails": AsyncMock(return_value=3),
         "metadata_service.generate_metadata": AsyncMock(return_value=3),
+        "preview_service.generate_video_preview": AsyncMock(return_value="https://storage/preview.mp4"),
+        "preview_service.generate_thumbnail_previews": AsyncMock(return_value=3),
     }
 
 
@@ -136,12 +141,24 @@ class TestFullPipelineSuccess:
                 "scene-002", "en-US", ["pt-BR"]
             )
 
+            # Narracao traduzida — apos a traducao de cada cena
+            assert mocks["audio_service.generate_translated_audio_for_scene"].await_count == 2
+            mocks["audio_service.generate_translated_audio_for_scene"].assert_any_await(
+                "scene-001", FAKE_STORY, ["pt-BR"]
+            )
+
+            # Clipe de cada cena preparado na producao, com a cena recarregada e sua posicao
+            assert mocks["render_service.prepare_clip"].await_count == 2
+            assert sorted(c.args[2] for c in mocks["render_service.prepare_clip"].await_args_list) == [0, 1]
+
             # Render
-            mocks["render_service.render_video"].assert_awaited_once_with(STORY_ID)
+            mocks["render_service.render_video"].assert_awaited_once_with(STORY_ID, profile="draft")
 
-            # Thumbnails + Metadata
+            # Thumbnails + Metadata + proxies de revisao
             mocks["thumbnail_service.generate_thumbnails"].assert_awaited_once_with(STORY_ID)
             mocks["metadata_service.generate_metadata"].assert_awaited_once_with(STORY_ID)
+            mocks["preview_service.generate_video_preview"].assert_awaited_once_with(STORY_ID)
+            mocks["preview_service.generate_thumbnail_previews"].assert_awaited_once_with(STORY_ID)
 
         finally:
             for p in patchers.values():
@@ -165,6 +182,7 @@ class TestFullPipelineSuccess:
 
             # Translation NÃO deve ser chamada
             mocks["translation_service.translate_scene"].assert_not_awaited()
+            mocks["audio_service.generate_translated_audio_for_scene"].assert_not_awaited()
 
             # Mas o restante sim
             mocks["script_service.generate_script"].assert_awaited_once()
@@ -179,6 +197,29 @@ class TestFullPipelineSuccess:
                 p.stop()
 
 
+    @pytest.mark.asyncio
+    async def test_early_clip_failure_does_not_fail_pipeline(self):
+        """Falha ao preparar um clipe cedo nao e fatal: o render codifica o que faltar."""
+        mocks = _build_patches()
+        mocks["render_service.prepare_clip"] = AsyncMock(side_effect=RuntimeError("ffmpeg crashed"))
+
+        patchers = {key: patch(f"{_P}.{key}", mocks[key]) for key in mocks}
+        for p in patchers.values():
+            p.start()
+
+        try:
+            from api.services.pipeline import run_pipeline
+
+            await run_pipeline(STORY_ID)
+
+            assert mocks["story_repo.update_status"].call_args_list[-1] == call(STORY_ID, "ready_for_review")
+            mocks["render_service.render_video"].assert_awaited_once()
+
+        finally:
+            for p in patchers.values():
+                p.stop()
+
+
 # ---------------------------------------------------------------------------
 # test_full_pipeline_failure
 # ---------------------------------------------------------------------------
@@ -289,9 +330,11 @@ class TestPublishSuccess:
     async def test_publish_calls_upload_and_updates_status(self):
         """publish() deve atualizar status para 'publishing' → 'published'."""
         mock_update_status = MagicMock()
+        mock_render = AsyncMock(return_value="https://storage/video.mp4")
         mock_upload = AsyncMock(return_value="https://youtube.com/watch?v=xxx")
 
         with patch(f"{_P}.story_repo.update_status", mock_update_status), \
+             patch(f"{_P}.render_service.render_video", mock_render), \
              patch(f"{_P}.upload_service.upload_to_youtube", mock_upload):
             from api.services.pipeline import publish
 
@@ -305,7 +348,8 @@ class TestPublishSuccess:
             mock_update_status.assert_has_calls(expected_calls, any_order=False)
             assert mock_update_status.call_count == 2
 
-            # Upload foi chamado com o story_id
+            # Render final antes do upload
+            mock_render.assert_awaited_once_with(STORY_ID, profile="final")
             mock_upload.assert_awaited_once_with(STORY_ID)
 
     @pytest.mark.asyncio
@@ -315,6 +359,7 @@ class TestPublishSuccess:
         mock_upload = AsyncMock(side_effect=RuntimeError("YouTube quota exceeded"))
 
         with patch(f"{_P}.story_repo.update_status", mock_update_status), \
+             patch(f"{_P}.render_service.render_video", AsyncMock()), \
              patch(f"{_P}.upload_service.upload_to_youtube", mock_upload):
             from api.services.pipeline import publish
 
@@ -326,3 +371,80 @@ class TestPublishSuccess:
             assert calls[-1] == call(
                 STORY_ID, "failed", error_message="YouTube quota exceeded"
             )
+
+
+# ---------------------------------------------------------------------------
+# test_regenerate_scene
+# ---------------------------------------------------------------------------
+class TestRegenerateScene:
+    @pytest.mark.asyncio
+    async def test_regenerates_image_and_rerenders_with_clips(self):
+        """Regenera so a imagem da cena e re-renderiza pelo motor de clipes."""
+        mock_image = AsyncMock(return_value="https://storage/new.png")
+        mock_audio = AsyncMock()
+        mock_render = AsyncMock(return_value="https://storage/video.mp4")
+
+        with patch(f"{_P}.story_repo.get_story", MagicMock(return_value=FAKE_STORY)), \
+             patch(f"{_P}.scene_repo.get_scene", MagicMock(return_value=FAKE_SCENES[1])), \
+             patch(f"{_P}.image_service.generate_image_for_scene", mock_image), \
+             patch(f"{_P}.audio_service.generate_audio_for_scene", mock_audio), \
+             patch(f"{_P}.render_service.render_video", mock_render), \
+             patch(f"{_P}.preview_service.generate_video_preview", AsyncMock()) as mock_preview:
+            from api.services.pipeline import regenerate_scene
+
+            result = await regenerate_scene(STORY_ID, "scene-002", image=True, audio=False)
+
+        assert result == "https://storage/video.mp4"
+        mock_image.assert_awaited_once_with("scene-002", FAKE_STORY)
+        mock_audio.assert_not_awaited()
+        mock_render.assert_awaited_once_with(STORY_ID, engine="clips", profile="draft")
+        mock_preview.assert_awaited_once_with(STORY_ID)
+
+    @pytest.mark.asyncio
+    async def test_regenerated_audio_skips_tts_cache(self):
+        """Pedido explicito de audio novo nao reaproveita o cache de TTS."""
+        mock_audio = AsyncMock()
+
+        with patch(f"{_P}.story_repo.get_story", MagicMock(return_value=FAKE_STORY)), \
+             patch(f"{_P}.scene_repo.get_scene", MagicMock(return_value=FAKE_SCENES[1])), \
+             patch(f"{_P}.audio_service.generate_audio_for_scene", mock_audio), \
+             patch(f"{_P}.render_service.render_video", AsyncMock(return_value="https://storage/video.mp4")), \
+             patch(f"{_P}.preview_service.generate_video_preview", AsyncMock()):
+            from api.services.pipeline import regenerate_scene
+
+            await regenerate_scene(STORY_ID, "scene-002", image=False, audio=True)
+
+        mock_audio.assert_awaited_once_with("scene-002", FAKE_STORY, refresh=True)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status", ["publishing", "published"])
+    async def test_published_story_is_not_rerendered(self, status):
+        """O video final publicado nao e substituido por um rascunho."""
+        mock_image = AsyncMock()
+        mock_render = AsyncMock()
+
+        with patch(f"{_P}.story_repo.get_story", MagicMock(return_value={**FAKE_STORY, "status": status})), \
+             patch(f"{_P}.image_service.generate_image_for_scene", mock_image), \
+             patch(f"{_P}.render_service.render_video", mock_render):
+            from api.services.pipeline import regenerate_scene
+
+            with pytest.raises(ValueError, match=status):
+                await regenerate_scene(STORY_ID, "scene-002")
+
+        mock_image.assert_not_awaited()
+        mock_render.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_scene_from_another_story_is_rejected(self):
+        other_scene = {**FAKE_SCENES[0], "story_id": "other-story"}
+        mock_render = AsyncMock()
+
+        with patch(f"{_P}.story_repo.get_story", MagicMock(return_value=FAKE_STORY)), \
+             patch(f"{_P}.scene_repo.get_scene", MagicMock(return_value=other_scene)), \
+             patch(f"{_P}.render_service.render_video", mock_render):
+            from api.services.pipeline import regenerate_scene
+
+            with pytest.raises(ValueError, match="not found in story"):
+                await regenerate_scene(STORY_ID, "scene-001")
+
+        mock_render.assert_not_awaited()
@@ -69,6 +69,20 @@ class TestGetReview:
         assert len(data["thumbnail_options"]) == 2
         assert data["video_url"] == "https://storage.example.com/video.mp4"
 
+    def test_includes_review_proxies(self, mock_supabase, client, api_key_header):
+        """A revisao expoe o MP4 de preview e os WebP das thumbnails quando existem."""
+        thumbs = _make_thumbnail_options()
+        thumbs[0]["preview_url"] = "https://example.com/thumb1.webp"
+        mock_supabase.set_response("stories", _make_story(preview_video_url="https://storage.example.com/preview.mp4"))
+        mock_supabase.set_response("title_options", _make_title_options())
+        mock_supabase.set_response("thumbnail_options", thumbs)
+
+        data = client.get(f"/stories/{STORY_ID}/review", headers=api_key_header).json()
+
+        assert data["preview_video_url"] == "https://storage.example.com/preview.mp4"
+        assert data["thumbnail_options"][0]["preview_url"] == "https://example.com/thumb1.webp"
+        assert data["thumbnail_options"][1]["preview_url"] is None
+
     def test_returns_400_when_not_ready(self, mock_supabase, client, api_key_header):
         mock_supabase.set_response("stories", _make_story(status="scripting"))
 
@@ -85,6 +85,14 @@ class TestCreateStory:
         )
         assert resp.status_code == 422
 
+    def test_validates_thumbnail_mode_field(self, mock_supabase, client, api_key_header):
+        resp = client.post(
+            "/stories",
+            json={"topic": "Test", "thumbnail_mode": "stock"},
+            headers=api_key_header,
+        )
+        assert resp.status_code == 422
+
 
 # ---------------------------------------------------------------------------
 # GET /stories
@@ -193,6 +201,52 @@ class TestDeleteStory:
         resp = client.delete(f"/stories/{STORY_ID}", headers=api_key_header)
         assert resp.status_code == 404
 
+    def test_keeps_only_files_variants_reference(self, mock_supabase, client, api_key_header):
+        """Com uma variante 9:16, so o audio continua no storage; imagens, thumbnails e videos saem."""
+        mock_supabase.set_response("stories", _make_story(aspect_ratio="16:9"))
+
+        with patch("api.db.repositories.story_repo.list_variants", return_value=[{"id": "v1", "aspect_ratio": "9:16"}]), \
+             patch("api.services.storage.delete_story_files", return_value=None) as delete_files:
+            resp = client.delete(f"/stories/{STORY_ID}", headers=api_key_header)
+
+        assert resp.status_code == 204
+        delete_files.assert_called_once_with(STORY_ID, ["images", "videos", "thumbnails"])
+
+
+# ---------------------------------------------------------------------------
+# POST /stories/{id}/variants
+# ---------------------------------------------------------------------------
+
+
+class TestCreateVariant:
+    def test_returns_201_and_schedules_variant_pipeline(self, mock_supabase, client, api_key_header):
+        mock_supabase.set_response("stories", _make_story())
+        variant = _make_story(id="b1b2c3d4-e5f6-7890-abcd-ef1234567890", aspect_ratio="9:16")
+
+        with patch("api.services.variants.clone_story", return_value=variant) as clone, \
+             patch("api.services.pipeline.run_variant_pipeline") as run_variant:
+            resp = client.post(f"/stories/{STORY_ID}/variants", json={"aspect_ratio": "9:16"}, headers=api_key_header)
+
+        assert resp.status_code == 201
+        assert resp.json()["aspect_ratio"] == "9:16"
+        clone.assert_called_once_with(STORY_ID, "9:16", None)
+        run_variant.assert_called_once_with(variant["id"])
+
+    def test_returns_409_when_story_cannot_be_reused(self, mock_supabase, client, api_key_header):
+        mock_supabase.set_response("stories", _make_story())
+
+        with patch("api.services.variants.clone_story", side_effect=ValueError("no finished scenes")):
+            resp = client.post(f"/stories/{STORY_ID}/variants", json={"aspect_ratio": "9:16"}, headers=api_key_header)
+
+        assert resp.status_code == 409
+
+    def test_invalid_aspect_ratio_returns_422(self, mock_supabase, client, api_key_header):
+        mock_supabase.set_response("stories", _make_story())
+
+        resp = client.post(f"/stories/{STORY_ID}/variants", json={"aspect_ratio": "4:3"}, headers=api_key_header)
+
+        assert resp.status_code == 422
+
 
 # ---------------------------------------------------------------------------
 # Autenticacao
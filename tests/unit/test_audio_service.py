@@ -40,6 +40,17 @@ FAKE_VOICES = {
 }
 
 
+@pytest.fixture(autouse=True)
+def tts_cache(tmp_path):
+    """Cache de TTS local e vazio em cada teste."""
+    from api.services import tts_cache
+    from api.services.cache import DiskCache
+
+    cache = DiskCache(str(tmp_path / "tts-cache"), max_bytes=1 << 20)
+    with patch.object(tts_cache, "get_tts_cache", return_value=cache):
+        yield cache
+
+
 # ── Tests: _chunk_text ────────────────────────────────────────────────────────
 
 
@@ -76,8 +87,8 @@ class TestChunkText:
 
 
 class TestSynthesizeChunk:
-    @patch("api.services.audio.requests")
-    def test_synthesize_chunk_success(self, mock_requests):
+    @patch("api.services.audio._get_http_session")
+    def test_synthesize_chunk_success(self, mock_session):
         """Chamada TTS com payload correto retorna bytes decodificados."""
         # Arrange
         fake_audio = b"fake-audio-bytes"
@@ -86,7 +97,7 @@ class TestSynthesizeChunk:
         mock_response = MagicMock()
         mock_response.json.return_value = {"audioContent": fake_b64}
         mock_response.raise_for_status = MagicMock()
-        mock_requests.post.return_value = mock_response
+        mock_session.return_value.post.return_value = mock_response
 
         from api.services.audio import _synthesize_chunk
 
@@ -95,13 +106,57 @@ class TestSynthesizeChunk:
 
         # Assert
         assert result == fake_audio
-        mock_requests.post.assert_called_once()
-        call_kwargs = mock_requests.post.call_args
+        mock_session.return_value.post.assert_called_once()
+        call_kwargs = mock_session.return_value.post.call_args
         payload = call_kwargs[1]["json"] if "json" in call_kwargs[1] else call_kwargs.kwargs["json"]
         assert payload["input"]["text"] == "Hello world."
         assert payload["voice"]["name"] == "en-US-Wavenet-D"
         assert payload["voice"]["languageCode"] == "en-US"
         assert payload["audioConfig"]["audioEncoding"] == "MP3"
+        assert call_kwargs[1]["timeout"] == (10, 120)
+
+
+class TestSynthesizeChunks:
+    @pytest.mark.asyncio
+    async def test_concurrent_in_order_and_capped(self):
+        """Chunks sao sintetizados em paralelo, limitados pelo pool, na ordem original."""
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from api.services import audio
+
+        lock = threading.Lock()
+        running = {"now": 0, "peak": 0}
+
+        def synthesize(text, voice, language):
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.05 if text == "c0" else 0.01)  # the first chunk finishes last
+            with lock:
+                running["now"] -= 1
+            return text.encode()
+
+        with ThreadPoolExecutor(max_workers=2) as pool, \
+             patch.object(audio, "_get_tts_pool", return_value=pool), \
+             patch.object(audio, "_synthesize_chunk", side_effect=synthesize):
+            parts = await audio._synthesize_chunks([f"c{i}" for i in range(6)], "voice", "en-US")
+
+        assert parts == [f"c{i}".encode() for i in range(6)]
+        assert running["peak"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_fails_narration(self):
+        from api.services import audio
+
+        def synthesize(text, voice, language):
+            if text == "bad":
+                raise RuntimeError("TTS returned no audio content")
+            return b"ok"
+
+        with patch.object(audio, "_synthesize_chunk", side_effect=synthesize), \
+             pytest.raises(RuntimeError, match="no audio content"):
+            await audio._synthesize_chunks(["ok", "bad", "ok"], "voice", "en-US")
 
 
 # ── Tests: generate_audio_for_story ───────────────────────────────────────────
@@ -109,16 +164,16 @@ class TestSynthesizeChunk:
 
 class TestGenerateAudioForStory:
     @pytest.mark.asyncio
-    @patch("api.services.audio._get_audio_duration", return_value=5.0)
+    @patch("api.services.audio.get_duration", return_value=5.0)
     @patch("api.services.audio.upload_file", return_value="https://storage.example.com/audio/scene.mp3")
-    @patch("api.services.audio.requests")
+    @patch("api.services.audio._get_http_session")
     @patch("api.services.audio.scene_repo")
     @patch("api.services.audio.story_repo")
     async def test_generate_audio_for_story_success(
         self,
         mock_story_repo,
         mock_scene_repo,
-        mock_requests,
+        mock_session,
         mock_upload,
         mock_duration,
     ):
@@ -134,7 +189,7 @@ class TestGenerateAudioForStory:
         mock_response = MagicMock()
         mock_response.json.return_value = {"audioContent": fake_b64}
         mock_response.raise_for_status = MagicMock()
-        mock_requests.post.return_value = mock_response
+        mock_session.return_value.post.return_value = mock_response
 
         # Patch VOICES in the audio module
         with patch("api.services.audio.VOICES", FAKE_VOICES):
@@ -164,3 +219,116 @@ class TestGenerateAudioForStory:
             await generate_audio_for_story("story-99")
 
         mock_scene_repo.get_scenes_by_story.assert_not_called()
+
+
+class TestGenerateTranslatedAudio:
+    @pytest.mark.asyncio
+    @patch("api.services.audio.get_duration", return_value=6.5)
+    @patch("api.services.audio.upload_file", return_value="https://storage.example.com/audio/scene.pt-BR.mp3")
+    @patch("api.services.audio._get_http_session")
+    @patch("api.services.audio.scene_repo")
+    async def test_translated_narration_stored_per_language(
+        self, mock_scene_repo, mock_session, mock_upload, mock_duration,
+    ):
+        """A narracao traduzida vai para translated_audio, sem tocar no audio original."""
+        mock_scene_repo.get_scene.return_value = {
+            **FAKE_SCENE_1,
+            "translated_text": {"pt-BR": "Roma foi um imperio poderoso."},
+            "translated_audio": {},
+        }
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"audioContent": base64.b64encode(b"mp3").decode()}
+        mock_session.return_value.post.return_value = mock_response
+        voices = {**FAKE_VOICES, "pt-BR": {"voice_name": "pt-BR-Wavenet-B", "language_code": "pt-BR"}}
+
+        with patch("api.services.audio.VOICES", voices):
+            from api.services.audio import generate_translated_audio_for_scene
+
+            result = await generate_translated_audio_for_scene("scene-1", FAKE_STORY, ["pt-BR"])
+
+        assert result == {"pt-BR": {"audio_url": mock_upload.return_value, "duration_seconds": 6.5}}
+        path = mock_upload.call_args[0][1]
+        assert path.startswith("story-1/scene-1.pt-BR.") and path.endswith(".mp3")
+        assert mock_session.return_value.post.call_args[1]["json"]["voice"]["languageCode"] == "pt-BR"
+        mock_scene_repo.update_scene.assert_called_once_with("scene-1", {"translated_audio": result})
+
+    @pytest.mark.asyncio
+    @patch("api.services.audio.scene_repo")
+    async def test_missing_translation_raises(self, mock_scene_repo):
+        mock_scene_repo.get_scene.return_value = {**FAKE_SCENE_1, "translated_text": {}}
+
+        from api.services.audio import generate_translated_audio_for_scene
+
+        with pytest.raises(ValueError, match="no 'pt-BR' translation"):
+            await generate_translated_audio_for_scene("scene-1", FAKE_STORY, ["pt-BR"])
+
+
+# ── Tests: TTS cache ──────────────────────────────────────────────────────────
+
+
+class TestNarrationCache:
+    @pytest.mark.asyncio
+    @patch("api.services.audio.upload_file", return_value="https://storage.example.com/audio/scene.mp3")
+    @patch("api.services.audio._synthesize_audio", new_callable=AsyncMock, return_value=(b"mp3", 4.5))
+    async def test_second_run_makes_no_tts_calls(self, mock_synthesize, mock_upload):
+        """Reexecucoes com o mesmo texto e voz reutilizam audio e duracao do cache."""
+        from api.services.audio import _synthesize_narration
+
+        with patch("api.services.audio.VOICES", FAKE_VOICES):
+            first = await _synthesize_narration("Rome  was\nmighty.", "en-US", "story-1/scene-1.mp3")
+            second = await _synthesize_narration("Rome was mighty.", "en-US", "story-2/scene-1.mp3")
+
+        assert first == second == ("https://storage.example.com/audio/scene.mp3", 4.5)
+        mock_synthesize.assert_awaited_once()
+        path, data = mock_upload.call_args_list[1][0][1:3]
+        assert path.startswith("story-2/scene-1.") and data == b"mp3"
+
+    @pytest.mark.asyncio
+    @patch("api.services.audio.upload_file", return_value="https://storage.example.com/audio/scene.mp3")
+    @patch("api.services.audio._synthesize_audio", new_callable=AsyncMock)
+    async def test_refresh_bypasses_and_replaces_cache(self, mock_synthesize, mock_upload):
+        """Regenerar o audio chama o TTS mesmo com o texto igual e substitui a entrada do cache."""
+        from api.services.audio import _synthesize_narration
+
+        mock_synthesize.side_effect = [(b"old", 4.5), (b"new", 4.7)]
+        with patch("api.services.audio.VOICES", FAKE_VOICES):
+            await _synthesize_narration("Rome was mighty.", "en-US", "story-1/scene-1.mp3")
+            refreshed = await _synthesize_narration("Rome was mighty.", "en-US", "story-1/scene-1.mp3", refresh=True)
+            again = await _synthesize_narration("Rome was mighty.", "en-US", "story-1/scene-1.mp3")
+
+        assert mock_synthesize.await_count == 2
+        assert refreshed[1] == again[1] == 4.7
+        uploads = [c[0] for c in mock_upload.call_args_list]
+        assert uploads[1][2] == uploads[2][2] == b"new"
+        assert uploads[0][1] != uploads[1][1]  # novo audio, nova URL
+
+    @pytest.mark.asyncio
+    @patch("api.services.audio.upload_file", return_value="https://storage.example.com/audio/scene.mp3")
+    @patch("api.services.audio._synthesize_audio", new_callable=AsyncMock, return_value=(b"mp3", 4.5))
+    async def test_other_voice_misses(self, mock_synthesize, mock_upload):
+        from api.services.audio import _synthesize_narration
+
+        voices = {**FAKE_VOICES, "en-GB": {"voice_name": "en-GB-Wavenet-B", "language_code": "en-GB"}}
+        with patch("api.services.audio.VOICES", voices):
+            await _synthesize_narration("Rome was mighty.", "en-US", "a.mp3")
+            await _synthesize_narration("Rome was mighty.", "en-GB", "b.mp3")
+
+        assert mock_synthesize.await_count == 2
+
+    def test_key_normalizes_text_only(self):
+        from api.services.tts_cache import tts_key
+
+        config = {"audioEncoding": "MP3"}
+        base = tts_key("Caf\u00e9  society.", "v", "en-US", config)
+        assert tts_key("Cafe\u0301\nsociety.", "v", "en-US", config) == base
+        assert tts_key("Cafe society.", "v", "en-US", config) != base
+        assert tts_key("Caf\u00e9 society.", "v", "en-US", {"audioEncoding": "LINEAR16"}) != base
+
+    def test_entry_without_duration_is_a_miss(self, tts_cache):
+        from api.services import tts_cache as tts
+
+        tts_cache.put_bytes("k", b"mp3", tts.AUDIO_SUFFIX)
+        assert tts.get_narration("k") is None
+
+        tts.put_narration("k", b"mp3", 3.25)
+        assert tts.get_narration("k") == (b"mp3", 3.25)
@@ -0,0 +1,138 @@
+"""Testes unitarios para api.services.cache e api.services.clip_cache."""
+
+from __future__ import annotations
+
+import os
+from unittest.mock import patch
+
+
+def _write(path, size: int) -> str:
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+# ── Tests: DiskCache ──────────────────────────────────────────────────────────
+
+
+class TestDiskCache:
+    def test_put_then_get_returns_cached_copy(self, tmp_path):
+        from api.services.cache import DiskCache
+
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=1000)
+        src = _write(tmp_path / "clip.mp4", 10)
+
+        cache.put("abc", src, ".mp4")
+        hit = cache.get("abc", ".mp4")
+
+        assert hit == str(tmp_path / "cache" / "abc.mp4")
+        assert open(hit, "rb").read() == b"x" * 10
+        assert cache.get("missing", ".mp4") is None
+
+    def test_put_links_instead_of_copying(self, tmp_path):
+        """No mesmo filesystem a entrada compartilha os bytes do clipe do render."""
+        from api.services.cache import DiskCache
+
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=1000)
+        src = _write(tmp_path / "clip.mp4", 10)
+
+        hit = cache.put("abc", src, ".mp4")
+
+        assert os.path.samefile(hit, src)
+        os.remove(src)
+        assert open(cache.get("abc", ".mp4"), "rb").read() == b"x" * 10
+
+    @patch("api.services.cache.upload_file")
+    def test_put_bytes_stores_in_both_tiers(self, mock_upload, tmp_path):
+        from api.services.cache import DiskCache
+
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=1000, bucket="audio", prefix="tts-cache/")
+        cache.put_bytes("abc", b"data", ".json", "application/json")
+
+        assert open(cache.get("abc", ".json"), "rb").read() == b"data"
+        mock_upload.assert_called_once_with("audio", "tts-cache/abc.json", b"data", "application/json")
+
+    def test_evicts_least_recently_used_over_budget(self, tmp_path):
+        """Ao passar do limite, a entrada usada ha mais tempo sai primeiro."""
+        from api.services.cache import DiskCache
+
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=250)
+        for key in ("a", "b"):
+            cache.put(key, _write(tmp_path / key, 100))
+        os.utime(cache._path("a", ""), (1, 1))
+        os.utime(cache._path("b", ""), (2, 2))
+        cache.get("a")  # "a" volta a ser a mais recente
+
+        cache.put("c", _write(tmp_path / "c", 100))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    @patch("api.services.cache.upload_file")
+    @patch("api.services.cache.download_object")
+    def test_bucket_tier_fills_local_miss(self, mock_download, mock_upload, tmp_path):
+        """Miss local consulta o bucket e grava o resultado no disco."""
+        from api.services.cache import DiskCache
+
+        mock_download.return_value = b"remote-clip"
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=1000, bucket="videos", prefix="clip-cache/")
+
+        hit = cache.get("k1", ".mp4")
+
+        mock_download.assert_called_once_with("videos", "clip-cache/k1.mp4")
+        assert open(hit, "rb").read() == b"remote-clip"
+
+        cache.put("k2", _write(tmp_path / "new.mp4", 5), ".mp4", "video/mp4")
+        mock_upload.assert_called_once()
+        assert mock_upload.call_args[0][:2] == ("videos", "clip-cache/k2.mp4")
+
+
+    @patch("api.services.cache.remove_objects")
+    @patch("api.services.cache.list_objects")
+    def test_prune_bucket_drops_oldest_over_budget(self, mock_list, mock_remove, tmp_path):
+        """O tier do bucket volta ao limite removendo os uploads mais antigos."""
+        from api.services.cache import DiskCache
+
+        mock_list.return_value = [
+            {"name": f"k{i}.mp4", "metadata": {"size": 100}} for i in range(5)
+        ]
+        cache = DiskCache(
+            str(tmp_path / "cache"), max_bytes=1000, bucket="cache", prefix="clip-cache/", bucket_max_bytes=250,
+        )
+
+        assert cache.prune_bucket() == 3
+        mock_list.assert_called_once_with("cache", "clip-cache")
+        mock_remove.assert_called_once_with("cache", ["clip-cache/k0.mp4", "clip-cache/k1.mp4", "clip-cache/k2.mp4"])
+
+    @patch("api.services.cache.remove_objects")
+    @patch("api.services.cache.list_objects", side_effect=RuntimeError("down"))
+    def test_prune_bucket_failure_is_not_fatal(self, mock_list, mock_remove, tmp_path):
+        from api.services.cache import DiskCache
+
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=1000, bucket="cache", prefix="clip-cache/")
+
+        assert cache.prune_bucket() == 0
+        mock_remove.assert_not_called()
+
+
+# ── Tests: clip_key ───────────────────────────────────────────────────────────
+
+
+class TestClipKey:
+    def test_key_depends_on_every_input(self, tmp_path):
+        from api.services.clip_cache import clip_key
+
+        img = tmp_path / "scene.png"
+        img.write_bytes(b"image-bytes")
+        other = tmp_path / "other.png"
+        other.write_bytes(b"image-bytes-2")
+        enc = ["-crf", "22"]
+
+        base = clip_key(str(img), 4.0, "zoom_in", "1920x1080", enc)
+
+        assert base == clip_key(str(img), 4.0, "zoom_in", "1920x1080", enc)
+        assert base != clip_key(str(other), 4.0, "zoom_in", "1920x1080", enc)
+        assert base != clip_key(str(img), 4.5, "zoom_in", "1920x1080", enc)
+        assert base != clip_key(str(img), 4.0, "pan_left", "1920x1080", enc)
+        assert base != clip_key(str(img), 4.0, "zoom_in", "1080x1920", enc)
+        assert base != clip_key(str(img), 4.0, "zoom_in", "1920x1080", ["-crf", "30"])
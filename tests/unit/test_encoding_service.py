@@ -0,0 +1,165 @@
+"""Testes unitarios para api.services.encoding."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+
+def _timeline(*durations: float):
+    from api.services.timeline import build_timeline
+
+    return build_timeline([
+        {"id": f"scene-{i}", "duration_seconds": d} for i, d in enumerate(durations)
+    ])
+
+
+# ── Tests: RenderProfile ──────────────────────────────────────────────────────
+
+
+class TestRenderProfile:
+    def test_gop_follows_gop_seconds(self):
+        """O GOP do encode e definido em segundos pelo perfil."""
+        from dataclasses import replace
+        from api.services.encoding import FINAL
+
+        args = replace(FINAL, gop_seconds=4.0).video_args
+        assert args[args.index("-g") + 1] == "100"
+        assert args[args.index("-keyint_min") + 1] == "100"
+
+    def test_render_module_reexports_profiles(self):
+        from api.services import encoding, render
+
+        assert render.get_profile("final") is encoding.FINAL
+
+
+# ── Tests: crf_for_bpp / probe_entries ────────────────────────────────────────
+
+
+class TestCrfForBpp:
+    def test_double_the_target_adds_six(self):
+        from api.services.encoding import crf_for_bpp
+
+        assert crf_for_bpp(22, 0.1, target_bpp=0.05) == 28
+
+    def test_clamped_to_range(self):
+        from api.services.encoding import CRF_RANGE, crf_for_bpp
+
+        assert crf_for_bpp(22, 10.0, target_bpp=0.05) == CRF_RANGE[1]
+        assert crf_for_bpp(22, 0.0001, target_bpp=0.05) == CRF_RANGE[0]
+
+    def test_empty_probe_keeps_crf(self):
+        from api.services.encoding import crf_for_bpp
+
+        assert crf_for_bpp(22, 0.0) == 22
+
+
+class TestProbeEntries:
+    def test_spread_over_timeline(self):
+        from api.services.encoding import probe_entries
+
+        entries = probe_entries(_timeline(*[3.0] * 9), count=3)
+        assert [e.index for e in entries] == [0, 3, 6]
+
+    def test_short_timeline_and_disabled(self):
+        from api.services.encoding import probe_entries
+
+        assert [e.index for e in probe_entries(_timeline(3.0, 3.0), count=3)] == [0, 1]
+        assert probe_entries(_timeline(3.0), count=0) == []
+
+
+    def test_probe_window_is_centred(self):
+        """A janela do probe fica no meio do clipe, longe do IDR inicial e do inicio parado."""
+        from api.services.encoding import PROBE_FRAMES, probe_start
+
+        assert probe_start(300) == (300 - PROBE_FRAMES) // 2
+        assert probe_start(PROBE_FRAMES // 2) == 0
+
+
+# ── Tests: choose_profile ─────────────────────────────────────────────────────
+
+
+class TestChooseProfile:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("minutes, preset", [(3, "medium"), (12, "faster"), (45, "veryfast")])
+    async def test_preset_follows_length(self, minutes, preset):
+        """Historias curtas usam presets mais lentos e eficientes."""
+        from api.services.encoding import FINAL, choose_profile
+
+        profile, record = await choose_profile(FINAL, _timeline(minutes * 60.0), "1920x1080", has_music=False)
+
+        assert profile.preset == preset
+        assert record["preset"] == preset
+
+    @pytest.mark.asyncio
+    async def test_audio_bitrate_follows_mix(self):
+        from api.services.encoding import FINAL, choose_profile
+
+        speech, _ = await choose_profile(FINAL, _timeline(60.0), "1920x1080", has_music=False)
+        music, _ = await choose_profile(FINAL, _timeline(60.0), "1920x1080", has_music=True)
+
+        assert speech.audio_bitrate == "96k"
+        assert music.audio_bitrate == "128k"
+
+    @pytest.mark.asyncio
+    async def test_configured_profile_bounds_the_policy(self):
+        """O perfil final configurado limita o preset (mais rapido permitido) e o bitrate de audio (maximo)."""
+        from dataclasses import replace
+
+        from api.services.encoding import FINAL, choose_profile
+
+        base = replace(FINAL, preset="slow", audio_bitrate="64k")
+        short, _ = await choose_profile(base, _timeline(60.0), "1920x1080", has_music=True)
+        long, _ = await choose_profile(base, _timeline(45 * 60.0), "1920x1080", has_music=True)
+
+        assert short.preset == long.preset == "slow"
+        assert short.audio_bitrate == "64k"
+
+    @pytest.mark.asyncio
+    async def test_without_probe_keeps_crf(self):
+        from api.services.encoding import FINAL, choose_profile
+
+        profile, record = await choose_profile(FINAL, _timeline(60.0), "1920x1080", has_music=False)
+
+        assert profile.crf == FINAL.crf
+        assert record["probe_bpp"] is None
+
+    @pytest.mark.asyncio
+    async def test_probe_steers_crf(self):
+        """Um probe acima do alvo de bpp sobe o CRF; os frames sao limitados a janela do probe."""
+        from api.services import encoding
+
+        w, h = 1920, 1080
+        probe_frames = 3 * encoding.PROBE_FRAMES
+        bpp = 2 * encoding.ENCODING_TARGET_BPP
+        probe = AsyncMock(return_value=int(bpp * w * h * probe_frames / 8))
+
+        profile, record = await encoding.choose_profile(
+            encoding.FINAL, _timeline(*[10.0] * 6), f"{w}x{h}", has_music=False, probe=probe,
+        )
+
+        assert profile.crf == encoding.FINAL.crf + 6
+        assert record["crf"] == profile.crf
+
+    @pytest.mark.asyncio
+    async def test_low_bpp_keeps_final_crf(self):
+        """Conteudo estatico abaixo do alvo nao desce o CRF: o CRF final e o piso."""
+        from api.services import encoding
+
+        w, h = 1920, 1080
+        probe_frames = 3 * encoding.PROBE_FRAMES
+        bpp = encoding.ENCODING_TARGET_BPP / 8
+        probe = AsyncMock(return_value=int(bpp * w * h * probe_frames / 8))
+
+        profile, record = await encoding.choose_profile(
+            encoding.FINAL, _timeline(*[10.0] * 6), f"{w}x{h}", has_music=False, probe=probe,
+        )
+
+        assert profile.crf == encoding.FINAL.crf == 22
+        assert record["crf"] == 22
+        assert record["probe_bpp"] < encoding.ENCODING_TARGET_BPP
+        assert record["probe_bpp"] == pytest.approx(bpp, abs=1e-3)
+        probed_profile, entries = probe.call_args[0]
+        assert probed_profile.preset == profile.preset
+        assert [e.index for e in entries] == [0, 2, 4]
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, mock_open, patch
 
 import pytest
 
@@ -144,12 +144,15 @@ class TestGenerateImageForScene:
         from api.services.image import generate_image_for_scene
 
         # Act — use patch for open & os.unlink to avoid real file I/O
-        with patch("builtins.open", MagicMock()), \
+        with patch("builtins.open", mock_open(read_data=b"png-bytes")), \
              patch("api.services.image.os.unlink"):
             result = await generate_image_for_scene("scene-1", FAKE_STORY)
 
         # Assert
         assert result == "https://storage.example.com/images/story-1/scene-1.png"
+        storage_path = mock_upload.call_args[0][1]
+        assert storage_path.startswith("story-1/scene-1.") and storage_path.endswith(".png")
+        assert mock_upload.call_args[0][2] == b"png-bytes"
         mock_scene_repo.get_scene.assert_called_once_with("scene-1")
         mock_genai.GenerativeModel.assert_called_once_with("gemini-2.0-flash")
         mock_imagen.models.generate_images.assert_called_once()
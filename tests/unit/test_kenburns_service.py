@@ -0,0 +1,65 @@
+"""Testes unitarios para api.services.kenburns."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+class TestCropBoxes:
+    def test_zoom_in_grows_from_full_frame(self):
+        """zoom_in: zoom = min(zoom+0.0015, 1.5), crop centralizado."""
+        from api.services.kenburns import crop_boxes
+
+        boxes = crop_boxes("zoom_in", 400, 1920, 1080)
+
+        widths = boxes[:, 2] - boxes[:, 0]
+        assert widths[0] == pytest.approx(1920 / 1.0015)
+        assert widths[-1] == pytest.approx(1920 / 1.5)
+        assert np.all(np.diff(widths) <= 0)
+        centers = (boxes[:, 0] + boxes[:, 2]) / 2
+        assert np.allclose(centers, 960)
+
+    def test_zoom_out_starts_at_max_zoom(self):
+        from api.services.kenburns import crop_boxes
+
+        boxes = crop_boxes("zoom_out", 100, 1920, 1080)
+
+        widths = boxes[:, 2] - boxes[:, 0]
+        assert widths[0] == pytest.approx(1920 / 1.5)
+        assert widths[1] == pytest.approx(1920 / (1.5 - 0.0015))
+        assert np.all(np.diff(widths) >= 0)
+
+    @pytest.mark.parametrize("effect,sign", [("pan_left", -1), ("pan_right", 1)])
+    def test_pan_moves_horizontally_inside_image(self, effect, sign):
+        from api.services.kenburns import crop_boxes
+
+        boxes = crop_boxes(effect, 125, 1920, 1080)
+
+        widths = boxes[:, 2] - boxes[:, 0]
+        assert np.allclose(widths, 1920 / 1.2)
+        assert sign * (boxes[-1, 0] - boxes[0, 0]) > 0
+        assert boxes[:, 0].min() >= 0
+        assert boxes[:, 2].max() <= 1920 + 1e-6
+
+    def test_unknown_effect(self):
+        from api.services.kenburns import crop_boxes
+
+        with pytest.raises(ValueError, match="Unknown effect"):
+            crop_boxes("spin", 10, 100, 100)
+
+
+class TestRenderFrames:
+    def test_returns_rgb24_frames_for_range(self, tmp_path):
+        """Retorna w*h*3 bytes por frame, apenas para o intervalo pedido."""
+        from api.services.kenburns import render_frames
+
+        path = tmp_path / "scene.png"
+        Image.new("RGB", (320, 200), (200, 10, 10)).save(path)
+
+        data = render_frames(str(path), "zoom_in", 50, 160, 90, 10, 14)
+
+        assert len(data) == 4 * 160 * 90 * 3
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(4, 90, 160, 3)
+        assert np.allclose(frame[..., 0], 200, atol=2)
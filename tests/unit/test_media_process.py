@@ -0,0 +1,144 @@
+"""Testes unitarios para api.services.media_process."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+
+class TestRunMedia:
+    @pytest.mark.asyncio
+    async def test_returns_stdout(self):
+        from api.services.media_process import run_media
+
+        out = await run_media([sys.executable, "-c", "print('12.5')"])
+
+        assert out.strip() == "12.5"
+
+    @pytest.mark.asyncio
+    async def test_nonzero_exit_raises_with_stderr(self):
+        """Falha do processo vira MediaProcessError com o stderr capturado."""
+        from api.services.media_process import MediaProcessError, run_media
+
+        with pytest.raises(MediaProcessError, match="Invalid data found") as exc:
+            await run_media([sys.executable, "-c", "import sys; sys.stderr.write('Invalid data found'); sys.exit(3)"])
+
+        assert exc.value.returncode == 3
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_process(self):
+        from api.services.media_process import MediaProcessError, run_media
+
+        started = time.monotonic()
+        with pytest.raises(MediaProcessError, match="timed out"):
+            await run_media([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+
+        assert time.monotonic() - started < 10
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """Enquanto o processo roda, outras corotinas continuam executando."""
+        from api.services.media_process import run_media
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        await run_media([sys.executable, "-c", "import time; time.sleep(0.5)"])
+        task.cancel()
+
+        assert ticks >= 5
+
+
+class TestRunMediaStreaming:
+    @pytest.mark.asyncio
+    async def test_feeds_chunks_to_stdin(self, tmp_path):
+        from api.services.media_process import run_media_streaming
+
+        out = tmp_path / "out.bin"
+
+        async def chunks():
+            for part in (b"abc", b"def"):
+                yield part
+
+        script = f"import sys; open({str(out)!r}, 'wb').write(sys.stdin.buffer.read())"
+        await run_media_streaming([sys.executable, "-c", script], chunks())
+
+        assert out.read_bytes() == b"abcdef"
+
+    @pytest.mark.asyncio
+    async def test_early_exit_raises(self):
+        from api.services.media_process import MediaProcessError, run_media_streaming
+
+        async def chunks():
+            for _ in range(100):
+                yield b"x" * 65536
+
+        with pytest.raises(MediaProcessError, match="bad input"):
+            await run_media_streaming(
+                [sys.executable, "-c", "import sys; sys.stderr.write('bad input'); sys.exit(1)"], chunks(),
+            )
+
+
+class TestProgress:
+    def test_progress_flags_inserted_after_program(self):
+        from api.services.media_process import _with_progress
+
+        cmd = _with_progress(["ffmpeg", "-y", "-i", "in.png", "out.mp4"])
+
+        assert cmd == ["ffmpeg", "-progress", "pipe:1", "-nostats", "-y", "-i", "in.png", "out.mp4"]
+
+    @pytest.mark.asyncio
+    async def test_blocks_parsed_until_progress_line(self):
+        """Cada bloco key=value termina em progress= e chega inteiro ao callback."""
+        from api.services.media_process import _read_progress
+
+        stream = asyncio.StreamReader()
+        stream.feed_data(
+            b"frame=25\nfps=50.0\nspeed=2.0x\nprogress=continue\n"
+            b"frame=75\nfps=48.5\nspeed=1.94x\nprogress=end\n"
+        )
+        stream.feed_eof()
+        blocks = []
+
+        await _read_progress(stream, blocks.append)
+
+        assert blocks == [
+            {"frame": "25", "fps": "50.0", "speed": "2.0x", "progress": "continue"},
+            {"frame": "75", "fps": "48.5", "speed": "1.94x", "progress": "end"},
+        ]
+
+
+class TestRunMediaOutput:
+    @pytest.mark.asyncio
+    async def test_yields_stdout_in_chunks(self):
+        from api.services.media_process import run_media_output
+
+        chunks = [c async for c in run_media_output(
+            [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'x' * 2500)"], chunk_size=1000,
+        )]
+
+        assert [len(c) for c in chunks] == [1000, 1000, 500]
+
+    @pytest.mark.asyncio
+    async def test_failure_raises_instead_of_last_chunk(self):
+        """Saida truncada nunca termina normalmente: o ultimo bloco da lugar ao erro."""
+        from api.services.media_process import MediaProcessError, run_media_output
+
+        received = []
+        with pytest.raises(MediaProcessError) as exc:
+            async for chunk in run_media_output(
+                [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'partial'); sys.exit(1)"],
+            ):
+                received.append(chunk)
+
+        assert received == []
+        assert exc.value.returncode == 1
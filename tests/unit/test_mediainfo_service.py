@@ -0,0 +1,120 @@
+"""Testes unitarios para api.services.mediainfo."""
+
+from __future__ import annotations
+
+import io
+import struct
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, mono: 417-byte frames of 1152 samples
+MP3_HEADER = bytes([0xFF, 0xFB, 0x90, 0xC4])
+MP3_FRAME = MP3_HEADER + bytes(413)
+
+
+def _id3(size: int = 20) -> bytes:
+    return b"ID3\x04\x00\x00" + bytes([0, 0, 0, size]) + bytes(size)
+
+
+def _xing_frame(frames: int) -> bytes:
+    frame = bytearray(MP3_FRAME)
+    frame[4 + 17:4 + 17 + 12] = b"Xing" + struct.pack(">II", 1, frames)
+    return bytes(frame)
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _mp4(duration: int, timescale: int = 1000, faststart: bool = True) -> bytes:
+    mvhd = _box(b"mvhd", bytes(12) + struct.pack(">II", timescale, duration) + bytes(80))
+    tkhd = _box(b"tkhd", bytes(76) + struct.pack(">II", 1920 << 16, 1080 << 16))
+    moov = _box(b"moov", mvhd + _box(b"trak", tkhd))
+    boxes = [_box(b"ftyp", b"isom" + bytes(4)), moov, _box(b"mdat", bytes(1000))]
+    if not faststart:
+        boxes[1], boxes[2] = boxes[2], boxes[1]
+    return b"".join(boxes)
+
+
+class TestMp3:
+    def test_cbr_counts_frames(self):
+        """Sem cabecalho Xing, a duracao vem da contagem de frames (ID3 e tag final ignorados)."""
+        from api.services.mediainfo import parse
+
+        info = parse(_id3() + MP3_FRAME * 100 + b"TAG" + bytes(125))
+
+        assert info.format == "mp3"
+        assert info.duration == pytest.approx(100 * 1152 / 44100)
+        assert (info.sample_rate, info.channels) == (44100, 1)
+
+    def test_xing_frame_count(self):
+        from api.services.mediainfo import parse
+
+        info = parse(_xing_frame(1000) + MP3_FRAME * 3)
+
+        assert info.duration == pytest.approx(1000 * 1152 / 44100)
+
+    def test_skips_false_sync_before_first_frame(self):
+        from api.services.mediainfo import parse
+
+        info = parse(_id3() + b"\xff\xfb\x00" + MP3_FRAME * 10)
+
+        assert info.duration == pytest.approx(10 * 1152 / 44100)
+
+
+class TestImages:
+    @pytest.mark.parametrize("fmt", ["PNG", "JPEG"])
+    def test_dimensions(self, fmt):
+        from api.services.mediainfo import parse
+
+        buf = io.BytesIO()
+        Image.new("RGB", (641, 359)).save(buf, format=fmt)
+        info = parse(buf.getvalue())
+
+        assert info.format == fmt.lower()
+        assert (info.width, info.height) == (641, 359)
+        assert info.duration is None
+
+
+class TestMp4:
+    @pytest.mark.parametrize("faststart", [True, False])
+    def test_duration_and_video_size_from_file(self, faststart, tmp_path):
+        """Le o moov antes ou depois do mdat, em bytes ou em arquivo."""
+        from api.services.mediainfo import parse
+
+        path = tmp_path / "video.mp4"
+        path.write_bytes(_mp4(12_500, faststart=faststart))
+
+        info = parse(str(path))
+        assert (info.duration, info.width, info.height) == (12.5, 1920, 1080)
+        assert parse(path.read_bytes()) == info
+
+    def test_fragmented_mp4_has_no_duration(self):
+        from api.services.mediainfo import parse
+
+        assert parse(_mp4(0)) is None
+
+
+class TestGetDuration:
+    @pytest.mark.asyncio
+    @patch("api.services.mediainfo.run_media", new_callable=AsyncMock)
+    async def test_parsed_without_ffprobe(self, mock_run):
+        from api.services.mediainfo import get_duration
+
+        assert await get_duration(MP3_FRAME * 50) == pytest.approx(50 * 1152 / 44100)
+        mock_run.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("api.services.mediainfo.run_media", new_callable=AsyncMock, return_value="3.5\n")
+    async def test_unknown_format_falls_back_to_ffprobe(self, mock_run):
+        """Formatos nao reconhecidos vao para o ffprobe, via arquivo temporario se vierem em bytes."""
+        import os
+        from api.services.mediainfo import get_duration
+
+        assert await get_duration(b"RIFF" + bytes(100)) == 3.5
+
+        path = mock_run.call_args[0][0][-1]
+        assert mock_run.call_args[0][0][0] == "ffprobe"
+        assert not os.path.exists(path)
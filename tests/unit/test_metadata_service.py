@@ -76,13 +76,11 @@ class TestGenerateMetadata:
         assert title_records[2]["title_text"] == VALID_METADATA["titles"][2]
 
         # Verify story metadata updated
-        mock_story_repo.update_story.assert_called_once_with(
+        mock_story_repo.update_metadata.assert_called_once_with(
             "story-1",
             {
-                "metadata": {
-                    "description": VALID_METADATA["description"],
-                    "tags": VALID_METADATA["tags"],
-                }
+                "description": VALID_METADATA["description"],
+                "tags": VALID_METADATA["tags"],
             },
         )
 
@@ -0,0 +1,89 @@
+"""Testes unitarios para api.services.mp3."""
+
+from __future__ import annotations
+
+import struct
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono (as TTS returns): 96-byte frames
+MONO_24K = bytes([0xFF, 0xF3, 0x44, 0xC4])
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames
+STEREO_44K = bytes([0xFF, 0xFB, 0x90, 0x04])
+
+
+def _frames(header: bytes, count: int, fill: int) -> bytes:
+    from api.services.mp3 import frame_at
+
+    length = frame_at(header, 0).length
+    return (header + bytes([fill]) * (length - 4)) * count
+
+
+def _tts_part(count: int, fill: int) -> bytes:
+    """ID3 + frame Info com a contagem + frames de audio, como um encoder LAME grava."""
+    info = bytearray(_frames(MONO_24K, 1, 0))
+    info[4 + 9:4 + 9 + 12] = b"Info" + struct.pack(">II", 1, count)
+    return b"ID3\x04\x00\x00\x00\x00\x00\x0a" + bytes(10) + bytes(info) + _frames(MONO_24K, count, fill)
+
+
+class TestJoin:
+    def test_strips_tags_and_vbr_headers(self):
+        """Somente os frames de audio de cada parte entram no resultado, em ordem."""
+        from api.services.mp3 import join
+
+        joined = join([_tts_part(3, 1), _tts_part(2, 2)])
+
+        assert joined == _frames(MONO_24K, 3, 1) + _frames(MONO_24K, 2, 2)
+
+    def test_duration_of_joined_parts(self):
+        from api.services.mediainfo import parse
+        from api.services.mp3 import join
+
+        info = parse(join([_tts_part(50, 1), _tts_part(25, 2)]))
+
+        assert info.duration == pytest.approx(75 * 576 / 24000)
+
+    def test_different_stream_parameters_do_not_join(self):
+        from api.services.mp3 import join
+
+        assert join([_tts_part(3, 1), _frames(STEREO_44K, 3, 1)]) is None
+        assert join([_tts_part(3, 1), b"not audio"]) is None
+
+
+class TestConcat:
+    @pytest.mark.asyncio
+    @patch("api.services.mp3.run_media", new_callable=AsyncMock)
+    async def test_common_path_runs_no_ffmpeg(self, mock_run):
+        from api.services.mp3 import concat
+
+        assert await concat([_tts_part(3, 1), _tts_part(3, 2)]) == _frames(MONO_24K, 3, 1) + _frames(MONO_24K, 3, 2)
+        mock_run.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("api.services.mp3.run_media", new_callable=AsyncMock)
+    async def test_mixed_parts_fall_back_to_ffmpeg(self, mock_run):
+        """Partes com parametros diferentes sao unidas pelo concat do ffmpeg."""
+        from api.services.mp3 import concat
+
+        async def write_output(cmd):
+            with open(cmd[-1], "wb") as f:
+                f.write(b"combined")
+        mock_run.side_effect = write_output
+
+        assert await concat([_tts_part(3, 1), _frames(STEREO_44K, 3, 1)]) == b"combined"
+        assert mock_run.call_args[0][0][:4] == ["ffmpeg", "-y", "-f", "concat"]
+
+    @pytest.mark.asyncio
+    @patch("api.services.mp3.run_media", new_callable=AsyncMock)
+    async def test_concat_files_writes_joined_frames(self, mock_run, tmp_path):
+        from api.services.mp3 import concat_files
+
+        paths = []
+        for i in range(3):
+            paths.append(tmp_path / f"scene_{i}.mp3")
+            paths[-1].write_bytes(_tts_part(2, i))
+        await concat_files([str(p) for p in paths], str(tmp_path / "narration.mp3"))
+
+        assert (tmp_path / "narration.mp3").read_bytes() == b"".join(_frames(MONO_24K, 2, i) for i in range(3))
+        mock_run.assert_not_called()
@@ -0,0 +1,99 @@
+"""Testes unitarios para api.services.music."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Diretorio de musicas isolado, com o cache em memoria zerado."""
+    from api.services import music
+
+    with patch.object(music, "MUSIC_DIR", tmp_path), \
+         patch.object(music, "_library", []), \
+         patch.object(music, "_signature", ()):
+        yield tmp_path
+
+
+class TestGetLibrary:
+    @pytest.mark.asyncio
+    async def test_index_written_and_reused(self, library):
+        """A analise roda uma vez por arquivo; depois o indice sidecar e reaproveitado."""
+        from api.services import music
+
+        (library / "a.mp3").write_bytes(b"a" * 10)
+        (library / "notes.txt").write_text("ignored")
+        analyze = AsyncMock(return_value={"lufs": -20.0, "duration": 120.0})
+
+        with patch.object(music, "_analyze", analyze):
+            tracks = await music.get_library()
+            music._signature = ()  # force a rescan, as after a restart
+            await music.get_library()
+
+        assert analyze.await_count == 1
+        assert [t.lufs for t in tracks] == [-20.0]
+        index = json.loads((library / music.INDEX_FILE).read_text())
+        assert index["tracks"]["a.mp3"]["duration"] == 120.0
+
+    @pytest.mark.asyncio
+    async def test_only_changed_files_reanalyzed(self, library):
+        from api.services import music
+
+        (library / "a.mp3").write_bytes(b"a" * 10)
+        (library / "b.mp3").write_bytes(b"b" * 10)
+        analyze = AsyncMock(return_value={"lufs": -20.0, "duration": 120.0})
+
+        with patch.object(music, "_analyze", analyze):
+            await music.get_library()
+            (library / "b.mp3").write_bytes(b"b" * 20)
+            tracks = await music.get_library()
+
+        assert analyze.await_count == 3
+        assert analyze.await_args[0][0].endswith("b.mp3")
+        assert len(tracks) == 2
+
+
+class TestPickTrack:
+    @pytest.mark.asyncio
+    async def test_prefers_tracks_that_do_not_loop(self):
+        from api.services import music
+        from api.services.music import MusicTrack
+
+        short = MusicTrack("/m/short.mp3", 30.0, -14.0)
+        long = MusicTrack("/m/long.mp3", 600.0, -14.0)
+        with patch.object(music, "get_library", AsyncMock(return_value=[short, long])):
+            picks = {await music.pick_track(f"story-{i}", 120.0) for i in range(5)}
+
+        assert picks == {long}
+
+    @pytest.mark.asyncio
+    async def test_empty_library_means_no_music(self):
+        from api.services import music
+
+        with patch.object(music, "get_library", AsyncMock(return_value=[])):
+            assert await music.pick_track("story-1", 60.0) is None
+
+
+class TestMixFilter:
+    def test_gain_from_indexed_loudness(self):
+        """O ganho vem do LUFS indexado: faixa mais alta recebe mais atenuacao."""
+        from api.services.music import MusicTrack
+
+        quiet = MusicTrack("/m/q.mp3", 60.0, -24.0)
+        loud = MusicTrack("/m/l.mp3", 60.0, -12.0)
+
+        assert loud.gain_db == pytest.approx(quiet.gain_db - 12.0)
+
+    def test_ducks_music_under_narration(self):
+        from api.services.music import MusicTrack, mix_filter
+
+        graph = mix_filter("[1:a]", "[2:a]", MusicTrack("/m/a.mp3", 60.0, -14.0), 90.0)
+
+        assert graph.startswith("[1:a]asplit=2")
+        assert "[bed][key]sidechaincompress" in graph
+        assert "afade=t=out:st=87.000" in graph
+        assert graph.endswith("amix=inputs=2:duration=first:normalize=0[a]")
@@ -106,6 +106,15 @@ class TestCreateThumbnailOption:
         assert result["image_url"] == "https://storage.example.com/thumb1.jpg"
 
 
+class TestUpdateThumbnailOption:
+    def test_returns_updated_thumbnail(self, mock_supabase):
+        mock_supabase.set_response("thumbnail_options", [{"id": "th-1", "preview_url": "https://example.com/1.webp"}])
+        from api.db.repositories import options_repo
+
+        result = options_repo.update_thumbnail_option("th-1", {"preview_url": "https://example.com/1.webp"})
+        assert result["preview_url"] == "https://example.com/1.webp"
+
+
 class TestGetThumbnailOptions:
     def test_returns_all_thumbnail_options(self, mock_supabase):
         thumbs = [
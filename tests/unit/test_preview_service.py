@@ -0,0 +1,108 @@
+"""Testes unitarios para api.services.preview."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+
+class TestPreviewCommand:
+    def test_scales_short_side_and_caps_bitrate(self):
+        from api.services.preview import _preview_cmd
+
+        cmd = _preview_cmd("/t/in.mp4", "/t/out.mp4")
+
+        assert cmd[cmd.index("-vf") + 1] == "scale='if(gt(iw,ih),-2,480)':'if(gt(iw,ih),480,-2)',setsar=1"
+        assert cmd[cmd.index("-maxrate") + 1] == "700k"
+        assert cmd[cmd.index("-movflags") + 1] == "+faststart"
+
+
+class TestWebpPreview:
+    def test_downscales_to_preview_width(self, tmp_path):
+        """A thumbnail 1408x768 vira WebP de 640 px de largura, na mesma proporcao."""
+        from api.services.preview import _webp_preview
+
+        src = tmp_path / "thumb.png"
+        Image.new("RGB", (1408, 768), "red").save(src)
+
+        data = _webp_preview(str(src))
+
+        out = tmp_path / "thumb.webp"
+        out.write_bytes(data)
+        with Image.open(out) as img:
+            assert img.format == "WEBP"
+            assert img.size == (640, 349)
+
+
+class TestGenerateVideoPreview:
+    @pytest.mark.asyncio
+    @patch("api.services.preview.story_repo")
+    @patch("api.services.preview.upload_path", return_value="https://storage/s.preview.mp4")
+    @patch("api.services.preview.run_media", new_callable=AsyncMock)
+    @patch("api.services.preview.download_file", side_effect=lambda url, dest: dest)
+    async def test_uploads_and_stores_preview_url(self, mock_download, mock_run, mock_upload, mock_repo):
+        from api.services.preview import generate_video_preview
+
+        mock_repo.get_story.return_value = {"id": "s", "video_url": "https://storage/s.draft.mp4"}
+
+        url = await generate_video_preview("s")
+
+        assert url == "https://storage/s.preview.mp4"
+        assert mock_upload.call_args[0][1].startswith("s/s.preview.")
+        mock_repo.update_story.assert_called_once_with("s", {"preview_video_url": url})
+
+    @pytest.mark.asyncio
+    @patch("api.services.preview.remove_objects")
+    @patch("api.services.preview.story_repo")
+    @patch("api.services.preview.upload_path", side_effect=lambda bucket, path, *a: f"https://x/object/public/videos/{path}")
+    @patch("api.services.preview.run_media", new_callable=AsyncMock)
+    @patch("api.services.preview.download_file", side_effect=lambda url, dest: dest)
+    async def test_new_proxy_gets_new_path(self, mock_download, mock_run, mock_upload, mock_repo, mock_remove):
+        """Depois de regenerar, o proxy novo tem outra URL (nada de copia antiga no CDN) e o anterior e apagado."""
+        from api.services.preview import generate_video_preview
+
+        previous = "https://x/object/public/videos/s/s.preview.aaa.mp4"
+        mock_repo.get_story.return_value = {
+            "id": "s", "video_url": "https://x/object/public/videos/s/s.draft.r2.mp4", "preview_video_url": previous,
+        }
+
+        url = await generate_video_preview("s")
+
+        assert url != previous
+        assert mock_download.call_args[0][0].endswith("s.draft.r2.mp4")
+        mock_remove.assert_called_once_with("videos", ["s/s.preview.aaa.mp4"])
+
+    @pytest.mark.asyncio
+    @patch("api.services.preview.story_repo")
+    @patch("api.services.preview.run_media", new_callable=AsyncMock, side_effect=RuntimeError("ffmpeg crashed"))
+    @patch("api.services.preview.download_file", side_effect=lambda url, dest: dest)
+    async def test_failure_is_not_fatal(self, mock_download, mock_run, mock_repo):
+        """Sem proxy, a revisao usa o video completo: a falha so e registrada."""
+        from api.services.preview import generate_video_preview
+
+        mock_repo.get_story.return_value = {"id": "s", "video_url": "https://storage/s.mp4"}
+
+        assert await generate_video_preview("s") is None
+        mock_repo.update_story.assert_not_called()
+
+
+class TestGenerateThumbnailPreviews:
+    @pytest.mark.asyncio
+    @patch("api.services.preview.options_repo")
+    @patch("api.services.preview.upload_file", return_value="https://storage/p.webp")
+    @patch("api.services.preview._webp_preview", return_value=b"webp")
+    @patch("api.services.preview.os.unlink")
+    @patch("api.services.preview.download_to_temp", return_value="/tmp/t.png")
+    async def test_only_options_without_preview(self, mock_download, mock_unlink, mock_webp, mock_upload, mock_repo):
+        from api.services.preview import generate_thumbnail_previews
+
+        mock_repo.get_thumbnail_options.return_value = [
+            {"id": "t1", "image_url": "https://x/1.png"},
+            {"id": "t2", "image_url": "https://x/2.png", "preview_url": "https://x/2.webp"},
+        ]
+
+        assert await generate_thumbnail_previews("s") == 1
+        assert mock_upload.call_args[0][1:] == ("s/preview_t1.webp", b"webp", "image/webp")
+        mock_repo.update_thumbnail_option.assert_called_once_with("t1", {"preview_url": "https://storage/p.webp"})
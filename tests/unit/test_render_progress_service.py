@@ -0,0 +1,52 @@
+"""Testes unitarios para api.services.render_progress."""
+
+from __future__ import annotations
+
+from api.services import render_progress
+
+
+class TestRenderProgress:
+    def test_unknown_story_has_no_progress(self):
+        assert render_progress.get_progress("never-rendered") is None
+
+    def test_aggregates_active_and_finished_jobs(self):
+        """Frames de jobs concluidos e em andamento somam; fps dos ativos gera o ETA."""
+        render_progress.start_render("story-p1", 300, "clips")
+        render_progress.finish_job("story-p1", "clip_000", 100, 2.0)
+        render_progress.job_progress("story-p1", "clip_001")({"frame": "50", "fps": "25.0", "progress": "continue"})
+        render_progress.job_progress("story-p1", "clip_002")({"frame": "N/A", "fps": "N/A", "progress": "continue"})
+
+        progress = render_progress.get_progress("story-p1")
+
+        assert progress["status"] == "running"
+        assert progress["frame"] == 150
+        assert progress["percent"] == 50.0
+        assert progress["fps"] == 25.0
+        assert progress["speed"] == 1.0
+        assert progress["eta_seconds"] == 6.0
+
+    def test_summary_keeps_per_clip_timing(self):
+        render_progress.start_render("story-p2", 150, "clips")
+        render_progress.finish_job("story-p2", "clip_000", 100, 4.0)
+        render_progress.finish_job("story-p2", "clip_001", 50, 0.01, cached=True)
+        render_progress.finish_render("story-p2")
+
+        summary = render_progress.get_summary("story-p2")
+        progress = render_progress.get_progress("story-p2")
+
+        assert summary["engine"] == "clips"
+        assert summary["jobs"][0] == {"job": "clip_000", "frames": 100, "seconds": 4.0, "fps": 25.0, "cached": False}
+        assert summary["jobs"][1]["cached"] is True
+        assert summary["jobs"][1]["fps"] is None
+        assert progress["status"] == "done"
+        assert progress["frame"] == 150
+        assert progress["eta_seconds"] is None
+
+    def test_total_set_once_timeline_known(self):
+        render_progress.start_render("story-p3", 0, "clips")
+        assert render_progress.get_progress("story-p3")["percent"] == 0.0
+
+        render_progress.set_total_frames("story-p3", 200)
+        render_progress.finish_job("story-p3", "clip_000", 50, 1.0)
+
+        assert render_progress.get_progress("story-p3")["percent"] == 25.0
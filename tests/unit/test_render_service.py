@@ -0,0 +1,828 @@
+"""Testes unitarios para api.services.render."""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+def _timeline(*durations: float):
+    from api.services.timeline import build_timeline
+
+    return build_timeline([
+        {"id": f"scene-{i}", "duration_seconds": d} for i, d in enumerate(durations)
+    ])
+
+
+def _done(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+@pytest.fixture(autouse=True)
+def clip_slots():
+    """Cada teste roda em outro event loop e com outro _clip_workers: slots novos."""
+    from api.services import render
+
+    render._clip_slots = None
+    yield
+    render._clip_slots = None
+
+
+# ── Tests: _zoompan_filter ────────────────────────────────────────────────────
+
+
+class TestZoompanFilter:
+    @pytest.mark.parametrize("effect", ["zoom_in", "zoom_out", "pan_left", "pan_right"])
+    def test_filter_scales_crops_and_zooms(self, effect):
+        """Cada efeito gera scale + crop + zoompan na resolucao pedida."""
+        from api.services.render import _zoompan_filter
+
+        vf = _zoompan_filter(effect, 125, 1920, 1080)
+
+        assert vf.startswith("scale=1920:1080:force_original_aspect_ratio=increase,crop=1920:1080,zoompan=")
+        assert "d=125" in vf
+        assert "s=1920x1080" in vf
+
+
+# ── Tests: render profiles ────────────────────────────────────────────────────
+
+
+class TestRenderProfiles:
+    @pytest.mark.parametrize("aspect, expected", [("16:9", "960x540"), ("9:16", "540x960")])
+    def test_draft_resolution_follows_aspect(self, aspect, expected):
+        from api.services.render import get_profile
+
+        assert get_profile("draft").resolution(aspect) == expected
+
+    def test_final_is_full_hd(self):
+        from api.services.render import get_profile
+
+        assert get_profile("final").resolution("16:9") == "1920x1080"
+        assert get_profile("final").resolution("9:16") == "1080x1920"
+
+    def test_unknown_profile_raises(self):
+        from api.services.render import get_profile
+
+        with pytest.raises(ValueError, match="Unknown render profile"):
+            get_profile("preview")
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_profile_sets_encoder_quality(self, mock_run):
+        """O perfil define preset, CRF e bitrate de audio do encode."""
+        from api.services.render import _render_single_pass, get_profile
+
+        await _render_single_pass(
+            "story-1", ["/tmp/a.png"], "/tmp/n.mp3", "/tmp/out.mp4", _timeline(2.0), "960x540",
+            profile=get_profile("draft"),
+        )
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-preset") + 1] == "ultrafast"
+        assert cmd[cmd.index("-crf") + 1] == "30"
+        assert cmd[cmd.index("-b:a") + 1] == "96k"
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.os.remove")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render._restore_cached_clip", return_value=False)
+    @patch("api.services.render._apply_ken_burns")
+    async def test_clip_cache_key_depends_on_profile(self, mock_kb, mock_restore, mock_cache, mock_remove, tmp_path):
+        """Clipes de rascunho e finais nao compartilham entradas de cache."""
+        from api.services import render
+
+        keys = []
+        with patch.object(render, "clip_key", side_effect=lambda *args: keys.append(args[-1]) or "key"):
+            for name in ("draft", "final"):
+                await render._encode_clips(
+                    "story-1", _timeline(2.0), [_done("/tmp/a.png")], str(tmp_path), "1920x1080",
+                    render.get_profile(name),
+                )
+
+        assert keys[0] != keys[1]
+
+    @pytest.mark.asyncio
+    @patch("api.services.render._apply_ken_burns")
+    async def test_probe_encodes_middle_of_scenes(self, mock_kb, tmp_path):
+        """O probe da politica de encoding codifica uma janela do meio das cenas e soma os bytes."""
+        from api.services import encoding, render
+
+        async def write_clip(img, clip_path, *args, **kwargs):
+            with open(clip_path, "wb") as f:
+                f.write(b"x" * 10)
+        mock_kb.side_effect = write_clip
+
+        probe = render._probe_encoder({0: _done("/tmp/a.png"), 1: _done("/tmp/b.png")}, str(tmp_path), "1920x1080")
+        size = await probe(render.FINAL, _timeline(8.0, 8.0))
+
+        assert size == 20
+        assert all(c.kwargs["max_frames"] == encoding.PROBE_FRAMES for c in mock_kb.call_args_list)
+        assert all(c.kwargs["start_frame"] == (200 - encoding.PROBE_FRAMES) // 2 for c in mock_kb.call_args_list)
+        assert list(tmp_path.iterdir()) == []
+
+
+# ── Tests: _render_single_pass ────────────────────────────────────────────────
+
+
+class TestRenderSinglePass:
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_single_ffmpeg_call_with_all_inputs(self, mock_run):
+        """Todas as imagens e a narracao entram em um unico comando ffmpeg."""
+        from api.services.render import _render_single_pass
+
+        images = ["/tmp/a.png", "/tmp/b.png", "/tmp/c.png"]
+        await _render_single_pass("story-1", images, "/tmp/narration.mp3", "/tmp/out.mp4", _timeline(4.0, 4.0, 4.0), "1920x1080")
+
+        mock_run.assert_called_once()
+        cmd = mock_run.call_args[0][0]
+        inputs = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-i"]
+        assert inputs == images + ["/tmp/narration.mp3"]
+
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        assert graph.count("zoompan=") == 3
+        assert "[v0][v1][v2]concat=n=3:v=1:a=0[v]" in graph
+        assert cmd[cmd.index("-map") + 1] == "[v]"
+        assert "3:a" in cmd
+        assert cmd[-1] == "/tmp/out.mp4"
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_effects_cycle_per_scene(self, mock_run):
+        """Os efeitos Ken Burns seguem o mesmo ciclo do modo por clipes."""
+        from api.services.render import _render_single_pass
+
+        await _render_single_pass("story-1", ["/tmp/a.png"] * 5, "/tmp/n.mp3", "/tmp/out.mp4", _timeline(*[2.0] * 5), "1080x1920")
+
+        graph = mock_run.call_args[0][0][mock_run.call_args[0][0].index("-filter_complex") + 1]
+        chains = graph.split(";")[:5]
+        assert "min(zoom+0.0015,1.5)" in chains[0]      # zoom_in
+        assert "+((on/50)" in chains[1]                   # pan_right
+        assert "lte(zoom,1.0)" in chains[2]               # zoom_out
+        assert "-((on/50)" in chains[3]                   # pan_left
+        assert "min(zoom+0.0015,1.5)" in chains[4]       # ciclo reinicia
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_each_scene_gets_its_own_length(self, mock_run):
+        """Cada cadeia usa o numero de frames da propria cena."""
+        from api.services.render import _render_single_pass
+
+        await _render_single_pass("story-1", ["/tmp/a.png", "/tmp/b.png"], "/tmp/n.mp3", "/tmp/out.mp4", _timeline(2.0, 5.5), "1920x1080")
+
+        cmd = mock_run.call_args[0][0]
+        chains = cmd[cmd.index("-filter_complex") + 1].split(";")
+        assert "d=50:" in chains[0]
+        assert "d=138:" in chains[1]
+        assert cmd[cmd.index("-t") + 1] == str(188 / 25)
+
+
+# ── Tests: _clip_workers / _render_clips ──────────────────────────────────────
+
+
+class TestClipWorkers:
+    def test_configured_value_wins(self):
+        """render_workers > 0 ignora a cota de CPU."""
+        from api.services import render
+
+        with patch.object(render, "RENDER_WORKERS", 3), \
+             patch.object(render, "_cpu_quota", return_value=16.0):
+            assert render._clip_workers() == 3
+
+    def test_derived_from_cpu_quota(self):
+        """Auto: cota de CPU dividida pelas threads de cada ffmpeg."""
+        from api.services import render
+
+        with patch.object(render, "RENDER_WORKERS", 0), \
+             patch.object(render, "FFMPEG_THREADS", 2), \
+             patch.object(render, "_cpu_quota", return_value=16.0):
+            assert render._clip_workers() == 8
+
+    def test_at_least_one_worker(self):
+        from api.services import render
+
+        with patch.object(render, "RENDER_WORKERS", 0), \
+             patch.object(render, "FFMPEG_THREADS", 4), \
+             patch.object(render, "_cpu_quota", return_value=0.5):
+            assert render._clip_workers() == 1
+
+
+class TestFramePipe:
+    def test_inflight_frames_follow_resolution(self):
+        """O buffer e medido em bytes de quadros rgb24, nao em workers."""
+        from api.services import render
+
+        with patch.object(render, "RENDER_FRAME_BUFFER_MB", 512):
+            assert render._inflight_frames(1920, 1080) == 86
+            assert render._inflight_frames(960, 540) == 345
+            assert render._inflight_frames(7680, 4320) == render.FRAMES_PER_TASK
+
+    @pytest.mark.asyncio
+    async def test_window_bounded_in_frames(self):
+        from api.services import render
+
+        submitted = []
+
+        def fake_render(img_path, effect, frames, w, h, start, stop):
+            submitted.append(stop - start)
+            return b"f" * (stop - start)
+
+        peak = 0
+
+        async def consume(cmd, chunks, progress=None):
+            nonlocal peak
+            written = 0
+            async for chunk in chunks:
+                peak = max(peak, sum(submitted) - written)
+                written += len(chunk)
+
+        with patch.object(render, "ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers)), \
+             patch.object(render.kenburns, "render_frames", fake_render), \
+             patch.object(render, "run_media_streaming", consume), \
+             patch.object(render, "_clip_workers", return_value=8), \
+             patch.object(render, "_inflight_frames", return_value=25):
+            await render._render_frame_pipe(
+                "story-1", {0: _done("/a.png"), 1: _done("/b.png")}, "/n.mp3", "/out.mp4",
+                _timeline(4.0, 4.0), "1920x1080",
+            )
+
+        assert sum(submitted) == 200
+        assert peak <= 25
+
+
+class TestEncodeClips:
+    @pytest.mark.asyncio
+    @patch("api.services.render.os.remove")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render.clip_key", return_value="key")
+    @patch("api.services.render._restore_cached_clip", return_value=False)
+    @patch("api.services.render._apply_ken_burns")
+    async def test_clips_returned_in_scene_order(
+        self, mock_kb, mock_restore, mock_key, mock_cache, mock_remove, tmp_path
+    ):
+        """Mesmo com encodes concorrentes, os clipes voltam na ordem das cenas."""
+        from api.services import render
+
+        images = [_done(f"/tmp/scene_{i:03d}.png") for i in range(6)]
+        with patch.object(render, "_clip_workers", return_value=4):
+            clips = await render._encode_clips("story-1", _timeline(*[2.0] * 6), images, str(tmp_path), "1920x1080")
+
+        assert clips == [str(tmp_path / f"clip_{i:03d}.mp4") for i in range(6)]
+        assert mock_kb.call_count == 6
+        effects = {c[0][0]: c[0][3] for c in mock_kb.call_args_list}
+        assert effects["/tmp/scene_000.png"] == "zoom_in"
+        assert effects["/tmp/scene_001.png"] == "pan_right"
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.os.remove")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render.clip_key", return_value="key")
+    @patch("api.services.render._restore_cached_clip", return_value=False)
+    @patch("api.services.render._apply_ken_burns")
+    async def test_clip_length_follows_scene_duration(
+        self, mock_kb, mock_restore, mock_key, mock_cache, mock_remove, tmp_path
+    ):
+        """O clipe de cada cena usa a duracao armazenada, nao uma media."""
+        from api.services import render
+
+        images = [_done("/tmp/a.png"), _done("/tmp/b.png")]
+        await render._encode_clips("story-1", _timeline(3.0, 7.2), images, str(tmp_path), "1920x1080")
+
+        frames = {c[0][0]: c[0][2] for c in mock_kb.call_args_list}
+        assert frames == {"/tmp/a.png": 75, "/tmp/b.png": 180}
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.os.remove")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render._apply_ken_burns")
+    async def test_cached_clips_are_not_reencoded(self, mock_kb, mock_cache, mock_remove, tmp_path):
+        """Clipes presentes no cache sao reaproveitados; so os misses sao codificados."""
+        from api.services import render
+
+        images = []
+        for i in range(3):
+            img = tmp_path / f"scene_{i}.png"
+            img.write_bytes(f"image-{i}".encode())
+            images.append(_done(str(img)))
+
+        cached = tmp_path / "cached.mp4"
+        cached.write_bytes(b"clip")
+        mock_cache.return_value.get.side_effect = [str(cached), None, str(cached)]
+
+        clips_dir = tmp_path / "clips"
+        clips_dir.mkdir()
+        with patch.object(render, "_clip_workers", return_value=1):
+            await render._encode_clips("story-1", _timeline(2.0, 2.0, 2.0), images, str(clips_dir), "1920x1080")
+
+        mock_kb.assert_called_once()
+        assert mock_kb.call_args[0][0] == str(tmp_path / "scene_1.png")
+        mock_cache.return_value.put.assert_called_once()
+        assert (clips_dir / "clip_000.mp4").read_bytes() == b"clip"
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.os.remove")
+    @patch("api.services.render._apply_ken_burns")
+    async def test_clips_restored_from_bucket_tier_on_another_instance(self, mock_kb, mock_remove, tmp_path):
+        """Com clip_cache_bucket, outra instancia (cache local vazio) reaproveita os clipes sem codificar."""
+        from api.services import render
+        from api.services.cache import DiskCache
+
+        images = []
+        for i in range(2):
+            img = tmp_path / f"scene_{i}.png"
+            img.write_bytes(f"image-{i}".encode())
+            images.append(_done(str(img)))
+        cache = DiskCache(str(tmp_path / "cache"), 10 * 1024 * 1024, bucket="render-cache", prefix="clip-cache/")
+
+        clips_dir = tmp_path / "clips"
+        clips_dir.mkdir()
+        with patch.object(render, "get_clip_cache", return_value=cache), \
+             patch("api.services.cache.download_object", return_value=b"clip") as mock_download:
+            await render._encode_clips("story-1", _timeline(2.0, 2.0), images, str(clips_dir), "1920x1080")
+
+        mock_kb.assert_not_called()
+        assert mock_download.call_args[0][0] == "render-cache"
+        assert (clips_dir / "clip_001.mp4").read_bytes() == b"clip"
+
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.os.remove")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render.clip_key", return_value="key")
+    @patch("api.services.render._restore_cached_clip", return_value=False)
+    async def test_failed_clip_cancels_running_encodes(self, mock_restore, mock_key, mock_cache, mock_remove, tmp_path):
+        """Se um clipe falha, os encodes ainda em andamento sao cancelados."""
+        import asyncio
+
+        from api.services import render
+
+        cancelled, running = [], set()
+        both_running = asyncio.Event()
+
+        async def encode(input_path, *args, **kwargs):
+            if input_path.endswith("bad.png"):
+                # Fail only once the other two encodes are past the cache lookups and running
+                await both_running.wait()
+                raise RuntimeError("ffmpeg failed")
+            running.add(input_path)
+            if len(running) == 2:
+                both_running.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(input_path)
+                raise
+
+        images = [_done("/tmp/a.png"), _done("/tmp/bad.png"), _done("/tmp/c.png")]
+        with patch.object(render, "_apply_ken_burns", side_effect=encode), \
+             patch.object(render, "_clip_workers", return_value=3):
+            with pytest.raises(RuntimeError, match="ffmpeg failed"):
+                await render._encode_clips("story-1", _timeline(2.0, 2.0, 2.0), images, str(tmp_path), "1920x1080")
+
+        assert sorted(cancelled) == ["/tmp/a.png", "/tmp/c.png"]
+
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.os.remove")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render.clip_key", return_value="key")
+    @patch("api.services.render._restore_cached_clip", return_value=False)
+    async def test_concurrent_renders_share_the_worker_bound(
+        self, mock_restore, mock_key, mock_cache, mock_remove, tmp_path
+    ):
+        """Duas renderizacoes ao mesmo tempo nao passam do limite de encodes do processo."""
+        import asyncio
+
+        from api.services import render
+
+        running, peak = 0, 0
+
+        async def encode(*args, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        images = [_done(f"/tmp/{i}.png") for i in range(4)]
+        with patch.object(render, "_apply_ken_burns", side_effect=encode), \
+             patch.object(render, "_clip_workers", return_value=2):
+            await asyncio.gather(
+                render._encode_clips("story-1", _timeline(*[2.0] * 4), images, str(tmp_path), "1920x1080"),
+                render._encode_clips("story-2", _timeline(*[2.0] * 4), images, str(tmp_path), "1920x1080"),
+            )
+
+        assert peak == 2
+
+
+class TestPrepareClip:
+    STORY = {"id": "story-1", "aspect_ratio": "16:9", "languages": ["en-US"]}
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render._apply_ken_burns")
+    @patch("api.services.render.download_file", side_effect=lambda url, dest: dest)
+    async def test_key_matches_the_render(self, mock_download, mock_kb, mock_cache, tmp_path):
+        """O clipe preparado cedo tem a mesma chave que o render usaria para a cena."""
+        from api.services import render
+
+        mock_cache.return_value.get.return_value = None
+        scenes = [{"id": f"s{i}", "image_url": "u", "duration_seconds": d} for i, d in enumerate([3.3, 4.7, 5.1])]
+        keys = []
+        with patch.object(render, "clip_key", side_effect=lambda *args: keys.append(args[1:]) or "key"), \
+             patch.object(render, "RENDER_ENGINE", "clips"):
+            await render.prepare_clip(self.STORY, scenes[2], 2)
+            with patch.object(render, "_restore_cached_clip", return_value=True), patch.object(render.os, "remove"):
+                await render._encode_clips(
+                    "story-1", _timeline(3.3, 4.7, 5.1), [_done("/tmp/a.png")] * 3, str(tmp_path),
+                    "960x540", render.get_profile("draft"),
+                )
+
+        assert keys[0] == keys[-1]
+        mock_cache.return_value.put.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.clip_key", return_value="key")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render._apply_ken_burns")
+    @patch("api.services.render.download_file", side_effect=lambda url, dest: dest)
+    async def test_cached_clip_is_not_encoded_again(self, mock_download, mock_kb, mock_cache, mock_key):
+        from api.services import render
+
+        mock_cache.return_value.get.return_value = "/cache/key.mp4"
+        with patch.object(render, "RENDER_ENGINE", "clips"):
+            prepared = await render.prepare_clip(
+                self.STORY, {"id": "s0", "image_url": "u", "duration_seconds": 3.0}, 0,
+            )
+
+        assert prepared is False
+        mock_kb.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.clip_key", return_value="key")
+    @patch("api.services.render.get_clip_cache")
+    @patch("api.services.render._apply_ken_burns")
+    @patch("api.services.render.download_file", side_effect=lambda url, dest: dest)
+    async def test_multi_language_clip_uses_longest_narration(self, mock_download, mock_kb, mock_cache, mock_key):
+        from api.services import render
+
+        mock_cache.return_value.get.return_value = None
+        story = {**self.STORY, "languages": ["en-US", "pt-BR"]}
+        scene = {
+            "id": "s0", "image_url": "u", "duration_seconds": 3.0,
+            "translated_audio": {"pt-BR": {"audio_url": "a", "duration_seconds": 4.0}},
+        }
+        with patch.object(render, "RENDER_ENGINE", "clips"):
+            await render.prepare_clip(story, scene, 0)
+
+        assert mock_kb.call_args[0][2] == 100
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.download_file")
+    async def test_other_engines_skip(self, mock_download):
+        from api.services import render
+
+        with patch.object(render, "RENDER_ENGINE", "filtergraph"):
+            assert await render.prepare_clip(self.STORY, {"id": "s0"}, 0) is False
+
+        mock_download.assert_not_called()
+
+
+class TestAssembleClips:
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_video_is_stream_copied(self, mock_run, tmp_path):
+        """A montagem final copia o video dos clipes; so o audio e codificado."""
+        from api.services.render import _concat_input, _mux_copied_video
+
+        clips = [str(tmp_path / f"clip_{i:03d}.mp4") for i in range(3)]
+        await _mux_copied_video(_concat_input(clips), "/tmp/n.mp3", "/tmp/out.mp4", 9.0)
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-c:v") + 1] == "copy"
+        assert "libx264" not in cmd
+        assert (tmp_path / "clips_list.txt").read_text().count("file '") == 3
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_music_bed_mixed_in_the_same_encode(self, mock_run, tmp_path):
+        """Com trilha, a musica entra em loop e e mixada no unico encode de audio."""
+        from api.services.music import MusicTrack
+        from api.services.render import _concat_input, _mux_copied_video
+
+        track = MusicTrack(path="/music/bed.mp3", duration=60.0, lufs=-14.0)
+        await _mux_copied_video(_concat_input([str(tmp_path / "clip_000.mp4")]), "/tmp/n.mp3", "/tmp/out.mp4", 9.0, track)
+
+        assert mock_run.call_count == 1
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("/music/bed.mp3") - 3:cmd.index("/music/bed.mp3")] == ["-stream_loop", "-1", "-i"]
+        assert "sidechaincompress" in cmd[cmd.index("-filter_complex") + 1]
+        assert cmd[cmd.index("[a]") - 1] == "-map"
+        assert cmd[cmd.index("-c:v") + 1] == "copy"
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.upload_stream", new_callable=AsyncMock, return_value="https://storage/v.mp4")
+    @patch("api.services.render.run_media_output")
+    async def test_streamed_mux_writes_fragmented_mp4_to_pipe(self, mock_output, mock_upload):
+        """No modo streaming o ffmpeg escreve MP4 fragmentado no pipe e os bytes vao direto para o bucket."""
+        from api.services.render import _stream_copied_video
+
+        url = await _stream_copied_video(["-i", "/t/en.mp4"], "/t/n.mp3", "s/s.mp4", 9.0)
+
+        cmd = mock_output.call_args[0][0]
+        assert cmd[-1] == "pipe:1"
+        assert "empty_moov" in cmd[cmd.index("-movflags") + 1]
+        assert cmd[cmd.index("-c:v") + 1] == "copy"
+        mock_upload.assert_awaited_once_with("videos", "s/s.mp4", mock_output.return_value, "video/mp4")
+        assert url == "https://storage/v.mp4"
+
+    def test_clip_encoder_uses_closed_gops(self):
+        from api.services.encoding import CLIP_ENCODER_ARGS
+
+        assert "+cgop" in CLIP_ENCODER_ARGS
+        assert CLIP_ENCODER_ARGS[CLIP_ENCODER_ARGS.index("-sc_threshold") + 1] == "0"
+
+
+class TestSegmentedRender:
+    def test_windows_split_by_segment_length(self):
+        """Janelas consecutivas com no maximo RENDER_SEGMENT_SECONDS de video."""
+        from api.services import render
+
+        with patch.object(render, "RENDER_SEGMENT_SECONDS", 10.0):
+            windows = render._plan_windows(_timeline(4.0, 4.0, 4.0, 4.0, 12.0), "1920x1080")
+
+        assert [[e.index for e in w] for w in windows] == [[0, 1], [2, 3], [4]]
+
+    def test_windows_split_by_scratch_budget(self):
+        """O orcamento de scratch encurta a janela mesmo abaixo do limite de tempo."""
+        from api.services import render
+
+        per_scene = render._scene_scratch_bytes(_timeline(4.0)[0], "1920x1080")
+        with patch.object(render, "RENDER_SEGMENT_SECONDS", 300.0), \
+             patch.object(render, "RENDER_SCRATCH_MB", 3 * per_scene / (1024 * 1024)):
+            windows = render._plan_windows(_timeline(*[4.0] * 7), "1920x1080")
+
+        assert [len(w) for w in windows] == [3, 3, 1]
+
+    @pytest.mark.asyncio
+    @patch("api.services.render._join_segment", new_callable=AsyncMock)
+    @patch("api.services.render._encode_clips", new_callable=AsyncMock)
+    @patch("api.services.render.download_file", side_effect=lambda url, dest: dest)
+    async def test_images_downloaded_per_window(self, mock_download, mock_encode, mock_join, tmp_path):
+        """Cada janela baixa so as suas imagens e vira um segmento."""
+        from api.services import render
+
+        scenes = [{"id": f"s{i}", "image_url": f"https://x/{i}.png"} for i in range(4)]
+        mock_encode.side_effect = lambda sid, window, images, *args: [f"/c/{e.index}.mp4" for e in window]
+        with patch.object(render, "RENDER_SEGMENT_SECONDS", 8.0), ThreadPoolExecutor(max_workers=1) as pool:
+            segments = await render._render_segmented(
+                "story-1", scenes, _timeline(4.0, 4.0, 4.0, 4.0), pool, str(tmp_path), str(tmp_path), "1920x1080",
+            )
+
+        assert segments == [str(tmp_path / "segment_000.mp4"), str(tmp_path / "segment_001.mp4")]
+        assert [sorted(c[0][2]) for c in mock_encode.call_args_list] == [[0, 1], [2, 3]]
+        assert mock_join.call_args_list[1][0][0] == ["/c/2.mp4", "/c/3.mp4"]
+        assert mock_download.call_count == 4
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_segment_join_copies_and_removes_clips(self, mock_run, tmp_path):
+        from api.services.render import _join_segment
+
+        clips = [tmp_path / f"clip_{i:03d}.mp4" for i in range(2)]
+        for clip in clips:
+            clip.write_bytes(b"x")
+        await _join_segment([str(c) for c in clips], str(tmp_path / "segment_000.mp4"))
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-c") + 1] == "copy"
+        assert not any(c.exists() for c in clips)
+
+
+class TestGatherOrCancel:
+    @pytest.mark.asyncio
+    async def test_failure_cancels_and_awaits_the_rest(self):
+        """Um mux que falha cancela os outros antes de propagar o erro."""
+        import asyncio
+
+        from api.services.render import _gather_or_cancel
+
+        stopped = []
+
+        async def slow(lang):
+            try:
+                await asyncio.sleep(10)
+            finally:
+                stopped.append(lang)
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("upload failed")
+
+        with pytest.raises(RuntimeError, match="upload failed"):
+            await _gather_or_cancel([slow("pt-BR"), failing(), slow("es")])
+
+        assert sorted(stopped) == ["es", "pt-BR"]
+
+
+class TestVideoStoragePath:
+    def test_every_render_gets_its_own_path(self):
+        """Cada renderizacao tem um id proprio: a URL nunca serve a copia antiga do CDN."""
+        from api.services.render import _video_storage_path, get_profile
+
+        draft = get_profile("draft")
+
+        assert _video_storage_path("s", "en-US", ["en-US", "pt-BR"], draft, "r1") == "s/s.draft.r1.mp4"
+        assert _video_storage_path("s", "pt-BR", ["en-US", "pt-BR"], draft, "r1") == "s/s.pt-BR.draft.r1.mp4"
+        assert _video_storage_path("s", "en-US", ["en-US"], get_profile("final"), "r2") == "s/s.r2.mp4"
+
+    @patch("api.services.render.remove_objects")
+    def test_previous_render_removed(self, mock_remove):
+        from api.services.render import _remove_superseded_videos
+
+        base = "https://x/storage/v1/object/public/videos/s"
+        story = {"id": "s", "video_url": f"{base}/s.draft.r1.mp4",
+                 "video_urls": {"en-US": f"{base}/s.draft.r1.mp4", "pt-BR": f"{base}/s.pt-BR.draft.r1.mp4"}}
+
+        _remove_superseded_videos(story, {"en-US": f"{base}/s.r2.mp4", "pt-BR": f"{base}/s.pt-BR.r2.mp4"})
+
+        mock_remove.assert_called_once()
+        assert sorted(mock_remove.call_args[0][1]) == ["s/s.draft.r1.mp4", "s/s.pt-BR.draft.r1.mp4"]
+
+    @patch("api.services.render.remove_objects")
+    def test_first_render_removes_nothing(self, mock_remove):
+        from api.services.render import _remove_superseded_videos
+
+        _remove_superseded_videos({"id": "s", "video_url": None}, {"en-US": "https://x/v.mp4"})
+
+        mock_remove.assert_not_called()
+
+
+class TestMultiLanguage:
+    def test_scene_timed_to_longest_narration(self):
+        """Cada cena dura o maximo entre as narracoes de todos os idiomas."""
+        from api.services.render import _longest_narration
+
+        scenes = [
+            {"id": "s1", "duration_seconds": 4.0, "translated_audio": {"pt-BR": {"audio_url": "u", "duration_seconds": 5.5}}},
+            {"id": "s2", "duration_seconds": 6.0, "translated_audio": {"pt-BR": {"audio_url": "u", "duration_seconds": 5.0}}},
+        ]
+
+        timed = _longest_narration(scenes, ["pt-BR"])
+
+        assert [s["duration_seconds"] for s in timed] == [5.5, 6.0]
+        assert scenes[0]["duration_seconds"] == 4.0
+
+    def test_missing_translated_narration_raises(self):
+        from api.services.render import _longest_narration
+
+        with pytest.raises(ValueError, match="no 'es-ES' narration"):
+            _longest_narration([{"id": "s1", "duration_seconds": 4.0, "translated_audio": {}}], ["es-ES"])
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_narration_padded_to_scene_slots(self, mock_run):
+        from api.services.render import _pad_narration
+
+        await _pad_narration([_done("/a/0.mp3"), _done("/a/1.mp3")], _timeline(6.0, 4.0), "/a/n.wav")
+
+        cmd = mock_run.call_args[0][0]
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        assert "apad=whole_dur=6.000000,atrim=duration=6.000000[a0]" in graph
+        assert "[a0][a1]concat=n=2:v=0:a=1[a]" in graph
+        assert cmd[cmd.index("-c:a") + 1] == "pcm_s16le"
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.run_media", new_callable=AsyncMock)
+    async def test_language_version_copies_video_track(self, mock_run):
+        from api.services.render import _mux_copied_video
+
+        await _mux_copied_video(["-i", "/t/en.mp4"], "/t/pt.wav", "/t/pt.mp4", 11.5)
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-c:v") + 1] == "copy"
+        assert cmd[cmd.index("-map") + 1] == "0:v"
+        assert cmd[cmd.index("-t") + 1] == "11.5"
+
+
+class TestBuildRenderTimeline:
+    @pytest.mark.asyncio
+    @patch("api.services.render.get_duration")
+    async def test_uses_stored_durations_without_probing(self, mock_probe):
+        from api.services.render import _build_render_timeline
+
+        scenes = [{"id": "s1", "duration_seconds": 3.0}, {"id": "s2", "duration_seconds": 4.0}]
+        timeline = await _build_render_timeline(scenes, [_done("/a.mp3"), _done("/b.mp3")])
+
+        mock_probe.assert_not_called()
+        assert [e.frames for e in timeline] == [75, 100]
+
+    @pytest.mark.asyncio
+    @patch("api.services.render.get_duration", return_value=2.0)
+    async def test_probes_only_scenes_missing_duration(self, mock_probe):
+        from api.services.render import _build_render_timeline
+
+        scenes = [{"id": "s1", "duration_seconds": 3.0}, {"id": "s2", "duration_seconds": None}]
+        timeline = await _build_render_timeline(scenes, [_done("/a.mp3"), _done("/b.mp3")])
+
+        mock_probe.assert_called_once_with("/b.mp3")
+        assert timeline[1].frames == 50
+
+
+# ── Tests: _start_audio_downloads / _start_image_downloads ────────────────────
+
+
+class TestStartDownloads:
+    @patch("api.services.render.download_file", side_effect=lambda url, dest: dest)
+    def test_returns_per_scene_futures(self, mock_download):
+        """Cada cena vira um future de imagem e um de audio, na ordem das cenas."""
+        from api.services.render import _start_audio_downloads, _start_image_downloads
+
+        scenes = [
+            {"id": f"scene-{i}", "image_url": f"https://x/{i}.png", "audio_url": f"https://x/{i}.mp3"}
+            for i in range(3)
+        ]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            audio = _start_audio_downloads(pool, scenes, "/tmp/aud")
+            images = _start_image_downloads(pool, scenes, "/tmp/img", range(3))
+            assert [images[i].result() for i in range(3)] == [f"/tmp/img/scene_{i:03d}.png" for i in range(3)]
+            assert [f.result() for f in audio] == [f"/tmp/aud/scene_{i:03d}.mp3" for i in range(3)]
+
+        assert mock_download.call_count == 6
+
+    @patch("api.services.render.download_file", side_effect=lambda url, dest: dest)
+    def test_images_queued_only_for_requested_scenes(self, mock_download):
+        from api.services.render import _start_image_downloads
+
+        scenes = [{"id": f"scene-{i}", "image_url": f"https://x/{i}.png"} for i in range(5)]
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            images = _start_image_downloads(pool, scenes, "/tmp/img", [3, 4])
+
+        assert sorted(images) == [3, 4]
+        assert mock_download.call_count == 2
+
+    @patch("api.services.render.download_file")
+    def test_missing_asset_fails_before_downloading(self, mock_download):
+        from api.services.render import _start_audio_downloads
+
+        scenes = [{"id": "scene-1", "image_url": "https://x/1.png", "audio_url": None}]
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            with pytest.raises(ValueError, match="scene-1 missing image_url or audio_url"):
+                _start_audio_downloads(pool, scenes, "/tmp/aud")
+
+        mock_download.assert_not_called()
+
+
+class TestRenderFailures:
+    @staticmethod
+    def _scratch(tmp_path):
+        from contextlib import asynccontextmanager
+
+        @asynccontextmanager
+        async def scratch_dir(job, needed):
+            yield str(tmp_path)
+
+        return scratch_dir
+
+    @pytest.mark.asyncio
+    async def test_failure_before_encoding_marks_render_failed(self, tmp_path):
+        """Falha no download (antes dos encodes) tambem marca a renderizacao como 'failed'."""
+        from api.services import render, render_progress
+
+        scenes = [{"id": "scene-0", "image_url": "https://x/0.png", "audio_url": "https://x/0.mp3"}]
+        with patch.object(render.story_repo, "get_story", return_value={"id": "story-f1"}), \
+             patch.object(render.scene_repo, "get_scenes_by_story", return_value=scenes), \
+             patch.object(render.scratch, "scratch_dir", self._scratch(tmp_path)), \
+             patch.object(render, "_start_audio_downloads", side_effect=RuntimeError("download failed")):
+            with pytest.raises(RuntimeError, match="download failed"):
+                await render.render_video("story-f1", engine="clips", profile="draft")
+
+        assert render_progress.get_progress("story-f1")["status"] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_marks_render_failed(self, tmp_path):
+        from api.services import render, render_progress
+
+        scenes = [{"id": "scene-0", "image_url": "https://x/0.png", "audio_url": "https://x/0.mp3"}]
+        with patch.object(render.story_repo, "get_story", return_value={"id": "story-f2"}), \
+             patch.object(render.story_repo, "update_story") as mock_update, \
+             patch.object(render.scene_repo, "get_scenes_by_story", return_value=scenes), \
+             patch.object(render.scratch, "scratch_dir", self._scratch(tmp_path)), \
+             patch.object(render, "_start_audio_downloads", return_value=[_done("/tmp/0.mp3")]), \
+             patch.object(render, "_start_image_downloads", return_value={0: _done("/tmp/0.png")}), \
+             patch.object(render, "_build_render_timeline", AsyncMock(return_value=_timeline(2.0))), \
+             patch.object(render.music, "pick_track", AsyncMock(return_value=None)), \
+             patch.object(render, "_concat_narration", AsyncMock(return_value="/tmp/narration.mp3")), \
+             patch.object(render, "_encode_clips", AsyncMock(return_value=["/tmp/clip_000.mp4"])), \
+             patch.object(render, "_mux_copied_video", AsyncMock()), \
+             patch.object(render, "RENDER_STREAM_UPLOAD", False), \
+             patch.object(render, "upload_path", side_effect=RuntimeError("upload failed")):
+            with pytest.raises(RuntimeError, match="upload failed"):
+                await render.render_video("story-f2", engine="clips", profile="draft")
+
+        assert render_progress.get_progress("story-f2")["status"] == "failed"
+        mock_update.assert_not_called()
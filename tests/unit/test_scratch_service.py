@@ -0,0 +1,201 @@
+"""Testes unitarios para api.services.scratch."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def roots(tmp_path):
+    """Raizes de scratch RAM e disco isoladas, sem reservas ativas."""
+    from api.services import scratch
+
+    ram, disk = tmp_path / "ram", tmp_path / "disk"
+    ram.mkdir()
+    disk.mkdir()
+    with patch.object(scratch, "SCRATCH_RAM_DIR", str(ram)), \
+         patch.object(scratch, "SCRATCH_DISK_DIR", str(disk)), \
+         patch.object(scratch, "_active", {}), \
+         patch.object(scratch, "_caches", return_value=[]):
+        yield ram, disk
+
+
+# ── Tests: estimate_render_bytes ──────────────────────────────────────────────
+
+
+class TestEstimateRenderBytes:
+    def test_grows_with_duration_and_resolution(self):
+        from api.services.scratch import estimate_render_bytes
+
+        short = estimate_render_bytes([10.0] * 5, "960x540", 25)
+        assert estimate_render_bytes([10.0] * 10, "960x540", 25) > short
+        assert estimate_render_bytes([10.0] * 5, "1920x1080", 25) > short
+
+    def test_image_budget_caps_images(self):
+        """Renders segmentados so guardam as imagens de uma janela."""
+        from api.services.scratch import IMAGE_BYTES, estimate_render_bytes
+
+        full = estimate_render_bytes([5.0] * 100, "960x540", 25)
+        capped = estimate_render_bytes([5.0] * 100, "960x540", 25, image_budget=10 * IMAGE_BYTES)
+        assert full - capped >= 90 * IMAGE_BYTES
+
+    def test_local_outputs_per_language(self):
+        from api.services.scratch import estimate_render_bytes
+
+        streamed = estimate_render_bytes([10.0] * 5, "960x540", 25, languages=2)
+        local = estimate_render_bytes([10.0] * 5, "960x540", 25, languages=2, local_outputs=True)
+        assert local > streamed
+
+
+# ── Tests: scratch_dir ────────────────────────────────────────────────────────
+
+
+class TestScratchDir:
+    @pytest.mark.asyncio
+    async def test_reserves_and_removes_directory(self, roots):
+        from api.services import scratch
+
+        ram, _ = roots
+        with patch.object(scratch, "free_bytes", return_value=1 << 30):
+            async with scratch.scratch_dir("render-s1", 1 << 20) as path:
+                assert os.path.dirname(path) == str(ram)
+                assert os.path.basename(path).startswith(f"{scratch.DIR_PREFIX}{os.getpid()}-render-s1-")
+                assert path in scratch._active
+
+        assert not os.path.exists(path)
+        assert scratch._active == {}
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_disk_root(self, roots):
+        """Sem espaco em RAM, o render usa a raiz em disco."""
+        from api.services import scratch
+
+        ram, disk = roots
+        free = {str(ram): 1 << 20, str(disk): 1 << 30}
+        with patch.object(scratch, "free_bytes", side_effect=lambda root: free[root]):
+            async with scratch.scratch_dir("render-s1", 1 << 25) as path:
+                assert os.path.dirname(path) == str(disk)
+
+    @pytest.mark.asyncio
+    async def test_refuses_when_nothing_can_free_space(self, roots):
+        from api.services import scratch
+
+        with patch.object(scratch, "free_bytes", return_value=0), \
+             pytest.raises(scratch.ScratchSpaceError, match="render-s1"):
+            async with scratch.scratch_dir("render-s1", 1 << 20):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_waits_for_running_render(self, roots):
+        """Um render espera o outro liberar o scratch em vez de falhar."""
+        from api.services import scratch
+
+        budget = 1 << 20
+
+        def free(root):
+            return budget - sum(n for _, n in scratch._active.values())
+
+        order = []
+
+        async def render(name, hold):
+            async with scratch.scratch_dir(name, budget):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        with patch.object(scratch, "free_bytes", side_effect=free), \
+             patch.object(scratch, "POLL_SECONDS", 0.01):
+            first = asyncio.ensure_future(render("first", 0.05))
+            await asyncio.sleep(0.01)
+            await render("second", 0)
+            await first
+
+        assert order == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_wait(self, roots):
+        from api.services import scratch
+
+        with patch.object(scratch, "free_bytes", return_value=0), \
+             patch.object(scratch, "_active", {"/other": ("/ram", 1)}), \
+             patch.object(scratch, "POLL_SECONDS", 0.01), \
+             patch.object(scratch, "SCRATCH_WAIT_SECONDS", 0.03), \
+             pytest.raises(scratch.ScratchSpaceError):
+            async with scratch.scratch_dir("render-s1", 1 << 20):
+                pass
+
+
+class TestFreeBytes:
+    def test_subtracts_unwritten_reservations(self, roots):
+        """Bytes ja escritos por renders ativos nao sao descontados duas vezes."""
+        from api.services import scratch
+
+        ram, _ = roots
+        running = ram / "running"
+        running.mkdir()
+        (running / "clip.mp4").write_bytes(b"x" * 1000)
+        with patch.object(scratch, "_filesystem", return_value="ext4"):
+            before = scratch.free_bytes(str(ram))
+            scratch._active[str(running)] = (str(ram), 5000)
+            after = scratch.free_bytes(str(ram))
+
+        assert before - after == pytest.approx(4000, abs=4096)
+
+    def test_ram_root_bounded_by_memory(self, roots):
+        from api.services import scratch
+
+        ram, _ = roots
+        with patch.object(scratch, "_filesystem", return_value="tmpfs"), \
+             patch.object(scratch, "_memory_available", return_value=600 * 1024 * 1024), \
+             patch.object(scratch, "SCRATCH_HEADROOM_MB", 512):
+            assert scratch.free_bytes(str(ram)) == 88 * 1024 * 1024
+
+
+    def test_keeps_room_for_caches_on_the_same_root(self, roots, tmp_path):
+        """Os caches que crescem durante o render descontam o que ainda podem escrever."""
+        from api.services import scratch
+
+        ram, _ = roots
+        cache_dir = ram / "lost-archives" / "clip-cache"
+        cache_dir.mkdir(parents=True)
+        (cache_dir / "a.mp4").write_bytes(b"x" * 1000)
+        with patch.object(scratch, "_filesystem", return_value="ext4"):
+            before = scratch.free_bytes(str(ram))
+            with patch.object(scratch, "_caches", return_value=[
+                (str(cache_dir), 5000), (str(ram / "lost-archives" / "tts-cache"), 3000),
+            ]):
+                after = scratch.free_bytes(str(ram))
+
+        assert before - after == pytest.approx(7000, abs=4096)
+
+    def test_caches_elsewhere_are_not_counted(self, roots):
+        from api.services import scratch
+
+        ram, _ = roots
+        with patch.object(scratch, "_device", side_effect=lambda path: 1 if path == str(ram) else 2):
+            assert scratch.cache_growth(str(ram)) == 0
+            with patch.object(scratch, "_caches", return_value=[("/elsewhere/clip-cache", 5000)]):
+                assert scratch.cache_growth(str(ram)) == 0
+
+
+# ── Tests: cleanup_orphans ────────────────────────────────────────────────────
+
+
+class TestCleanupOrphans:
+    def test_removes_directories_of_dead_processes(self, roots):
+        from api.services import scratch
+
+        ram, _ = roots
+        live = ram / f"{scratch.DIR_PREFIX}{os.getppid()}-render-a-x"
+        own = ram / f"{scratch.DIR_PREFIX}{os.getpid()}-render-b-x"
+        dead = ram / f"{scratch.DIR_PREFIX}999999999-render-c-x"
+        other = ram / "unrelated"
+        for path in (live, own, dead, other):
+            path.mkdir()
+
+        assert scratch.cleanup_orphans() == 2
+        assert live.exists() and other.exists()
+        assert not own.exists() and not dead.exists()
@@ -0,0 +1,204 @@
+"""Testes unitarios para api.services.storage."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+
+def _response(status: int, chunks: list[bytes] | None = None) -> MagicMock:
+    response = MagicMock()
+    response.status_code = status
+    response.__enter__.return_value = response
+    response.iter_content.return_value = chunks or []
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(f"HTTP {status}", response=response)
+    return response
+
+
+# ── Tests: download_file ──────────────────────────────────────────────────────
+
+
+class TestDownloadFile:
+    @patch("api.services.storage.time.sleep")
+    @patch("api.services.storage._get_http_session")
+    def test_streams_chunks_to_disk(self, mock_session, mock_sleep, tmp_path):
+        """Conteudo e gravado em chunks e o arquivo final aparece no destino."""
+        mock_session.return_value.get.return_value = _response(200, [b"abc", b"def"])
+        from api.services.storage import download_file
+
+        dest = str(tmp_path / "scene.png")
+        assert download_file("https://x/scene.png", dest) == dest
+        assert (tmp_path / "scene.png").read_bytes() == b"abcdef"
+        assert not (tmp_path / "scene.png.part").exists()
+
+        kwargs = mock_session.return_value.get.call_args.kwargs
+        assert kwargs["stream"] is True
+        assert kwargs["timeout"] > 0
+
+    @patch("api.services.storage.time.sleep")
+    @patch("api.services.storage._get_http_session")
+    def test_retries_transient_failures(self, mock_session, mock_sleep, tmp_path):
+        """Timeout e 503 sao repetidos; o download conclui na terceira tentativa."""
+        mock_session.return_value.get.side_effect = [
+            requests.Timeout("slow"),
+            _response(503),
+            _response(200, [b"ok"]),
+        ]
+        from api.services.storage import download_file
+
+        download_file("https://x/a.mp3", str(tmp_path / "a.mp3"))
+
+        assert mock_session.return_value.get.call_count == 3
+        assert (tmp_path / "a.mp3").read_bytes() == b"ok"
+
+    @patch("api.services.storage.time.sleep")
+    @patch("api.services.storage._get_http_session")
+    def test_client_errors_are_not_retried(self, mock_session, mock_sleep, tmp_path):
+        mock_session.return_value.get.return_value = _response(404)
+        from api.services.storage import download_file
+
+        with pytest.raises(requests.HTTPError):
+            download_file("https://x/missing.png", str(tmp_path / "missing.png"))
+
+        assert mock_session.return_value.get.call_count == 1
+        mock_sleep.assert_not_called()
+
+
+# ── Tests: upload_path ────────────────────────────────────────────────────────
+
+
+class TestUploadPath:
+    @patch("api.services.storage.get_supabase")
+    def test_uploads_file_object_not_bytes(self, mock_supabase, tmp_path):
+        """O arquivo vai para o storage como stream aberto, sem ler tudo em memoria."""
+        bucket = mock_supabase.return_value.storage.from_.return_value
+        bucket.get_public_url.return_value = "https://storage/videos/s/s.mp4"
+        from api.services.storage import upload_path
+
+        video = tmp_path / "s.mp4"
+        video.write_bytes(b"video")
+        url = upload_path("videos", "s/s.mp4", str(video), "video/mp4")
+
+        assert url == "https://storage/videos/s/s.mp4"
+        sent = bucket.upload.call_args.kwargs["file"]
+        assert not isinstance(sent, bytes)
+        assert sent.name == str(video)
+
+
+class TestVersionedPath:
+    def test_new_content_gets_new_path(self):
+        """Conteudo diferente muda o caminho (e a URL publica); o mesmo conteudo nao."""
+        from api.services.storage import versioned_path
+
+        first = versioned_path("story-1/scene-1.png", b"old")
+
+        assert first.startswith("story-1/scene-1.") and first.endswith(".png")
+        assert first == versioned_path("story-1/scene-1.png", b"old")
+        assert first != versioned_path("story-1/scene-1.png", b"new")
+
+
+class TestObjectPath:
+    def test_public_url_of_the_bucket(self):
+        from api.services.storage import object_path
+
+        url = "https://x.supabase.co/storage/v1/object/public/videos/s/s.draft.1a2b.mp4?download="
+
+        assert object_path("videos", url) == "s/s.draft.1a2b.mp4"
+        assert object_path("images", url) is None
+
+
+# ── Tests: upload_stream ──────────────────────────────────────────────────────
+
+
+async def _chunks(*parts: bytes, error: Exception | None = None):
+    for part in parts:
+        yield part
+    if error:
+        raise error
+
+
+class TestUploadStream:
+    @pytest.mark.asyncio
+    @patch("api.services.storage._tus_abort")
+    @patch("api.services.storage.get_public_url", return_value="https://storage/videos/s.mp4")
+    @patch("api.services.storage._tus_patch")
+    @patch("api.services.storage._tus_create", return_value="https://tus/upload/1")
+    async def test_rechunks_and_declares_length_on_last_chunk(self, mock_create, mock_patch, mock_url, mock_abort):
+        """Chunks sao recortados no tamanho do TUS e so o ultimo declara o tamanho total."""
+        from api.services import storage
+
+        mock_patch.side_effect = lambda url, offset, chunk, length=None: offset + len(chunk)
+        with patch.object(storage, "TUS_CHUNK_SIZE", 4):
+            url = await storage.upload_stream("videos", "s.mp4", _chunks(b"abc", b"defgh", b"ij"), "video/mp4")
+
+        assert url == "https://storage/videos/s.mp4"
+        mock_abort.assert_not_called()
+        sent = [(c[0][1], c[0][2], c[0][3] if len(c[0]) > 3 else None) for c in mock_patch.call_args_list]
+        assert sent == [(0, b"abcd", None), (4, b"efgh", None), (8, b"ij", 10)]
+
+    @pytest.mark.asyncio
+    @patch("api.services.storage._tus_abort")
+    @patch("api.services.storage._tus_patch", side_effect=lambda url, offset, chunk, length=None: offset + len(chunk))
+    @patch("api.services.storage._tus_create", return_value="https://tus/upload/1")
+    async def test_producer_error_never_finalizes(self, mock_create, mock_patch, mock_abort):
+        from api.services import storage
+
+        with patch.object(storage, "TUS_CHUNK_SIZE", 4), pytest.raises(RuntimeError, match="ffmpeg failed"):
+            await storage.upload_stream(
+                "videos", "s.mp4", _chunks(b"abcdefgh", error=RuntimeError("ffmpeg failed")), "video/mp4",
+            )
+
+        assert all(len(c[0]) == 3 for c in mock_patch.call_args_list)
+        mock_abort.assert_called_once_with("https://tus/upload/1")
+
+    @pytest.mark.asyncio
+    @patch("api.services.storage._tus_abort")
+    @patch("api.services.storage._tus_create", return_value="https://tus/upload/1")
+    async def test_cancelled_upload_closes_producer_and_aborts(self, mock_create, mock_abort):
+        """Cancelar o upload fecha o produtor (mata o ffmpeg) e encerra o upload TUS."""
+        from api.services import storage
+
+        closed = asyncio.Event()
+
+        async def endless():
+            try:
+                while True:
+                    yield b"x" * 4
+                    await asyncio.sleep(0)
+            finally:
+                closed.set()
+
+        def slow_patch(url, offset, chunk, length=None):
+            time.sleep(0.05)
+            return offset + len(chunk)
+
+        with patch.object(storage, "TUS_CHUNK_SIZE", 4), patch.object(storage, "_tus_patch", slow_patch):
+            task = asyncio.ensure_future(storage.upload_stream("videos", "s.mp4", endless(), "video/mp4"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert closed.is_set()
+        mock_abort.assert_called_once_with("https://tus/upload/1")
+
+
+class TestTusPatch:
+    @patch("api.services.storage.time.sleep")
+    @patch("api.services.storage._get_http_session")
+    def test_resumes_from_server_offset_after_failure(self, mock_session, mock_sleep):
+        """Depois de uma falha transitoria, reenvia so o que o servidor ainda nao tem."""
+        ok = MagicMock(status_code=204, headers={"Upload-Offset": "16"})
+        mock_session.return_value.patch.side_effect = [requests.ConnectionError("reset"), ok]
+        mock_session.return_value.head.return_value = MagicMock(headers={"Upload-Offset": "13"})
+        from api.services.storage import _tus_patch
+
+        assert _tus_patch("https://tus/upload/1", 10, b"abcdef") == 16
+        retry = mock_session.return_value.patch.call_args
+        assert retry.kwargs["data"] == b"def"
+        assert retry.kwargs["headers"]["Upload-Offset"] == "13"
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from unittest.mock import patch
+
 
 class TestCreateStory:
     def test_returns_created_story(self, mock_supabase):
@@ -109,6 +111,28 @@ class TestUpdateStory:
         assert result == {}
 
 
+class TestUpdateMetadata:
+    def test_merges_with_existing_metadata(self, mock_supabase):
+        mock_supabase.set_response("stories", {"metadata": {"description": "d", "tags": "t"}})
+        from api.db.repositories import story_repo
+
+        with patch.object(story_repo, "update_story", return_value={}) as update:
+            story_repo.update_metadata("uuid-1", {"render": {"fps": 50.0}})
+
+        update.assert_called_once_with(
+            "uuid-1", {"metadata": {"description": "d", "tags": "t", "render": {"fps": 50.0}}},
+        )
+
+    def test_story_without_metadata(self, mock_supabase):
+        mock_supabase.set_response("stories", {"metadata": None})
+        from api.db.repositories import story_repo
+
+        with patch.object(story_repo, "update_story", return_value={}) as update:
+            story_repo.update_metadata("uuid-1", {"tags": "t"})
+
+        update.assert_called_once_with("uuid-1", {"metadata": {"tags": "t"}})
+
+
 class TestDeleteStory:
     def test_delete_completes_without_error(self, mock_supabase):
         mock_supabase.set_response("stories", [])
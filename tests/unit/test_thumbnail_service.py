@@ -0,0 +1,84 @@
+"""Testes unitarios para api.services.thumbnail."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+
+STORY = {"id": "story-1", "topic": "The lost library of Alexandria and its end", "thumbnail_mode": "frames"}
+
+
+def _noise(seed: int = 0) -> Image.Image:
+    return Image.fromarray(np.random.default_rng(seed).integers(0, 255, (360, 640, 3), dtype=np.uint8))
+
+
+class TestFrameScore:
+    def test_sharp_frame_beats_blurred(self):
+        from api.services.thumbnail import frame_score
+
+        sharp = _noise()
+        assert frame_score(sharp) > frame_score(sharp.filter(ImageFilter.GaussianBlur(6)))
+
+    def test_flat_frame_scores_zero(self):
+        from api.services.thumbnail import frame_score
+
+        assert frame_score(Image.new("RGB", (640, 360), "gray")) == 0
+
+
+class TestComposeFrameThumbnail:
+    @pytest.mark.parametrize("size", [(640, 360), (360, 640)])
+    def test_output_is_16_9(self, size):
+        """Imagens de qualquer formato viram thumbnails 1280x720."""
+        from api.services.thumbnail import THUMBNAIL_SIZE, compose_frame_thumbnail
+
+        thumb = compose_frame_thumbnail(_noise().resize(size), "THE LOST LIBRARY")
+
+        assert thumb.size == THUMBNAIL_SIZE
+
+    def test_overlay_text_drops_dangling_words(self):
+        from api.services.thumbnail import _overlay_text
+
+        assert _overlay_text(STORY) == "THE LOST LIBRARY OF ALEXANDRIA"
+        assert _overlay_text({**STORY, "selected_title": "Rome"}) == "ROME"
+
+
+class TestGenerateFrameThumbnails:
+    @pytest.mark.asyncio
+    @patch("api.services.thumbnail._imagen_client")
+    @patch("api.services.thumbnail._generate_thumbnail_prompts")
+    @patch("api.services.thumbnail.upload_file", return_value="https://s/thumb.png")
+    @patch("api.services.thumbnail.options_repo")
+    @patch("api.services.thumbnail.scene_repo")
+    @patch("api.services.thumbnail.story_repo")
+    async def test_best_scenes_without_provider_calls(
+        self, mock_story, mock_scene, mock_options, mock_upload, mock_prompts, mock_imagen, tmp_path,
+    ):
+        """O modo frames usa as cenas mais nitidas e nao chama Gemini/Imagen."""
+        from api.services import thumbnail
+
+        images = {}
+        for i in range(5):
+            img = _noise(i) if i in (1, 3, 4) else _noise(i).filter(ImageFilter.GaussianBlur(8))
+            images[f"https://s/img{i}.png"] = img
+        mock_story.get_story.return_value = STORY
+        mock_scene.get_scenes_by_story.return_value = [
+            {"id": f"scene-{i}", "scene_order": i, "image_url": url} for i, url in enumerate(images)
+        ]
+
+        def download(url, suffix=""):
+            path = tmp_path / url.rsplit("/", 1)[1]
+            images[url].save(path)
+            return str(path)
+
+        with patch.object(thumbnail, "download_to_temp", side_effect=download):
+            count = await thumbnail.generate_thumbnails("story-1")
+
+        assert count == 3
+        prompts = [c[0][0]["prompt"] for c in mock_options.create_thumbnail_option.call_args_list]
+        assert sorted(p.split(":")[0] for p in prompts) == [f"Frame of scene {i}" for i in (1, 3, 4)]
+        mock_prompts.assert_not_called()
+        mock_imagen.models.generate_images.assert_not_called()
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,63 @@
+"""Testes unitarios para api.services.timeline."""
+
+from __future__ import annotations
+
+import pytest
+
+
+def _scenes(*durations):
+    return [{"id": f"scene-{i}", "duration_seconds": d} for i, d in enumerate(durations)]
+
+
+class TestBuildTimeline:
+    def test_scenes_scheduled_back_to_back(self):
+        """Cada cena comeca onde a anterior termina, com a propria duracao."""
+        from api.services.timeline import build_timeline
+
+        timeline = build_timeline(_scenes(2.0, 3.48, 1.0))
+
+        assert [(e.start, e.end) for e in timeline] == [(0.0, 2.0), (2.0, 5.48), (5.48, 6.48)]
+        assert [e.frames for e in timeline] == [50, 87, 25]
+        assert [e.scene_id for e in timeline] == ["scene-0", "scene-1", "scene-2"]
+
+    def test_effects_cycle(self):
+        from api.services.timeline import build_timeline, EFFECTS
+
+        timeline = build_timeline(_scenes(*[1.0] * 6))
+
+        assert [e.effect for e in timeline] == EFFECTS + EFFECTS[:2]
+
+    def test_frames_depend_only_on_own_duration(self):
+        """Mudar a duracao de uma cena nao altera o numero de frames das outras."""
+        from api.services.timeline import build_timeline
+
+        a = build_timeline(_scenes(2.02, 3.01, 4.0))
+        b = build_timeline(_scenes(2.5, 3.01, 4.0))
+
+        assert a[1].frames == b[1].frames
+        assert a[2].frames == b[2].frames
+
+    def test_total_duration(self):
+        from api.services.timeline import build_timeline, total_duration
+
+        assert total_duration(build_timeline(_scenes(1.0, 2.0))) == 3.0
+        assert total_duration([]) == 0.0
+
+    def test_missing_duration_raises(self):
+        from api.services.timeline import build_timeline
+
+        with pytest.raises(ValueError, match="scene-1 has no duration_seconds"):
+            build_timeline(_scenes(2.0, None))
+
+
+class TestBuildEntry:
+    def test_entry_matches_its_place_in_the_timeline(self):
+        """Uma cena isolada tem os mesmos frames e efeito que na timeline completa."""
+        from api.services.timeline import build_entry, build_timeline
+
+        scenes = [{"id": f"s{i}", "duration_seconds": d} for i, d in enumerate([3.3, 4.7, 5.1])]
+        entry = build_entry(scenes[2], 2)
+        in_timeline = build_timeline(scenes)[2]
+
+        assert (entry.frames, entry.effect) == (in_timeline.frames, in_timeline.effect)
+        assert entry.start == 0.0
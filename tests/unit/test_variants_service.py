@@ -0,0 +1,197 @@
+"""Testes unitarios para api.services.variants."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+SOURCE = {"id": "story-1", "topic": "Rome", "style": "cinematic", "aspect_ratio": "16:9",
+          "languages": ["en-US"], "script_text": "...", "metadata": {"description": "d", "tags": "t", "render": {}}}
+SCENES = [
+    {"id": f"scene-{i}", "scene_order": i, "text_content": f"Text {i}", "image_url": f"https://s/img{i}.png",
+     "audio_url": f"https://s/audio{i}.mp3", "duration_seconds": 4.0}
+    for i in range(2)
+]
+
+
+def _subject_image(x: int) -> Image.Image:
+    """Imagem 16:9 lisa com um unico objeto detalhado centrado em x."""
+    pixels = np.full((180, 320), 90, dtype=np.uint8)
+    rng = np.random.default_rng(0)
+    pixels[40:140, x - 25:x + 25] = rng.integers(0, 255, (100, 50))
+    return Image.fromarray(pixels).convert("RGB")
+
+
+class TestSmartCrop:
+    def test_crop_follows_the_subject(self):
+        """O recorte 9:16 se posiciona sobre a regiao detalhada, nao no centro."""
+        from api.services.variants import smart_crop
+
+        box, score = smart_crop(_subject_image(250), 9 / 16)
+
+        left, top, right, bottom = box
+        assert (right - left, bottom - top) == (101, 180)
+        assert left <= 225 and right >= 275
+        assert score > 0.9
+
+    def test_evenly_detailed_image_is_kept(self):
+        """Detalhe espalhado por toda a imagem: qualquer recorte serve."""
+        from api.config import VARIANT_MIN_SALIENCY
+        from api.services.variants import smart_crop
+
+        noise = np.random.default_rng(1).integers(0, 255, (180, 320, 3), dtype=np.uint8)
+        _, score = smart_crop(Image.fromarray(noise), 9 / 16)
+
+        assert score >= VARIANT_MIN_SALIENCY
+
+    def test_detailed_image_with_off_centre_subject(self):
+        """Textura em toda a imagem mais um objeto fora do centro: o recorte segue o objeto e passa no limite."""
+        from api.config import VARIANT_MIN_SALIENCY
+        from api.services.variants import smart_crop
+
+        rng = np.random.default_rng(0)
+        pixels = np.clip(90 + rng.normal(0, 20, (180, 320)), 0, 255)
+        pixels[40:140, 225:275] = rng.integers(0, 255, (100, 50))
+        box, score = smart_crop(Image.fromarray(pixels.astype(np.uint8)).convert("RGB"), 9 / 16)
+
+        assert box[0] <= 225 and box[2] >= 275
+        assert score >= VARIANT_MIN_SALIENCY
+
+    def test_subjects_at_opposite_edges_score_low(self):
+        """Dois objetos nas bordas: o recorte 9:16 perde um deles e a imagem e gerada de novo."""
+        from api.config import VARIANT_MIN_SALIENCY
+        from api.services.variants import smart_crop
+
+        rng = np.random.default_rng(0)
+        pixels = np.clip(90 + rng.normal(0, 10, (180, 320)), 0, 255)
+        pixels[40:140, 20:70] = rng.integers(0, 255, (100, 50))
+        pixels[40:140, 250:300] = rng.integers(0, 255, (100, 50))
+        _, score = smart_crop(Image.fromarray(pixels.astype(np.uint8)).convert("RGB"), 9 / 16)
+
+        assert score < VARIANT_MIN_SALIENCY
+
+    def test_landscape_from_portrait_slides_vertically(self):
+        from api.services.variants import smart_crop
+
+        box, _ = smart_crop(_subject_image(160).rotate(90, expand=True), 16 / 9)
+
+        assert box[0] == 0 and box[2] == 180
+        assert box[3] - box[1] == round(180 * 9 / 16)
+
+
+class TestCloneStory:
+    @patch("api.services.variants.options_repo")
+    @patch("api.services.variants.scene_repo")
+    @patch("api.services.variants.story_repo")
+    def test_clones_scenes_referencing_source_audio(self, mock_story_repo, mock_scene_repo, mock_options_repo):
+        mock_story_repo.get_story.return_value = SOURCE
+        mock_story_repo.create_story.side_effect = lambda data: {"id": "variant-1", **data}
+        mock_scene_repo.get_scenes_by_story.return_value = SCENES
+        mock_options_repo.get_title_options.return_value = [{"title_text": "A"}, {"title_text": "B"}]
+
+        from api.services.variants import clone_story
+
+        variant = clone_story("story-1", "9:16")
+
+        assert variant["variant_of"] == "story-1"
+        assert variant["style"] == "cinematic"
+        assert variant["metadata"] == {"description": "d", "tags": "t"}
+        cloned = mock_scene_repo.create_scenes_bulk.call_args[0][0]
+        assert [s["audio_url"] for s in cloned] == ["https://s/audio0.mp3", "https://s/audio1.mp3"]
+        assert all(s["story_id"] == "variant-1" for s in cloned)
+        assert len(mock_options_repo.create_title_options.call_args[0][0]) == 2
+
+    @patch("api.services.variants.scene_repo")
+    @patch("api.services.variants.story_repo")
+    def test_unfinished_story_rejected(self, mock_story_repo, mock_scene_repo):
+        mock_story_repo.get_story.return_value = SOURCE
+        mock_scene_repo.get_scenes_by_story.return_value = [{**SCENES[0], "audio_url": None}]
+
+        from api.services.variants import clone_story
+
+        with pytest.raises(ValueError, match="no finished scenes"):
+            clone_story("story-1", "9:16")
+
+    @patch("api.services.variants.story_repo")
+    def test_variant_must_change_something(self, mock_story_repo):
+        mock_story_repo.get_story.return_value = SOURCE
+
+        from api.services.variants import clone_story
+
+        with pytest.raises(ValueError, match="must change"):
+            clone_story("story-1", "16:9", "cinematic")
+
+
+class TestCropToStorage:
+    @staticmethod
+    def _crop(tmp_path, size):
+        from api.services import variants
+
+        path = tmp_path / "source.png"
+        _subject_image(250).resize(size, Image.NEAREST).save(path)
+        with patch.object(variants, "download_to_temp", return_value=str(path)), \
+             patch.object(variants, "upload_file", return_value="https://s/cropped.png") as mock_upload:
+            url = variants._crop_to_storage("https://s/img.png", 9 / 16, "images", "v/s.png", min_short_side=540)
+        return url, mock_upload
+
+    def test_small_crop_is_regenerated(self, tmp_path):
+        """Recorte 9:16 de 1408x768 tem 432px de largura: ampliado demais para o perfil final."""
+        url, mock_upload = self._crop(tmp_path, (1408, 768))
+
+        assert url is None
+        mock_upload.assert_not_called()
+
+    def test_large_enough_crop_is_uploaded(self, tmp_path):
+        url, mock_upload = self._crop(tmp_path, (2048, 1152))
+
+        assert url == "https://s/cropped.png"
+        mock_upload.assert_called_once()
+
+
+class TestSharedBuckets:
+    def test_without_variants_nothing_is_shared(self):
+        from api.services.variants import shared_buckets
+
+        assert shared_buckets(SOURCE, []) == set()
+
+    def test_aspect_variant_shares_audio_only(self):
+        from api.services.variants import shared_buckets
+
+        assert shared_buckets(SOURCE, [{"aspect_ratio": "9:16"}]) == {"audio"}
+
+    def test_style_variant_shares_images_and_thumbnails(self):
+        """Variante so de estilo reaproveita thumbnails (e imagens ate regenerar)."""
+        from api.services.variants import shared_buckets
+
+        shared = shared_buckets(SOURCE, [{"aspect_ratio": "9:16"}, {"aspect_ratio": "16:9"}])
+
+        assert shared == {"audio", "images", "thumbnails"}
+
+
+class TestAdaptSceneImages:
+    @pytest.mark.asyncio
+    @patch("api.services.variants.image_service")
+    @patch("api.services.variants.scene_repo")
+    @patch("api.services.variants.story_repo")
+    async def test_generates_only_where_crop_fails(self, mock_story_repo, mock_scene_repo, mock_image):
+        """Cenas com recorte aceitavel sao recortadas; so as demais vao para o Imagen."""
+        variant = {**SOURCE, "id": "variant-1", "aspect_ratio": "9:16", "variant_of": "story-1"}
+        mock_story_repo.get_story.side_effect = [variant, SOURCE]
+        mock_scene_repo.get_scenes_by_story.return_value = SCENES
+        mock_image.generate_image_for_scene = AsyncMock()
+
+        from api.services import variants
+
+        def crop(url, *args):
+            return "https://s/cropped0.png" if url.endswith("img0.png") else None
+
+        with patch.object(variants, "_crop_to_storage", side_effect=crop) as mock_crop:
+            generated = await variants.adapt_scene_images("variant-1")
+
+        assert generated == 1
+        assert mock_crop.call_args.args[-1] == 540  # final short side 1080, at most 2x upscale
+        mock_scene_repo.update_scene.assert_called_once_with("scene-0", {"image_url": "https://s/cropped0.png"})
+        mock_image.generate_image_for_scene.assert_awaited_once_with("scene-1", variant)